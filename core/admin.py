@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
 from .models import (
     Profile, Address, CustomerAddresses, Customers, Employees,
     MenuItems, OrderAssignment, OrderItems, Orders,
     PaymentMethods, Restaurants, Vehicles
 )
+from . import exports, search
+from .summaries import get_customer_summary
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 
@@ -48,11 +55,77 @@ class CustomUserAdmin(BaseUserAdmin):
         return super(CustomUserAdmin, self).get_inline_instances(request, obj)
 
 
+def estimated_rows(using, table):
+    """The database's own row estimate for a table, or None if it keeps none."""
+    connection = connections[using]
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [table])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for tables with millions of rows. An unfiltered changelist
+    takes its count from the table statistics rather than COUNT(*); a
+    filtered or searched one counts at most ADMIN_COUNT_LIMIT rows, so the
+    last page number is a floor rather than exact. Pages past it still
+    load, and each one read extends the page links by one.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = getattr(settings, 'ADMIN_COUNT_LIMIT', 10000)
+        if not queryset.query.where:
+            estimate = estimated_rows(queryset.db, queryset.model._meta.db_table)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit + 1].count()
+
+    def validate_number(self, number):
+        """Any page from 1 up: the count is an estimate or a floor, so later pages may exist."""
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        """
+        Like Paginator.page, but the slice is not clipped to the count. One
+        row past the page is read; if the rows seen go past the count, the
+        count is raised so the page links reach them.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        seen = bottom + len(rows)
+        if seen > self.count:
+            self.count = seen
+            self.__dict__.pop('num_pages', None)
+        return self._get_page(rows[:self.per_page], number, self)
+
+
 class ReadOnlyAdmin(admin.ModelAdmin):
     """
     A base class that makes a model read-only in the admin.
     It also prevents adding or deleting objects.
+
+    Changelists never run a full COUNT(*) (EstimatedCountPaginator, no
+    'N total' link), and searching avoids LIKE '%term%' scans:
+    whole-number terms match search_id_fields exactly, and search_fields
+    should only use '=' (exact) and '^' (prefix) lookups, which an index on
+    the column can serve (see indexes.RECOMMENDED_INDEXES).
     """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_id_fields = ()
 
     def has_add_permission(self, request, obj=None):
         return False
@@ -80,90 +153,166 @@ class ReadOnlyAdmin(admin.ModelAdmin):
             return readonly_fields_list
         return []
 
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term.isdigit() and self.search_id_fields:
+            return queryset.filter(Q.create(
+                [(field, int(term)) for field in self.search_id_fields], connector=Q.OR,
+            )), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+class CatalogSearchAdmin(ReadOnlyAdmin):
+    """
+    Searches names and descriptions through the in-memory search index.
+    While the index is still being built, names are matched by prefix.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or term.isdigit():
+            return super().get_search_results(request, queryset, search_term)
+        if not search.index.is_ready():
+            search.index.request_rebuild()
+            return queryset.filter(**{f'{self.search_fields[0]}__istartswith': term}), False
+        limit = getattr(settings, 'ADMIN_SEARCH_LIMIT', 500)
+        ids = [r['id'] for r in search.index.search(term, limit, kinds=(self.search_kind,))]
+        return queryset.filter(pk__in=ids), False
+
 
 class CustomerAdmin(ReadOnlyAdmin):
     """Read-only admin for Customers, with addresses shown inline."""
     inlines = (CustomerAddressInline,)
     list_display = ('customer_id', 'first_name', 'last_name', 'phone')
-    search_fields = ('first_name', 'last_name', 'phone')
+    search_fields = ('^last_name', '^first_name', '=phone')
+    search_id_fields = ('customer_id',)
+    summary_fields = ('order_count', 'lifetime_spend', 'last_order_at')
+
+    def get_readonly_fields(self, request, obj=None):
+        fields = super().get_readonly_fields(request, obj)
+        return list(fields) + list(self.summary_fields) if obj else fields
+
+    def _summary(self, obj):
+        # One lookup per change page, shared by the three fields below
+        # pylint: disable=protected-access
+        if getattr(obj, '_summary', None) is None:
+            obj._summary = get_customer_summary(obj.customer_id)
+        return obj._summary
+
+    @admin.display(description='Orders')
+    def order_count(self, obj):
+        return self._summary(obj)['order_count']
+
+    @admin.display(description='Lifetime spend')
+    def lifetime_spend(self, obj):
+        return self._summary(obj)['total_spend']
+
+    @admin.display(description='Last order')
+    def last_order_at(self, obj):
+        return self._summary(obj)['last_order_at']
 
 # --- REVISED FIX for OrderAdmin ---
 
 
-class OrderAdmin(ReadOnlyAdmin):
-    """Read-only admin for Orders."""
-    # Define display and filter fields based on model introspection
-    _list_display = ['order_id', 'customer',
-                     'restaurant', 'payment', 'total_price']
-    _list_filter = ['restaurant']
-    _search_fields = ['order_id',
-                      'customer__first_name', 'customer__last_name']
+@admin.action(description='Export selected orders as CSV')
+def export_csv(modeladmin, request, queryset):
+    return exports.streaming_response(modeladmin.orders_for_export(queryset), 'csv',
+                                      request=request)
 
-    # Dynamically add order_date and status if they exist on the model
-    if hasattr(Orders, 'order_date'):
-        _list_display.append('order_date')
-        _list_filter.append('order_date')
-    if hasattr(Orders, 'status'):
-        _list_display.append('status')
-        _list_filter.append('status')
 
-    list_display = tuple(_list_display)
-    list_filter = tuple(_list_filter)
-    search_fields = tuple(_search_fields)
+@admin.action(description='Export selected orders as JSON lines')
+def export_jsonl(modeladmin, request, queryset):
+    return exports.streaming_response(modeladmin.orders_for_export(queryset), 'jsonl',
+                                      request=request)
 
-    # get_readonly_fields is inherited from ReadOnlyAdmin
+
+class OrderAdmin(ReadOnlyAdmin):
+    """
+    Read-only admin for Orders. The export actions stream the selected
+    orders, or the whole filtered changelist with 'select all'.
+    """
+    list_display = ('order_id', 'customer', 'restaurant', 'payment', 'total_price',
+                    'order_date', 'delivery_status')
+    list_select_related = ('customer', 'restaurant', 'payment')
+    # No restaurant filter: its sidebar would list every restaurant
+    list_filter = ('delivery_status', 'order_date')
+    search_fields = ('^customer__last_name',)
+    search_id_fields = ('order_id', 'customer_id', 'restaurant_id')
+    actions = (export_csv, export_jsonl)
+
+    def orders_for_export(self, queryset):
+        return queryset
 
 
 class OrderItemAdmin(ReadOnlyAdmin):
-    """Read-only admin for OrderItems."""
+    """Read-only admin for OrderItems. The export actions export the lines' orders."""
     list_display = ('order', 'item', 'quantity')
-    search_fields = ('order__order_id', 'item__item_name')
+    list_select_related = ('order', 'item')
+    search_fields = ('^item__item_name',)
+    search_id_fields = ('order_id', 'item_id')
+    actions = (export_csv, export_jsonl)
+
+    def orders_for_export(self, queryset):
+        return Orders.objects.filter(order_id__in=queryset.values('order_id'))
 
 
-class RestaurantAdmin(ReadOnlyAdmin):
+class RestaurantAdmin(CatalogSearchAdmin):
     """Read-only admin for Restaurants."""
     list_display = ('restaurant_id', 'name', 'cuisine', 'address')
+    list_select_related = ('address',)
     list_filter = ('cuisine',)
-    search_fields = ('name', 'cuisine')
+    search_fields = ('name',)  # shows the search box; the index does the matching
+    search_kind = 'restaurant'
+    search_id_fields = ('restaurant_id',)
 
 
-class MenuItemAdmin(ReadOnlyAdmin):
+class MenuItemAdmin(CatalogSearchAdmin):
     """Read-only admin for MenuItems."""
     list_display = ('item_id', 'item_name', 'restaurant', 'price')
-    list_filter = ('restaurant',)
-    search_fields = ('item_name', 'restaurant__name')
+    list_select_related = ('restaurant',)
+    search_fields = ('item_name',)
+    search_kind = 'item'
+    search_id_fields = ('item_id', 'restaurant_id')
 
 
 class EmployeeAdmin(ReadOnlyAdmin):
     """Read-only admin for Employees."""
     list_display = ('employee_id', 'employee_name',
                     'phone', 'supervises_employee','role')
-    search_fields = ('employee_name', 'phone')
+    list_select_related = ('supervises_employee',)
+    search_fields = ('^employee_name', '=phone')
+    search_id_fields = ('employee_id',)
 
 
 class VehicleAdmin(ReadOnlyAdmin):
     """Read-only admin for Vehicles."""
     list_display = ('vehicle_id', 'registration_number', 'type')
     list_filter = ('type',)
-    search_fields = ('registration_number',)
+    search_fields = ('^registration_number',)
+    search_id_fields = ('vehicle_id',)
 
 
 class PaymentMethodAdmin(ReadOnlyAdmin):
     """Read-only admin for PaymentMethods."""
     list_display = ('payment_id', 'customer', 'payment_type', 'total_spend')
-    search_fields = ('customer__first_name', 'payment_type')
+    list_select_related = ('customer',)
+    search_fields = ('^customer__last_name',)
+    search_id_fields = ('payment_id', 'customer_id')
 
 
 class AddressAdmin(ReadOnlyAdmin):
     """Read-only admin for Addresses."""
     list_display = ('address_id', 'address_line_1', 'state', 'zipcode')
-    search_fields = ('address_line_1', 'zipcode')
+    search_fields = ('=zipcode',)  # zipcodes are digits too, so no search_id_fields
 
 
 class OrderAssignmentAdmin(ReadOnlyAdmin):
     """Read-only admin for OrderAssignments."""
     list_display = ('order', 'employee', 'vehicle', 'assignment_time')
-    search_fields = ('order__order_id', 'employee__employee_name')
+    list_select_related = ('order', 'employee', 'vehicle')
+    search_fields = ('^employee__employee_name',)
+    search_id_fields = ('order_id', 'employee_id', 'vehicle_id')
 
 
 # --- Registration ---
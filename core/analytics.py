@@ -0,0 +1,352 @@
+"""
+Revenue and order analytics from rollup tables.
+
+Revenue, top items and order volume used to mean scanning Orders and
+Order_Items across their whole history (what fn_GetRestaurantRevenue does).
+Instead, hourly and daily counters are kept per restaurant, per menu item
+and per payment type (RestaurantRollup, MenuItemRollup, PaymentTypeRollup):
+
+  * place_order adds each order to its restaurant and item rows once it
+    commits, with one upsert per table (record_order);
+  * payment types have only a handful of rows per hour, which every
+    checkout would contend for, so they are filled by a tailing job
+    instead: 'manage.py tail_rollups' adds the orders past a stored
+    watermark every few seconds (tail_payment_types);
+  * 'manage.py rebuild_rollups' recomputes them from the order tables, for
+    backfill or after writes that bypassed place_order (seed_data, imports).
+
+Queries cover a range with whole days where they can and hours at the
+edges, so a year of revenue for a restaurant reads about 365 rows.
+Periods are UTC. Item revenue in a rebuild uses the current menu price,
+since Order_Items does not keep the price paid.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import (
+    MenuItemRollup, OrderItems, Orders, PaymentTypeRollup, RestaurantRollup, RollupWatermark,
+)
+
+logger = logging.getLogger(__name__)
+
+HOUR, DAY = 'hour', 'day'
+PAYMENT_TYPES = 'payment_types'  # the RollupWatermark tail_payment_types advances
+
+# model -> (row fields in order, the table's unique key, counters)
+ROLLUPS = {
+    RestaurantRollup: (
+        ('restaurant_id', 'grain', 'period_start', 'orders', 'items', 'revenue'),
+        ('restaurant_id', 'grain', 'period_start'),
+        ('orders', 'items', 'revenue'),
+    ),
+    MenuItemRollup: (
+        ('item_id', 'restaurant_id', 'grain', 'period_start', 'quantity', 'revenue'),
+        ('item_id', 'grain', 'period_start'),
+        ('quantity', 'revenue'),
+    ),
+    PaymentTypeRollup: (
+        ('payment_type', 'grain', 'period_start', 'orders', 'revenue'),
+        ('payment_type', 'grain', 'period_start'),
+        ('orders', 'revenue'),
+    ),
+}
+
+
+# --- Periods ---
+
+def _hour(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _day(moment):
+    return _hour(moment).replace(hour=0)
+
+
+def _ceil(moment, floor, step):
+    floored = floor(moment)
+    return floored if floored == moment else floored + step
+
+
+def _ranges(start, end):
+    """
+    Cover [start, end), widened to whole hours, with (grain, lo, hi)
+    ranges: days in the middle, hours at either edge. None is open-ended.
+    """
+    start = _hour(start) if start else None
+    end = _ceil(end, _hour, timedelta(hours=1)) if end else None
+    first_day = _ceil(start, _day, timedelta(days=1)) if start else None
+    last_day = _day(end) if end else None
+    if first_day and last_day and first_day >= last_day:
+        return [(HOUR, start, end)]
+    ranges = [(DAY, first_day, last_day)]
+    if start and start < first_day:
+        ranges.append((HOUR, start, first_day))
+    if end and last_day < end:
+        ranges.append((HOUR, last_day, end))
+    return ranges
+
+
+def _period_filter(start, end):
+    q = Q()
+    for grain, lo, hi in _ranges(start, end):
+        part = Q(grain=grain)
+        if lo:
+            part &= Q(period_start__gte=lo)
+        if hi:
+            part &= Q(period_start__lt=hi)
+        q |= part
+    return q
+
+
+# --- Writes ---
+
+def _add(model, rows):
+    """
+    Insert rollup rows, adding the counters onto any row that already exists
+    for the same key. One statement per 500 rows.
+    """
+    fields, unique, counters = ROLLUPS[model]
+    opts = model._meta
+    qn = connection.ops.quote_name
+    columns = [opts.get_field(name).column for name in fields]
+    key_columns = [opts.get_field(name).column for name in unique]
+    added = [opts.get_field(name).column for name in counters]
+
+    if connection.vendor == 'mysql':
+        conflict = 'ON DUPLICATE KEY UPDATE ' + ', '.join(
+            f'{qn(c)} = {qn(c)} + VALUES({qn(c)})' for c in added)
+    else:
+        conflict = f"ON CONFLICT ({', '.join(map(qn, key_columns))}) DO UPDATE SET " + ', '.join(
+            f'{qn(c)} = {qn(c)} + excluded.{qn(c)}' for c in added)
+    row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    adapt = connection.ops.adapt_datetimefield_value
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            params = []
+            for row in batch:
+                params.extend(adapt(value) if isinstance(value, datetime) else value
+                              for value in row)
+            cursor.execute(
+                f"INSERT INTO {qn(opts.db_table)} ({', '.join(map(qn, columns))}) "
+                f"VALUES {', '.join([row_sql] * len(batch))} {conflict}",
+                params,
+            )
+
+
+def _both_grains(hourly):
+    """{(key..., hour): (counters...)} -> rows for the hour and the day grains."""
+    daily = defaultdict(list)
+    rows = []
+    for (*key, hour), counters in hourly.items():
+        rows.append((*key, HOUR, hour, *counters))
+        day = daily[(*key, _day(hour))]
+        daily[(*key, _day(hour))] = ([a + b for a, b in zip(day, counters)] if day
+                                     else list(counters))
+    rows += [(*key, DAY, day, *counters) for (*key, day), counters in daily.items()]
+    return rows
+
+
+def record_order(restaurant_id, order_date, total, lines):
+    """
+    Add a committed order to the restaurant and item rollups. `lines` is
+    [(item_id, quantity, unit price)]. Two statements, however many lines.
+    """
+    hour = _hour(order_date)
+    items = sum(quantity for _, quantity, _ in lines)
+    with transaction.atomic():
+        _add(RestaurantRollup, _both_grains({(restaurant_id, hour): (1, items, total)}))
+        _add(MenuItemRollup, _both_grains({
+            (item_id, restaurant_id, hour): (quantity, price * quantity)
+            for item_id, quantity, price in lines
+        }))
+
+
+def record_order_quietly(*args):
+    """record_order() for on_commit hooks: the order stands even if this fails."""
+    try:
+        record_order(*args)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Could not add an order to the rollups; run rebuild_rollups.")
+
+
+def _tail_lag():
+    return timedelta(seconds=getattr(settings, 'ROLLUP_TAIL_LAG', 30))
+
+
+def tail_payment_types(batch_size=5000, lag=None):
+    """
+    Add up to batch_size orders past the watermark to the payment-type
+    rollups, and move the watermark past them. Returns the number added.
+
+    Ids are handed out at insert but become visible at commit, so an order
+    is only taken once it is `lag` (ROLLUP_TAIL_LAG) old, and the batch
+    stops at the first order that is not: an order still uncommitted after
+    that is missed until the next rebuild_rollups.
+    """
+    cutoff = timezone.now() - (_tail_lag() if lag is None else lag)
+    with transaction.atomic():
+        mark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=PAYMENT_TYPES)
+        orders = (Orders.objects.filter(order_id__gt=mark.last_order_id).order_by('order_id')
+                  .values_list('order_id', 'order_date', 'payment__payment_type',
+                               'total_price')[:batch_size])
+        hourly, last = {}, None
+        for order_id, order_date, payment_type, total in orders:
+            if order_date > cutoff:
+                break
+            counters = hourly.setdefault((payment_type, _hour(order_date)), [0, 0])
+            counters[0] += 1
+            counters[1] += total
+            last = order_id
+        if last is None:
+            return 0
+        _add(PaymentTypeRollup, _both_grains(hourly))
+        added = sum(count for count, _ in hourly.values())
+        mark.last_order_id = last
+        mark.save(update_fields=['last_order_id'])
+    return added
+
+
+def rebuild(since=None, chunk_size=100_000, progress=None):
+    """
+    Recompute the rollups from Orders and Order_Items: all of them, or the
+    periods from `since` (floored to the day) on. Orders are aggregated in
+    SQL, chunk_size order ids at a time, so memory stays flat on big tables.
+    Returns the number of orders rolled up.
+
+    Only orders up to the highest id seen at the start are rolled up, and
+    chunks are added onto whatever place_order records meanwhile, so orders
+    placed during a rebuild are counted once. The payment-type watermark is
+    moved to that id, for tail_rollups to carry on from. An order committing at the
+    very moment the old rows are cleared can still be lost: backfill in a
+    quiet period.
+    """
+    since = _day(since) if since else None
+    last = Orders.objects.aggregate(m=Max('order_id'))['m'] or 0
+    orders = Orders.objects.filter(order_id__lte=last)
+    if since:
+        orders = orders.filter(order_date__gte=since)
+    bounds = orders.aggregate(lo=Min('order_id'), hi=Max('order_id'))
+
+    with transaction.atomic():
+        for model in ROLLUPS:
+            stale = model.objects.all()
+            if since:
+                stale = stale.filter(period_start__gte=since)
+            stale.delete()
+        RollupWatermark.objects.update_or_create(
+            name=PAYMENT_TYPES, defaults={'last_order_id': last})
+
+    if bounds['lo'] is None:
+        return 0
+    done = 0
+    for lo in range(bounds['lo'], bounds['hi'] + 1, chunk_size):
+        chunk = orders.filter(order_id__gte=lo, order_id__lt=lo + chunk_size)
+        with transaction.atomic():
+            done += _rebuild_chunk(chunk)
+        if progress:
+            progress(done)
+    return done
+
+
+def _rebuild_chunk(orders):
+    hour = TruncHour('order_date', tzinfo=dt_timezone.utc)
+    item_hour = TruncHour('order__order_date', tzinfo=dt_timezone.utc)
+    lines = OrderItems.objects.filter(order__in=orders.values('order_id'))
+
+    restaurants = {
+        (row['restaurant_id'], row['period']): [row['orders'], 0, row['revenue']]
+        for row in orders.values('restaurant_id', period=hour).annotate(
+            orders=Count('order_id'), revenue=Sum('total_price'))
+    }
+    per_restaurant = lines.values('order__restaurant_id', period=item_hour)
+    for row in per_restaurant.annotate(items=Sum('quantity')):
+        restaurants[(row['order__restaurant_id'], row['period'])][1] = row['items']
+    _add(RestaurantRollup, _both_grains(restaurants))
+
+    _add(PaymentTypeRollup, _both_grains({
+        (row['payment__payment_type'], row['period']): (row['orders'], row['revenue'])
+        for row in orders.values('payment__payment_type', period=hour).annotate(
+            orders=Count('order_id'), revenue=Sum('total_price'))
+    }))
+
+    _add(MenuItemRollup, _both_grains({
+        (row['item_id'], row['item__restaurant_id'], row['period']):
+            (row['quantity'], row['revenue'])
+        for row in lines.values('item_id', 'item__restaurant_id', period=item_hour).annotate(
+            # revenue first: once annotated, 'quantity' means the sum
+            revenue=Sum(F('quantity') * F('item__price')), quantity=Sum('quantity'))
+    }))
+    return sum(counters[0] for counters in restaurants.values())
+
+
+# --- Queries ---
+
+def _money(value):
+    return (value or Decimal('0')).quantize(Decimal('0.01'))
+
+
+def revenue(restaurant_id=None, start=None, end=None):
+    """{'orders', 'items', 'revenue'} for one restaurant, or all of them."""
+    rows = RestaurantRollup.objects.filter(_period_filter(start, end))
+    if restaurant_id is not None:
+        rows = rows.filter(restaurant_id=restaurant_id)
+    totals = rows.aggregate(orders=Sum('orders'), items=Sum('items'), revenue=Sum('revenue'))
+    return {
+        'orders': totals['orders'] or 0,
+        'items': totals['items'] or 0,
+        'revenue': _money(totals['revenue']),
+    }
+
+
+def top_items(restaurant_id=None, start=None, end=None, limit=10):
+    """The best-selling menu items by quantity: [{'item_id', 'name', 'quantity', 'revenue'}]."""
+    rows = MenuItemRollup.objects.filter(_period_filter(start, end))
+    if restaurant_id is not None:
+        rows = rows.filter(restaurant_id=restaurant_id)
+    return [
+        {'item_id': row['item_id'], 'name': row['item__item_name'],
+         'quantity': row['quantity'], 'revenue': _money(row['revenue'])}
+        for row in rows.values('item_id', 'item__item_name').annotate(
+            quantity=Sum('quantity'), revenue=Sum('revenue'),
+        ).order_by('-quantity', 'item_id')[:limit]
+    ]
+
+
+def order_volume(grain=DAY, restaurant_id=None, start=None, end=None):
+    """Orders and revenue per hour or day: [{'period', 'orders', 'revenue'}], oldest first."""
+    rows = RestaurantRollup.objects.filter(grain=grain)
+    if restaurant_id is not None:
+        rows = rows.filter(restaurant_id=restaurant_id)
+    if start:
+        rows = rows.filter(period_start__gte=_hour(start) if grain == HOUR else _day(start))
+    if end:
+        rows = rows.filter(period_start__lt=end)
+    return [
+        {'period': row['period_start'], 'orders': row['orders'], 'revenue': _money(row['revenue'])}
+        for row in rows.values('period_start').annotate(
+            orders=Sum('orders'), revenue=Sum('revenue')).order_by('period_start')
+    ]
+
+
+def payment_mix(start=None, end=None):
+    """
+    Orders and revenue per payment type, largest revenue first. Filled by
+    tail_rollups, so the last ROLLUP_TAIL_LAG seconds or so are missing.
+    """
+    rows = PaymentTypeRollup.objects.filter(_period_filter(start, end))
+    return [
+        {'payment_type': row['payment_type'], 'orders': row['orders'],
+         'revenue': _money(row['revenue'])}
+        for row in rows.values('payment_type').annotate(
+            orders=Sum('orders'), revenue=Sum('revenue')).order_by('-revenue')
+    ]
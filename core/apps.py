@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Importing the module connects the receivers
+        from . import signals  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
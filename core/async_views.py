@@ -0,0 +1,188 @@
+"""
+Async versions of the read-heavy views, used in place of the ones in
+views.py when ASYNC_READ_VIEWS is on (serve with an ASGI server).
+
+Data is fetched with the async ORM and async cache API, and independent
+lookups run together under asyncio.gather. The final render still goes
+through sync_to_async: base.html reads the user's profile and the cart
+lazily, which is blocking database/session work.
+
+order_events, the server-sent events stream, is always served from here.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.utils.cache import patch_cache_control
+
+from . import catalog, events, snapshots
+from .dispatch import CLOSED_STATUSES
+from .models import Orders, Profile, Restaurants
+from .routers import replica_reads
+from .views import (
+    CUSTOMER_SESSION_KEY, _cursor_param, _history_page, _order_history, _status_payload,
+    _status_response,
+)
+
+
+async def _user(request):
+    # request.auser() and the lazy request.user cache separately; install the
+    # loaded user so the template does not fetch it a second time.
+    request.user = await request.auser()
+    return request.user
+
+
+async def _render(request, template, context):
+    await _user(request)
+    return await sync_to_async(render)(request, template, context)
+
+
+async def _customer_id(request):
+    user = await _user(request)
+    profile = await Profile.objects.aget(user_id=user.pk)
+    user.profile = profile  # base.html reads user.profile
+    return profile.customer_profile_id
+
+
+async def _session_customer_id(request):
+    customer_id = await request.session.aget(CUSTOMER_SESSION_KEY)
+    if customer_id is None:
+        customer_id = await _customer_id(request)
+        await request.session.aset(CUSTOMER_SESSION_KEY, customer_id)
+    return customer_id
+
+
+@login_required
+@replica_reads
+async def home(request):
+    cuisine = request.GET.get('cuisine') or None
+    page, cuisines = await asyncio.gather(
+        catalog.aget_restaurant_page(cuisine, request.GET.get('after')),
+        catalog.aget_cuisines(),
+    )
+    return await _render(request, 'home.html', {
+        'page': page,
+        'cuisine': cuisine,
+        'cuisines': cuisines,
+    })
+
+
+@login_required
+@replica_reads
+async def menu(request, rid):
+    try:
+        restaurant, menu_items = await catalog.aget_menu(rid)
+    except Restaurants.DoesNotExist:
+        messages.error(request, 'Restaurant not found.')
+        return redirect('home')
+    return await _render(request, 'menu.html', {'restaurant': restaurant, 'menu_items': menu_items})
+
+
+@login_required
+@replica_reads
+async def my_orders(request):
+    try:
+        customer_id = await _customer_id(request)
+        before = _cursor_param(request)
+        orders, next_cursor = _history_page(
+            [order async for order in _order_history(customer_id, before)])
+    except Exception as e:
+        messages.error(request, f"Could not load your orders: {e}")
+        return redirect('home')
+    return await _render(request, 'my_orders.html', {
+        'orders': orders,
+        'next_cursor': next_cursor,
+        'is_first_page': before is None,
+    })
+
+
+@login_required
+async def order_confirmation(request, order_id):
+    try:
+        snapshot, customer_id = await asyncio.gather(
+            snapshots.aget_order_snapshot(order_id), _session_customer_id(request))
+        if snapshot['order']['customer_id'] != customer_id:
+            raise Orders.DoesNotExist  # someone else's order
+    except (Orders.DoesNotExist, Profile.DoesNotExist):
+        messages.error(request, "Order not found.")
+        return redirect('home')
+    except Exception as e:
+        messages.error(request, f"Error loading order details: {e}")
+        return redirect('home')
+    return await _render(request, 'order_confirmation.html',
+                         {**snapshot, 'live_events': events.streams_supported(request)})
+
+
+@login_required
+async def order_status(request, order_id):
+    try:
+        status, customer_id = await asyncio.gather(
+            snapshots.aget_order_status(order_id), _session_customer_id(request))
+    except (Orders.DoesNotExist, Profile.DoesNotExist):
+        return JsonResponse({'error': 'Order not found.'}, status=404)
+    if status['customer_id'] != customer_id:
+        return JsonResponse({'error': 'Order not found.'}, status=404)
+    return _status_response(request, order_id, status)
+
+
+@login_required
+async def order_events(request, order_id):
+    """
+    Server-sent events: the order's status now, then again on every change,
+    until it is delivered or cancelled. ASGI only: under WSGI the stream
+    would be buffered whole while holding a worker thread, so it answers
+    204, which tells EventSource not to reconnect.
+    """
+    if not events.streams_supported(request):
+        return HttpResponse(status=204)
+    # Subscribe before reading the status, so no change can fall in between
+    subscription = events.get_hub().subscribe(order_id)
+    try:
+        status, customer_id = await asyncio.gather(
+            snapshots.aget_order_status(order_id), _session_customer_id(request))
+    except (Orders.DoesNotExist, Profile.DoesNotExist):
+        subscription.close()
+        return JsonResponse({'error': 'Order not found.'}, status=404)
+    if status['customer_id'] != customer_id:
+        subscription.close()
+        return JsonResponse({'error': 'Order not found.'}, status=404)
+
+    response = StreamingHttpResponse(
+        _status_stream(order_id, status, subscription, request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream',
+    )
+    patch_cache_control(response, private=True, no_cache=True)
+    response['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+    return response
+
+
+def _event(order_id, status):
+    data = json.dumps(_status_payload(order_id, status), separators=(',', ':'))
+    return f"id: {status['version']}\nevent: status\ndata: {data}\n\n"
+
+
+async def _status_stream(order_id, status, subscription, last_event_id):
+    keepalive = getattr(settings, 'ORDER_EVENTS_KEEPALIVE', 15)
+    # Close long-lived streams now and then; EventSource reconnects by itself
+    # and sends Last-Event-ID, so a reconnect costs no duplicate event.
+    deadline = time.monotonic() + getattr(settings, 'ORDER_EVENTS_MAX_AGE', 10 * 60)
+    try:
+        yield "retry: 5000\n\n"
+        if status['version'] != last_event_id:
+            yield _event(order_id, status)
+        sent = status['version']
+        while status['delivery_status'] not in CLOSED_STATUSES and time.monotonic() < deadline:
+            update = await subscription.get(keepalive)
+            if update is None:
+                yield ": keep-alive\n\n"
+            elif update['version'] != sent:
+                status, sent = update, update['version']
+                yield _event(order_id, status)
+    finally:
+        subscription.close()
@@ -0,0 +1,244 @@
+"""
+Server-side cart store.
+
+A cart holds one restaurant's items as item_id -> quantity, plus a running
+item count and total kept up to date by every change. Names, prices and
+images are not copied into the cart; they are resolved from the catalog
+when the cart is displayed.
+
+Carts are loaded lazily with get_cart(request) and written back once, by
+CartMiddleware, and only if something changed. Where they are stored is
+pluggable through settings.CART_BACKEND.
+"""
+import json
+from decimal import Decimal
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+SESSION_KEY = 'cart'
+COOKIE_NAME = 'cart'
+COOKIE_SALT = 'core.cart'
+
+
+class Cart:
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.restaurant_id = data.get('restaurant_id')
+        self.items = {int(item_id): qty for item_id, qty in data.get('items', {}).items()}
+        self.count = data.get('count', sum(self.items.values()))
+        self.total = Decimal(data.get('total', '0'))
+        self.dirty = False
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def to_dict(self):
+        return {
+            'restaurant_id': self.restaurant_id,
+            'items': {str(item_id): qty for item_id, qty in self.items.items()},
+            'count': self.count,
+            'total': str(self.total),
+        }
+
+    def add(self, item_id, restaurant_id, price, quantity=1):
+        """
+        Add `quantity` of an item. A cart only holds one restaurant, so an
+        item from another restaurant empties it first; returns True if so.
+        """
+        cleared = bool(self.items) and self.restaurant_id != restaurant_id
+        if cleared or not self.items:
+            self.clear()
+            self.restaurant_id = restaurant_id
+        self.items[item_id] = self.items.get(item_id, 0) + quantity
+        self.count += quantity
+        self.total += price * quantity
+        self.dirty = True
+        return cleared
+
+    def decrease(self, item_id, price):
+        """Take one unit off a line, dropping the line when it reaches zero."""
+        if item_id not in self.items:
+            return
+        if self.items[item_id] > 1:
+            self.items[item_id] -= 1
+            self.count -= 1
+            self.total -= price
+            self.dirty = True
+        else:
+            self.remove(item_id, price)
+
+    def remove(self, item_id, price):
+        quantity = self.items.pop(item_id, 0)
+        if not quantity:
+            return
+        self.count -= quantity
+        self.total -= price * quantity
+        if not self.items:
+            self.clear()
+        self.dirty = True
+
+    def reprice(self, total):
+        """
+        Replace the running total with one worked out from current prices.
+        Returns the old total if the two differ (prices drifted), else None.
+        """
+        if total == self.total:
+            return None
+        old, self.total = self.total, total
+        self.dirty = True
+        return old
+
+    def clear(self):
+        if self.items or self.restaurant_id is not None:
+            self.dirty = True
+        self.restaurant_id = None
+        self.items = {}
+        self.count = 0
+        self.total = Decimal('0')
+
+    @classmethod
+    def from_legacy(cls, data):
+        """Convert the old nested {restaurant_id: {item_id: {...}}} session cart."""
+        cart = cls()
+        for restaurant_id, lines in data.items():
+            if not str(restaurant_id).isdigit() or not isinstance(lines, dict):
+                continue
+            for item_id, line in lines.items():
+                cart.add(int(item_id), int(restaurant_id),
+                         Decimal(str(line.get('price', 0))), line.get('quantity', 1))
+        return cart
+
+
+# --- Backends ---
+
+class SessionCartBackend:
+    """Keeps the cart under its own session key (the default)."""
+
+    def load(self, request):
+        return request.session.get(SESSION_KEY)
+
+    def save(self, request, response, cart):  # pylint: disable=unused-argument
+        if cart:
+            request.session[SESSION_KEY] = cart.to_dict()
+        else:
+            request.session.pop(SESSION_KEY, None)
+
+
+class CacheCartBackend:
+    """
+    Keeps the cart in a cache, keyed by user, so a cart click rewrites one
+    small cache entry instead of the whole session row.
+    """
+
+    @cached_property
+    def cache(self):
+        return caches[getattr(settings, 'CART_CACHE_ALIAS', 'default')]
+
+    def key(self, request):
+        return f'cart:user:{request.user.pk}'
+
+    def load(self, request):
+        if not request.user.is_authenticated:
+            return None
+        return self.cache.get(self.key(request))
+
+    def save(self, request, response, cart):  # pylint: disable=unused-argument
+        if not request.user.is_authenticated:
+            return
+        if cart:
+            self.cache.set(self.key(request), cart.to_dict(),
+                           getattr(settings, 'CART_CACHE_TIMEOUT', 60 * 60 * 24 * 14))
+        else:
+            self.cache.delete(self.key(request))
+
+
+class SignedCookieCartBackend:
+    """Keeps the cart client-side in a signed cookie; no server write at all."""
+
+    def load(self, request):
+        value = request.get_signed_cookie(COOKIE_NAME, default=None, salt=COOKIE_SALT)
+        return json.loads(value) if value else None
+
+    def save(self, request, response, cart):
+        if cart:
+            response.set_signed_cookie(
+                COOKIE_NAME, json.dumps(cart.to_dict(), separators=(',', ':')),
+                salt=COOKIE_SALT, httponly=True, samesite='Lax',
+                max_age=getattr(settings, 'CART_CACHE_TIMEOUT', 60 * 60 * 24 * 14),
+            )
+        else:
+            response.delete_cookie(COOKIE_NAME, samesite='Lax')
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend  # pylint: disable=global-statement
+    if _backend is None:
+        _backend = import_string(
+            getattr(settings, 'CART_BACKEND', 'core.cart.SessionCartBackend'))()
+    return _backend
+
+
+# --- Request API ---
+
+def get_cart(request):
+    """The request's cart, loaded from the backend on first access."""
+    cart = getattr(request, '_cart', None)
+    if cart is None:
+        try:
+            data = get_backend().load(request)
+        except (signing.BadSignature, ValueError):
+            data = None
+        if data and 'items' not in data:
+            cart = Cart.from_legacy(data)
+        else:
+            cart = Cart(data)
+        request._cart = cart  # pylint: disable=protected-access
+    return cart
+
+
+def save_cart(request, response):
+    """Write the cart back if it was loaded and changed during this request."""
+    cart = getattr(request, '_cart', None)
+    if cart is not None and cart.dirty:
+        get_backend().save(request, response, cart)
+        cart.dirty = False
+
+
+class CartMiddleware:
+    """
+    Persists the request's cart once, after the view has run. Works in both
+    the sync and async handler, so async views are not pushed onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        save_cart(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        cart = getattr(request, '_cart', None)
+        if cart is not None and cart.dirty:
+            await sync_to_async(save_cart)(request, response)
+        return response
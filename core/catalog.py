@@ -0,0 +1,306 @@
+"""
+Restaurant and menu catalog cache.
+
+Every key carries a version number. Invalidating never deletes entries, it
+bumps the version so the old entries are simply never read again and age out
+of the backend. There are three version counters:
+
+  * the generation, bumped by bust_all(), is part of every key;
+  * the restaurant-list version covers the home page listing (every page
+    of cards and the cuisine list);
+  * each restaurant has its own version covering its row and menu.
+
+Misses are always filled from the primary database, even inside
+@replica_reads views: an entry filled from a lagging replica right after
+a version bump would pin the stale rows for the whole cache timeout.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.template.loader import render_to_string
+
+from .models import MenuItems, Restaurants
+
+GENERATION_KEY = 'catalog:generation'
+LIST_VERSION_KEY = 'catalog:restaurants:version'
+RESTAURANT_PAGE_SIZE = 24
+PRIMARY = DEFAULT_DB_ALIAS  # where cache misses are read from; see above
+MAX_ID = 2_147_483_647  # ids are signed INT columns
+
+
+def _cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def cache_is_shared():
+    """
+    Whether the catalog cache is seen by every process. Local memory (and
+    the dummy backend) is not: a bust or warm-up made from a management
+    command would only reach that command's own process.
+    """
+    return not isinstance(_cache(), (LocMemCache, DummyCache))
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600)
+
+
+def _restaurant_version_key(rid):
+    return f'catalog:restaurant:{rid}:version'
+
+
+def _fresh_version():
+    # Time-based so a version key that was evicted never restarts at a
+    # number whose entries are still sitting in the cache.
+    return int(time.time() * 1000)
+
+
+def _versions(*keys):
+    """Fetch (or initialise) several version counters in one round trip."""
+    cache = _cache()
+    found = cache.get_many(keys)
+    missing = {key: _fresh_version() for key in keys if key not in found}
+    for key, value in missing.items():
+        if not cache.add(key, value, None):
+            missing[key] = cache.get(key, value)
+    found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _bump(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), None)
+
+
+# --- Reads ---
+
+def encode_cursor(name, rid):
+    raw = json.dumps([name, rid], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    (name, restaurant_id) from a cursor, or None if it is missing or mangled.
+    The id must be a JSON integer within the column's range: floats such as
+    1e400 are refused rather than converted.
+    """
+    if not cursor:
+        return None
+    try:
+        name, rid = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(name, str) or not isinstance(rid, int) or isinstance(rid, bool):
+        return None
+    if not 0 < rid <= MAX_ID:
+        return None
+    return name, rid
+
+
+def _hue(rid):
+    # A stable avatar colour per restaurant, spread round the colour wheel
+    return rid * 137 % 360
+
+
+def _page_key(generation, version, cuisine, after, limit):
+    digest = hashlib.md5(repr((cuisine, after, limit)).encode()).hexdigest()
+    return f'catalog:g{generation}:restaurants:v{version}:page:{digest}'
+
+
+def _page_query(cuisine, after, limit):
+    qs = Restaurants.objects.using(PRIMARY).order_by('name', 'restaurant_id')
+    if cuisine:
+        qs = qs.filter(cuisine=cuisine)
+    if after:
+        name, rid = after
+        qs = qs.filter(Q(name__gt=name) | Q(name=name, restaurant_id__gt=rid))
+    return qs.values('restaurant_id', 'name', 'cuisine')[:limit + 1]
+
+
+def _page(rows, limit):
+    """Cursor, avatar fields and rendered cards for the rows of one page."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['name'], rows[-1]['restaurant_id'])
+    for row in rows:
+        row['hue'] = _hue(row['restaurant_id'])
+        row['initials'] = row['name'][:2].upper()
+    return {
+        'restaurants': rows,
+        'next_cursor': next_cursor,
+        'html': render_to_string('restaurant_cards.html', {'restaurants': rows}),
+    }
+
+
+def get_restaurant_page(cuisine=None, cursor=None, limit=RESTAURANT_PAGE_SIZE):
+    """
+    One page of the restaurant listing, keyset-paginated on (name, id):
+    {'restaurants': [dict, ...], 'next_cursor': str or None, 'html': rendered cards}.
+    The rows and their rendered cards are cached together, one entry per page.
+    """
+    after = decode_cursor(cursor)
+    key = _page_key(*_versions(GENERATION_KEY, LIST_VERSION_KEY), cuisine, after, limit)
+    cache = _cache()
+    page = cache.get(key)
+    if page is None:
+        page = _page(list(_page_query(cuisine, after, limit)), limit)
+        cache.set(key, page, _timeout())
+    return page
+
+
+def _cuisines_query():
+    return (Restaurants.objects.using(PRIMARY).exclude(cuisine__isnull=True).exclude(cuisine='')
+            .order_by('cuisine').values_list('cuisine', flat=True).distinct())
+
+
+def get_cuisines():
+    """Distinct cuisines, for the home page filter."""
+    generation, version = _versions(GENERATION_KEY, LIST_VERSION_KEY)
+    key = f'catalog:g{generation}:cuisines:v{version}'
+    cache = _cache()
+    cuisines = cache.get(key)
+    if cuisines is None:
+        cuisines = list(_cuisines_query())
+        cache.set(key, cuisines, _timeout())
+    return cuisines
+
+
+def get_menu(rid):
+    """
+    Return (restaurant, menu_items) for one restaurant.
+    Raises Restaurants.DoesNotExist like Restaurants.objects.get().
+    """
+    generation, version = _versions(GENERATION_KEY, _restaurant_version_key(rid))
+    key = f'catalog:g{generation}:restaurant:{rid}:v{version}'
+    cache = _cache()
+    entry = cache.get(key)
+    if entry is None:
+        restaurant = Restaurants.objects.using(PRIMARY).get(restaurant_id=rid)
+        entry = (restaurant, list(MenuItems.objects.using(PRIMARY).filter(restaurant_id=rid)))
+        cache.set(key, entry, _timeout())
+    return entry
+
+
+# --- Async reads (same keys and entries as the sync ones) ---
+
+async def _aversions(*keys):
+    cache = _cache()
+    found = await cache.aget_many(keys)
+    missing = {key: _fresh_version() for key in keys if key not in found}
+    for key, value in missing.items():
+        if not await cache.aadd(key, value, None):
+            missing[key] = await cache.aget(key, value)
+    found.update(missing)
+    return [found[key] for key in keys]
+
+
+async def aget_restaurant_page(cuisine=None, cursor=None, limit=RESTAURANT_PAGE_SIZE):
+    after = decode_cursor(cursor)
+    key = _page_key(*await _aversions(GENERATION_KEY, LIST_VERSION_KEY), cuisine, after, limit)
+    cache = _cache()
+    page = await cache.aget(key)
+    if page is None:
+        page = _page([row async for row in _page_query(cuisine, after, limit)], limit)
+        await cache.aset(key, page, _timeout())
+    return page
+
+
+async def aget_cuisines():
+    generation, version = await _aversions(GENERATION_KEY, LIST_VERSION_KEY)
+    key = f'catalog:g{generation}:cuisines:v{version}'
+    cache = _cache()
+    cuisines = await cache.aget(key)
+    if cuisines is None:
+        cuisines = [cuisine async for cuisine in _cuisines_query()]
+        await cache.aset(key, cuisines, _timeout())
+    return cuisines
+
+
+async def aget_menu(rid):
+    generation, version = await _aversions(GENERATION_KEY, _restaurant_version_key(rid))
+    key = f'catalog:g{generation}:restaurant:{rid}:v{version}'
+    cache = _cache()
+    entry = await cache.aget(key)
+    if entry is None:
+        # The restaurant row and its menu are independent reads
+        restaurant, menu_items = await asyncio.gather(
+            Restaurants.objects.using(PRIMARY).aget(restaurant_id=rid),
+            _alist(MenuItems.objects.using(PRIMARY).filter(restaurant_id=rid)),
+        )
+        entry = (restaurant, menu_items)
+        await cache.aset(key, entry, _timeout())
+    return entry
+
+
+async def _alist(qs):
+    return [obj async for obj in qs]
+
+
+def _price_timeout():
+    return getattr(settings, 'PRICE_CACHE_TIMEOUT', 60)
+
+
+def get_item_prices(rid, item_ids):
+    """
+    {item_id: price} for those of item_ids that are on restaurant rid's menu.
+
+    Each price is cached on its own, under the restaurant's version, so
+    menu edits invalidate it like the menu page. The timeout is short
+    (PRICE_CACHE_TIMEOUT), which bounds how stale a price written outside
+    the ORM can be. Misses cost one in_bulk() query, whatever their number.
+    """
+    item_ids = list(item_ids)
+    if rid is None or not item_ids:
+        return {}
+    generation, version = _versions(GENERATION_KEY, _restaurant_version_key(rid))
+    keys = {f'catalog:g{generation}:restaurant:{rid}:v{version}:price:{item_id}': item_id
+            for item_id in item_ids}
+    cache = _cache()
+    prices = {keys[key]: price for key, price in cache.get_many(keys).items()}
+    missing = [item_id for item_id in item_ids if item_id not in prices]
+    if missing:
+        found = {
+            item_id: item.price
+            for item_id, item in MenuItems.objects.using(PRIMARY).filter(restaurant_id=rid)
+            .only('price').in_bulk(missing).items()
+        }
+        prices.update(found)
+        cache.set_many({key: found[item_id] for key, item_id in keys.items() if item_id in found},
+                       _price_timeout())
+    return prices
+
+
+# --- Invalidation ---
+
+def bust_restaurant(rid):
+    """A restaurant row changed: its menu page and the listing are stale."""
+    _bump(_restaurant_version_key(rid))
+    _bump(LIST_VERSION_KEY)
+
+
+def bust_menu(rid):
+    """A menu item changed: only that restaurant's menu page is stale."""
+    _bump(_restaurant_version_key(rid))
+
+
+def bust_all():
+    _bump(GENERATION_KEY)
+
+
+def warm():
+    get_cuisines()
+    get_restaurant_page()
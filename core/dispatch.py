@@ -0,0 +1,396 @@
+"""
+Driver dispatch.
+
+Two modes, chosen by settings.DISPATCH_MODE:
+
+  'inline'  place_order picks a driver itself. An in-memory index of drivers
+            and their current load (open Order_Assignment rows) finds the
+            least-loaded one without ORDER BY RAND() over Employees.
+  'batch'   place_order leaves the order Pending and unassigned, and
+            'manage.py dispatch_orders' assigns the pending orders every
+            DISPATCH_WINDOW seconds: each window is planned as a whole
+            against a load + zipcode-distance cost, and all of its
+            Order_Assignment rows are written in one transaction.
+"""
+import heapq
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from . import snapshots
+from .models import Employees, OrderAssignment, Orders, Vehicles
+
+logger = logging.getLogger(__name__)
+
+# Orders in these states no longer count towards a driver's load.
+CLOSED_STATUSES = ('Delivered', 'Cancelled')
+
+# A scheduled refresh counts as pending for this many seconds. A rolled-back
+# transaction drops its on_commit hooks silently, so the mark has to expire.
+WARM_PENDING_TIMEOUT = 5
+
+
+class DriverIndex:
+    """
+    Min-heaps of (load, employee_id), one global and one per zipcode.
+
+    Entries are never removed in place: when a driver's load changes a new
+    entry is pushed and the old one is skipped lazily on the next pick, so
+    picking and recording an assignment are both O(log n).
+
+    Loads only go down on a reload. Orders are delivered or cancelled from
+    other processes (the admin, the drivers' app), so a closed order stops
+    counting at the next warm(), at most DISPATCH_INDEX_TTL later.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loads = {}       # employee_id -> open assignments
+        self._zipcodes = {}    # employee_id -> zipcode of the last pickup
+        self._global = []
+        self._by_zipcode = {}
+        self._loaded_at = None
+        self._warm_requested_at = None
+        self._fallback_cursor = 0
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'DISPATCH_INDEX_TTL', 60)
+
+    def is_warm(self):
+        return (self._loaded_at is not None
+                and time.monotonic() - self._loaded_at < self.ttl)
+
+    def warm(self):
+        """Load every driver with its open load in a single query."""
+        last_zipcode = OrderAssignment.objects.filter(
+            employee=OuterRef('pk')
+        ).order_by('-assignment_time').values('order__restaurant__address__zipcode')[:1]
+
+        rows = Employees.objects.filter(role='Driver').annotate(
+            load=Count(
+                'orderassignment',
+                filter=~Q(orderassignment__order__delivery_status__in=CLOSED_STATUSES)
+            ),
+            last_zipcode=Subquery(last_zipcode),
+        ).values_list('employee_id', 'load', 'last_zipcode')
+
+        loads, zipcodes, by_zipcode = {}, {}, {}
+        for employee_id, load, zipcode in rows:
+            loads[employee_id] = load
+            zipcodes[employee_id] = zipcode
+            if zipcode:
+                by_zipcode.setdefault(zipcode, []).append((load, employee_id))
+
+        global_heap = [(load, employee_id) for employee_id, load in loads.items()]
+        heapq.heapify(global_heap)
+        for heap in by_zipcode.values():
+            heapq.heapify(heap)
+
+        with self._lock:
+            self._loads = loads
+            self._zipcodes = zipcodes
+            self._global = global_heap
+            self._by_zipcode = by_zipcode
+            self._loaded_at = time.monotonic()
+            self._warm_requested_at = None
+
+    def warm_quietly(self):
+        """warm() for on_commit hooks: a failed refresh must not break a request."""
+        try:
+            self.warm()
+        except Exception:  # pylint: disable=broad-except
+            self._warm_requested_at = None
+            logger.exception("Could not warm the driver index.")
+
+    def request_warm(self):
+        """
+        Schedule a refresh after the current transaction commits, unless one
+        was scheduled less than WARM_PENDING_TIMEOUT seconds ago.
+        """
+        now = time.monotonic()
+        with self._lock:
+            requested_at = self._warm_requested_at
+            if requested_at is not None and now - requested_at < WARM_PENDING_TIMEOUT:
+                return
+            self._warm_requested_at = now
+        transaction.on_commit(self.warm_quietly)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def pick(self, zipcode=None):
+        """
+        Return the employee_id of the least-loaded driver, preferring one
+        whose last pickup was in `zipcode` if they are no more than
+        DISPATCH_ZIPCODE_SLACK assignments busier. Returns None when empty.
+        """
+        with self._lock:
+            return self._pick(zipcode)
+
+    def record(self, employee_id, zipcode=None):
+        """Count a new assignment against a driver."""
+        with self._lock:
+            self._record(employee_id, zipcode)
+
+    def pick_and_record(self, zipcode=None):
+        """
+        pick() and record() under one lock, so two concurrent checkouts
+        cannot both take the same driver at the same load.
+        """
+        with self._lock:
+            employee_id = self._pick(zipcode)
+            if employee_id is not None:
+                self._record(employee_id, zipcode)
+            return employee_id
+
+    def release(self, employee_id):
+        """
+        Undo record() when the assignment could not be written. Closed
+        orders are not released one by one; see the class docstring.
+        """
+        with self._lock:
+            if self._loads.get(employee_id, 0) <= 0:
+                return
+            self._loads[employee_id] -= 1
+            self._push(employee_id)
+
+    def fallback_driver(self):
+        """
+        Cheap pick used while the index is cold: walk drivers round-robin by
+        primary key, so each checkout is a single indexed seek.
+        """
+        drivers = Employees.objects.filter(role='Driver').order_by('employee_id')
+        employee_id = drivers.filter(
+            employee_id__gt=self._fallback_cursor
+        ).values_list('employee_id', flat=True).first()
+        if employee_id is None:
+            employee_id = drivers.values_list('employee_id', flat=True).first()
+        if employee_id is not None:
+            self._fallback_cursor = employee_id
+        return employee_id
+
+    # --- heap helpers (call with the lock held) ---
+
+    def _pick(self, zipcode):
+        slack = getattr(settings, 'DISPATCH_ZIPCODE_SLACK', 1)
+        best = self._peek(self._global)
+        if best is None:
+            return None
+        if zipcode:
+            local = self._peek(self._by_zipcode.get(zipcode), zipcode)
+            if local is not None and local[0] <= best[0] + slack:
+                best = local
+        return best[1]
+
+    def _record(self, employee_id, zipcode):
+        if employee_id not in self._loads:
+            return
+        self._loads[employee_id] += 1
+        if zipcode:
+            self._zipcodes[employee_id] = zipcode
+        self._push(employee_id)
+
+    def _push(self, employee_id):
+        entry = (self._loads[employee_id], employee_id)
+        heapq.heappush(self._global, entry)
+        zipcode = self._zipcodes.get(employee_id)
+        if zipcode:
+            heapq.heappush(self._by_zipcode.setdefault(zipcode, []), entry)
+
+    def _peek(self, heap, zipcode=None):
+        """Drop stale entries from the top of `heap` and return the top one."""
+        while heap:
+            load, employee_id = heap[0]
+            stale = self._loads.get(employee_id) != load
+            if zipcode is not None:
+                stale = stale or self._zipcodes.get(employee_id) != zipcode
+            if not stale:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+
+driver_index = DriverIndex()
+
+
+def pick_driver(zipcode=None):
+    """
+    Choose a driver for a new order and count the assignment against them.
+    Falls back to a round-robin indexed query while the index is cold and
+    schedules a refresh for after the order commits.
+    """
+    if not driver_index.is_warm():
+        driver_index.request_warm()
+        return driver_index.fallback_driver()
+
+    return driver_index.pick_and_record(zipcode)
+
+
+def batch_mode():
+    return getattr(settings, 'DISPATCH_MODE', 'inline') == 'batch'
+
+
+# --- Batch dispatch ---
+
+UNKNOWN_DISTANCE = 6  # a driver with no pickup yet is as far as a zipcode gets
+
+
+def zipcode_distance(a, b):
+    """0 for the same zipcode, one more for every trailing digit they differ in."""
+    if not a or not b:
+        return UNKNOWN_DISTANCE
+    common = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        common += 1
+    return max(len(a), len(b)) - common
+
+
+class BatchPlanner:
+    """
+    Greedy assignment of one window of orders, oldest first.
+
+    Each order goes to the driver with the lowest
+    load * DISPATCH_LOAD_WEIGHT + zipcode_distance(driver's last pickup, restaurant).
+    Drivers sit in one min-heap of (load, employee_id) per last-pickup
+    zipcode, so an order only compares the top driver of each zipcode
+    rather than every driver. Loads and zipcodes move as the window is
+    planned, with stale heap entries skipped lazily as in DriverIndex.
+    """
+
+    def __init__(self, drivers, vehicles):
+        # drivers: {employee_id: (load, last zipcode, last vehicle_id)}
+        # vehicles: {vehicle_id: load}
+        self.weight = getattr(settings, 'DISPATCH_LOAD_WEIGHT', 2)
+        self.loads = {}
+        self.zipcodes = {}
+        self.vehicles = {}
+        self.heaps = {}
+        for employee_id, (load, zipcode, vehicle_id) in drivers.items():
+            self.loads[employee_id] = load
+            self.zipcodes[employee_id] = zipcode
+            self.vehicles[employee_id] = vehicle_id
+            self.heaps.setdefault(zipcode, []).append((load, employee_id))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+        self.vehicle_loads = dict(vehicles)
+        self.free_vehicles = [(load, vehicle_id) for vehicle_id, load in vehicles.items()]
+        heapq.heapify(self.free_vehicles)
+
+    def plan(self, orders):
+        """[(order_id, zipcode)] -> [(order_id, employee_id, vehicle_id)]"""
+        plan = []
+        for order_id, zipcode in orders:
+            employee_id = self._best_driver(zipcode)
+            if employee_id is None:
+                break
+            vehicle_id = self._vehicle_for(employee_id)
+            if vehicle_id is None:
+                break
+            self.loads[employee_id] += 1
+            self.zipcodes[employee_id] = zipcode
+            heapq.heappush(self.heaps.setdefault(zipcode, []),
+                           (self.loads[employee_id], employee_id))
+            plan.append((order_id, employee_id, vehicle_id))
+        return plan
+
+    def _best_driver(self, zipcode):
+        best = None
+        for driver_zipcode, heap in self.heaps.items():
+            top = self._peek(heap, driver_zipcode)
+            if top is None:
+                continue
+            candidate = (top[0] * self.weight + zipcode_distance(driver_zipcode, zipcode), top[1])
+            if best is None or candidate < best:
+                best = candidate
+        return best[1] if best else None
+
+    def _peek(self, heap, zipcode):
+        while heap:
+            load, employee_id = heap[0]
+            if self.loads[employee_id] == load and self.zipcodes[employee_id] == zipcode:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _vehicle_for(self, employee_id):
+        """The driver's last vehicle, or else the least-used one."""
+        vehicle_id = self.vehicles[employee_id]
+        if vehicle_id is None:
+            while self.free_vehicles:
+                load, candidate = self.free_vehicles[0]
+                if self.vehicle_loads[candidate] == load:
+                    vehicle_id = candidate
+                    break
+                heapq.heappop(self.free_vehicles)
+            if vehicle_id is None:
+                return None
+            self.vehicles[employee_id] = vehicle_id
+        load = self.vehicle_loads.get(vehicle_id, 0) + 1
+        self.vehicle_loads[vehicle_id] = load
+        heapq.heappush(self.free_vehicles, (load, vehicle_id))
+        return vehicle_id
+
+
+def _open(prefix):
+    return ~Q(**{f'{prefix}__delivery_status__in': CLOSED_STATUSES})
+
+
+def _driver_state():
+    last = OrderAssignment.objects.filter(employee=OuterRef('pk')).order_by('-assignment_time')
+    rows = Employees.objects.filter(role='Driver').annotate(
+        load=Count('orderassignment', filter=_open('orderassignment__order')),
+        last_zipcode=Subquery(last.values('order__restaurant__address__zipcode')[:1]),
+        last_vehicle=Subquery(last.values('vehicle_id')[:1]),
+    ).values_list('employee_id', 'load', 'last_zipcode', 'last_vehicle')
+    return {employee_id: (load, zipcode, vehicle) for employee_id, load, zipcode, vehicle in rows}
+
+
+def _vehicle_loads():
+    return dict(Vehicles.objects.annotate(
+        load=Count('orderassignment', filter=_open('orderassignment__order')),
+    ).values_list('vehicle_id', 'load'))
+
+
+def _pending(limit):
+    pending = Orders.objects.filter(delivery_status='Pending', orderassignment__isnull=True)
+    features = connection.features
+    if features.has_select_for_update_skip_locked and features.has_select_for_update_of:
+        # A second scheduler skips this window's orders instead of waiting on them
+        pending = pending.select_for_update(skip_locked=True, of=('self',))
+    return pending.order_by('order_id').values_list(
+        'order_id', 'restaurant__address__zipcode')[:limit]
+
+
+def dispatch_pending(limit=None):
+    """
+    Assign up to `limit` (DISPATCH_BATCH_SIZE) pending, unassigned orders in
+    one transaction: four queries however large the window. Returns the
+    number assigned.
+    """
+    limit = limit or getattr(settings, 'DISPATCH_BATCH_SIZE', 500)
+    with transaction.atomic():
+        orders = list(_pending(limit))
+        if not orders:
+            return 0
+        plan = BatchPlanner(_driver_state(), _vehicle_loads()).plan(orders)
+        OrderAssignment.objects.bulk_create([
+            OrderAssignment(order_id=order_id, employee_id=employee_id, vehicle_id=vehicle_id)
+            for order_id, employee_id, vehicle_id in plan
+        ])
+        # bulk_create sends no signals: refresh the status caches and streams
+        for order_id, _, _ in plan:
+            snapshots.status_changed(order_id)
+    if plan:
+        driver_index.invalidate()
+    if len(plan) < len(orders):
+        logger.warning("No driver or vehicle for %d pending orders.", len(orders) - len(plan))
+    return len(plan)
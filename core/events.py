@@ -0,0 +1,155 @@
+"""
+Order status events for the server-sent events stream.
+
+Whenever an order's cached status is refreshed (see snapshots.status_changed)
+the new status is published to the hub, and every open
+/order/<id>/events/ stream for that order receives it. An event is the
+order's whole current status rather than a diff, so a subscriber that misses
+one loses nothing: the next one, or the status sent on (re)connect, brings
+it up to date.
+
+The hub is pluggable through settings.ORDER_EVENTS_HUB:
+
+  InProcessHub  delivers to streams served by the same process. Enough for a
+                single ASGI worker.
+  CacheHub      a stand-in broker for several workers: publish writes the
+                latest event to the shared cache and each stream polls it
+                every ORDER_EVENTS_POLL_INTERVAL seconds.
+
+A hub has a thread-safe publish(order_id, event) that may be called from
+sync code, and subscribe(order_id), called on the event loop, returning a
+subscription with `await get(timeout)` (the next event, or None if none
+arrived in time) and close(). Events carry the status version, so a stream
+can drop repeats.
+
+Streams only work under ASGI. A WSGI server drains the async stream into a
+list before sending anything, so streams_supported(request) gates both the
+endpoint and the page's EventSource; WSGI pages poll instead.
+"""
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.module_loading import import_string
+
+QUEUE_SIZE = 8
+
+
+class InProcessHub:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # order_id -> {_QueueSubscription}
+
+    def publish(self, order_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(order_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                pass  # its event loop has shut down
+
+    def subscribe(self, order_id):
+        subscription = _QueueSubscription(self, order_id)
+        with self._lock:
+            self._subscribers.setdefault(order_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.order_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.order_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+class _QueueSubscription:
+
+    def __init__(self, hub, order_id):
+        self.hub = hub
+        self.order_id = order_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def deliver(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()  # a slow reader only needs the newest status
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        # pylint: disable=protected-access
+        self.hub._unsubscribe(self)
+
+
+class CacheHub:
+
+    def _cache(self):
+        return caches[getattr(settings, 'ORDER_EVENTS_CACHE_ALIAS', 'default')]
+
+    def _key(self, order_id):
+        return f'order:events:{order_id}'
+
+    def publish(self, order_id, event):
+        self._cache().set(self._key(order_id), (time.time_ns(), event),
+                          getattr(settings, 'ORDER_EVENTS_CACHE_TIMEOUT', 60 * 60))
+
+    def subscribe(self, order_id):
+        return _CacheSubscription(self._cache(), self._key(order_id))
+
+
+class _CacheSubscription:
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.seen = None
+        self.interval = getattr(settings, 'ORDER_EVENTS_POLL_INTERVAL', 1.0)
+
+    async def get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            latest = await self.cache.aget(self.key)
+            if latest is not None and latest[0] != self.seen:
+                self.seen = latest[0]
+                return latest[1]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+_hub = None
+
+
+def get_hub():
+    global _hub  # pylint: disable=global-statement
+    if _hub is None:
+        _hub = import_string(getattr(settings, 'ORDER_EVENTS_HUB', 'core.events.InProcessHub'))()
+    return _hub
+
+
+def publish(order_id, event):
+    get_hub().publish(order_id, event)
+
+
+def streams_supported(request):
+    """True if the request is served over ASGI, where a stream holds no worker thread."""
+    return isinstance(request, ASGIRequest)
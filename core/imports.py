@@ -0,0 +1,266 @@
+"""
+Bulk catalog import: restaurants and their menu items from CSV or JSON lines.
+
+Each record is one menu item with its restaurant:
+
+    restaurant, address_line_1, state, country, zipcode, cuisine,
+    item_name, description, price
+
+A restaurant is identified by (name, zipcode) and an item by (restaurant,
+item name, ignoring case), so re-importing a feed updates rows in place
+rather than duplicating them. Within a batch the last record for an item
+wins.
+
+The file is read as a stream, batch_size records at a time. Each batch is
+validated, then upserted in one transaction: a few reads to match existing
+rows, then bulk_create / bulk_update for addresses, restaurants and items.
+After each committed batch a checkpoint (the number of records done) is
+written next to the file, so a failed import resumes where it stopped.
+
+bulk_create and bulk_update send no signals, so the catalog cache and the
+search index are invalidated once, at the end, instead of per row.
+"""
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from . import catalog, search
+from .models import Address, MenuItems, Restaurants
+
+FIELDS = ('restaurant', 'address_line_1', 'state', 'country', 'zipcode', 'cuisine',
+          'item_name', 'description', 'price')
+REQUIRED = ('restaurant', 'address_line_1', 'zipcode', 'item_name', 'price')
+MAX_PRICE = Decimal('9999.99')  # Menu_Items.Price is DECIMAL(6, 2)
+
+# record field -> the model field whose max_length bounds it
+LENGTHS = {
+    'restaurant': Restaurants._meta.get_field('name').max_length,
+    'address_line_1': Address._meta.get_field('address_line_1').max_length,
+    'state': Address._meta.get_field('state').max_length,
+    'country': Address._meta.get_field('country').max_length,
+    'zipcode': Address._meta.get_field('zipcode').max_length,
+    'cuisine': Restaurants._meta.get_field('cuisine').max_length,
+    'item_name': MenuItems._meta.get_field('item_name').max_length,
+    'description': MenuItems._meta.get_field('description').max_length,
+}
+
+
+class RowError(ValueError):
+    """A record that cannot be imported; the rest of its batch still is."""
+
+
+def read_records(path, fmt=None):
+    """
+    Yield the file's records one at a time: dicts, as parsed. A JSON line
+    that does not parse is yielded as a RowError, for clean() to reject.
+    """
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        yield RowError(f"not valid JSON: {e}")
+
+
+def clean(record):
+    """A validated record with stripped strings and a Decimal price, or RowError."""
+    if isinstance(record, RowError):
+        raise record
+    if not isinstance(record, dict):
+        raise RowError(f"expected an object, got {type(record).__name__}")
+    row = {}
+    for field in FIELDS:
+        value = record.get(field)
+        value = '' if value is None else str(value).strip()
+        if field in LENGTHS and len(value) > LENGTHS[field]:
+            raise RowError(f"{field} is longer than {LENGTHS[field]} characters")
+        row[field] = value
+    missing = [field for field in REQUIRED if not row[field]]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+    try:
+        price = Decimal(row['price'])
+        if not price.is_finite():
+            raise InvalidOperation
+        row['price'] = price.quantize(Decimal('0.01'))
+    except InvalidOperation as e:
+        raise RowError(f"price {row['price']!r} is not a number") from e
+    if not Decimal('0') < row['price'] <= MAX_PRICE:
+        raise RowError(f"price {row['price']} is not between 0 and {MAX_PRICE}")
+    return row
+
+
+def _created_ids(model, objs):
+    """
+    bulk_create objs and return their primary keys, in order. MySQL's
+    bulk_create does not return them, so read them back past the previous
+    maximum (as seed_data does); imports are not meant to run concurrently.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return [obj.pk for obj in model.objects.bulk_create(objs)]
+    pk = model._meta.pk.name
+    before = model.objects.aggregate(m=Max(pk))['m'] or 0
+    model.objects.bulk_create(objs)
+    return list(model.objects.filter(**{f'{pk}__gt': before})
+                .order_by(pk).values_list(pk, flat=True)[:len(objs)])
+
+
+def _restaurant_ids(rows):
+    """{(name, zipcode): restaurant id}, creating restaurants (and addresses) that are new."""
+    wanted = {}
+    for row in rows:
+        wanted[(row['restaurant'], row['zipcode'])] = row  # last record's details win
+
+    ids, changed = {}, []
+    for restaurant in Restaurants.objects.filter(
+        name__in={name for name, _ in wanted}, address__zipcode__in={zip_ for _, zip_ in wanted},
+    ).select_related('address').order_by('restaurant_id'):
+        key = (restaurant.name, restaurant.address.zipcode)
+        if key not in wanted or key in ids:
+            continue
+        ids[key] = restaurant.restaurant_id
+        cuisine = wanted[key]['cuisine'] or restaurant.cuisine
+        if cuisine != restaurant.cuisine:
+            restaurant.cuisine = cuisine
+            changed.append(restaurant)
+    if changed:
+        Restaurants.objects.bulk_update(changed, ['cuisine'], batch_size=1000)
+
+    new = [key for key in wanted if key not in ids]
+    if new:
+        address_ids = _created_ids(Address, [
+            Address(address_line_1=wanted[key]['address_line_1'], state=wanted[key]['state'],
+                    country=wanted[key]['country'] or 'India', zipcode=key[1])
+            for key in new
+        ])
+        ids.update(zip(new, _created_ids(Restaurants, [
+            Restaurants(name=key[0], address_id=address_id, cuisine=wanted[key]['cuisine'] or None)
+            for key, address_id in zip(new, address_ids)
+        ])))
+    return ids, len(new), len(changed)
+
+
+def import_batch(rows):
+    """
+    Upsert one batch of clean() records in a transaction. Returns counts:
+    {'restaurants_created', 'restaurants_updated', 'items_created',
+     'items_updated', 'items_unchanged'}.
+    """
+    with transaction.atomic():
+        restaurant_ids, restaurants_created, restaurants_updated = _restaurant_ids(rows)
+
+        wanted = {}
+        for row in rows:
+            rid = restaurant_ids[(row['restaurant'], row['zipcode'])]
+            wanted[(rid, row['item_name'].casefold())] = row
+
+        existing = {}
+        for item in MenuItems.objects.filter(
+            restaurant_id__in={rid for rid, _ in wanted},
+        ).only('item_id', 'restaurant_id', 'item_name', 'description', 'price').order_by('item_id'):
+            existing.setdefault((item.restaurant_id, item.item_name.casefold()), item)
+
+        created, changed = [], []
+        for (rid, key), row in wanted.items():
+            description = row['description'] or None
+            item = existing.get((rid, key))
+            if item is None:
+                created.append(MenuItems(restaurant_id=rid, item_name=row['item_name'],
+                                         description=description, price=row['price']))
+            elif (item.item_name, item.description, item.price) != (
+                    row['item_name'], description, row['price']):
+                item.item_name, item.description = row['item_name'], description
+                item.price = row['price']
+                changed.append(item)
+        MenuItems.objects.bulk_create(created)
+        MenuItems.objects.bulk_update(changed, ['item_name', 'description', 'price'],
+                                      batch_size=1000)
+
+    return {
+        'restaurants_created': restaurants_created,
+        'restaurants_updated': restaurants_updated,
+        'items_created': len(created),
+        'items_updated': len(changed),
+        'items_unchanged': len(wanted) - len(created) - len(changed),
+    }
+
+
+# --- Checkpoints ---
+
+def checkpoint_path(path):
+    return f'{path}.checkpoint'
+
+
+def read_checkpoint(path):
+    """Records already imported from `path`, per its checkpoint (0 if none)."""
+    try:
+        with open(checkpoint_path(path), encoding='utf-8') as f:
+            return json.load(f)['done']
+    except FileNotFoundError:
+        return 0
+
+
+def _write_checkpoint(path, done):
+    tmp = checkpoint_path(path) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'done': done}, f)
+    os.replace(tmp, checkpoint_path(path))
+
+
+def run(path, fmt=None, batch_size=5000, *, resume=True, on_error=None, progress=None):
+    """
+    Import a whole file. Skips the records a previous run checkpointed
+    (unless resume is False), calls on_error(record number, record dict or
+    {}, error) for rejected records and progress(totals) after each batch, and
+    removes the checkpoint once the file is done. Returns the totals.
+    """
+    skip = read_checkpoint(path) if resume else 0
+    totals = dict.fromkeys((
+        'records', 'rejected', 'restaurants_created', 'restaurants_updated',
+        'items_created', 'items_updated', 'items_unchanged',
+    ), 0)
+    totals['skipped'] = skip
+    done = skip
+    batch = []
+
+    def flush():
+        for name, count in import_batch(batch).items():
+            totals[name] += count
+        _write_checkpoint(path, done)
+        batch.clear()
+        if progress:
+            progress(totals)
+
+    for number, record in enumerate(read_records(path, fmt), 1):
+        if number <= skip:
+            continue
+        totals['records'] += 1
+        try:
+            batch.append(clean(record))
+        except RowError as e:
+            totals['rejected'] += 1
+            if on_error:
+                on_error(number, record if isinstance(record, dict) else {}, e)
+        done = number
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    written = ('restaurants_created', 'restaurants_updated', 'items_created', 'items_updated')
+    if skip or any(totals[name] for name in written):  # a resumed run may finish earlier writes
+        catalog.bust_all()
+        search.bump_generation()
+        search.index.invalidate()
+    if os.path.exists(checkpoint_path(path)):
+        os.remove(checkpoint_path(path))
+    return totals
@@ -0,0 +1,157 @@
+"""
+Indexes the hot query paths rely on.
+
+Every core model is managed = False, so Django never creates indexes for
+them; the hand-written MySQL schema has to. RECOMMENDED_INDEXES lists what
+the views and services filter and sort on, together with a representative
+queryset for EXPLAIN. 'manage.py index_advisor' compares the list against
+the live database and can print or apply idempotent DDL for what is missing.
+"""
+from collections import namedtuple
+
+from .models import (
+    Address, Customers, Employees, MenuItems, OrderAssignment, OrderItems, Orders,
+    PaymentMethods, Restaurants,
+)
+
+IndexSpec = namedtuple('IndexSpec', 'name table columns unique used_by sample')
+
+
+def _first(model, field):
+    return model.objects.values_list(field, flat=True).first() or 1
+
+
+RECOMMENDED_INDEXES = [
+    IndexSpec(
+        'idx_orders_customer_order', 'Orders', ('Customer_id', 'Order_id DESC'), False,
+        "my_orders keyset pages, customer summary",
+        lambda: Orders.objects.filter(
+            customer_id=_first(Orders, 'customer_id')).order_by('-order_id')[:21],
+    ),
+    IndexSpec(
+        'idx_orders_restaurant_date', 'Orders', ('Restaurant_id', 'Order_Date'), False,
+        "per-restaurant order history and revenue",
+        lambda: Orders.objects.filter(
+            restaurant_id=_first(Orders, 'restaurant_id')).order_by('-order_date')[:50],
+    ),
+    IndexSpec(
+        'idx_orders_status_order', 'Orders', ('Delivery_Status', 'Order_id'), False,
+        "pending orders for dispatch, admin status filter",
+        lambda: Orders.objects.filter(delivery_status='Pending').order_by('order_id')[:100],
+    ),
+    IndexSpec(
+        'idx_menu_items_restaurant', 'Menu_Items', ('Restaurant_id', 'Item_id'), False,
+        "menu page, checkout price lookup",
+        lambda: MenuItems.objects.filter(restaurant_id=_first(MenuItems, 'restaurant_id')),
+    ),
+    IndexSpec(
+        'idx_restaurants_name', 'Restaurants', ('Name', 'Restaurant_id'), False,
+        "home page listing order",
+        lambda: Restaurants.objects.order_by('name', 'restaurant_id')[:24],
+    ),
+    IndexSpec(
+        'idx_restaurants_cuisine_name', 'Restaurants', ('Cuisine', 'Name', 'Restaurant_id'), False,
+        "home page listing filtered by cuisine",
+        lambda: Restaurants.objects.filter(
+            cuisine=_first(Restaurants, 'cuisine')).order_by('name', 'restaurant_id')[:25],
+    ),
+    IndexSpec(
+        'idx_employees_role', 'Employees', ('Role', 'Employee_id'), False,
+        "dispatch fallback seek over drivers",
+        lambda: Employees.objects.filter(role='Driver').order_by('employee_id')[:1],
+    ),
+    IndexSpec(
+        'idx_order_items_order', 'Order_Items', ('Order_id', 'Item_id'), False,
+        "order confirmation items",
+        lambda: OrderItems.objects.filter(
+            order_id=_first(OrderItems, 'order_id')).values('item_id', 'quantity'),
+    ),
+    IndexSpec(
+        'uq_payment_methods_customer_type', 'Payment_Methods',
+        ('Customer_id', 'Payment_type'), True,
+        "checkout get_or_create, cart payment options",
+        lambda: PaymentMethods.objects.filter(
+            customer_id=_first(PaymentMethods, 'customer_id'), payment_type='UPI'),
+    ),
+    IndexSpec(
+        'idx_order_assignment_employee_time', 'Order_Assignment',
+        ('Employee_id', 'Assignment_Time'), False,
+        "driver load and last pickup for dispatch",
+        lambda: OrderAssignment.objects.filter(
+            employee_id=_first(OrderAssignment, 'employee_id')).order_by('-assignment_time')[:1],
+    ),
+    IndexSpec(
+        'idx_customers_last_name', 'Customers', ('Last_name', 'First_name'), False,
+        "admin customer and order search (name prefix)",
+        lambda: Customers.objects.filter(last_name__istartswith='Ra')[:100],
+    ),
+    IndexSpec(
+        'idx_customers_first_name', 'Customers', ('First_name',), False,
+        "admin customer search (name prefix)",
+        lambda: Customers.objects.filter(first_name__istartswith='As')[:100],
+    ),
+    IndexSpec(
+        'idx_employees_name', 'Employees', ('Employee_name',), False,
+        "admin employee and assignment search (name prefix)",
+        lambda: Employees.objects.filter(employee_name__istartswith='Ra')[:100],
+    ),
+    IndexSpec(
+        'idx_address_zipcode', 'Address', ('Zipcode',), False,
+        "admin address search",
+        lambda: Address.objects.filter(zipcode__iexact='560001')[:100],
+    ),
+    IndexSpec(
+        'idx_order_assignment_time', 'Order_Assignment', ('Assignment_Time',), False,
+        "recent assignments",
+        lambda: OrderAssignment.objects.order_by('-assignment_time')[:50],
+    ),
+]
+
+
+def _bare(column):
+    return column.split()[0].lower()
+
+
+def existing_indexes(connection, table):
+    """{index name: [lower-cased columns]} for a table, primary key included."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return {
+        name: [c.lower() for c in info['columns']]
+        for name, info in constraints.items()
+        if info['index'] or info['primary_key'] or info['unique']
+    }
+
+
+def covering_index(spec, indexes):
+    """Name of an existing index whose leading columns match the spec, if any."""
+    wanted = [_bare(c) for c in spec.columns]
+    for name, columns in indexes.items():
+        if columns[:len(wanted)] == wanted:
+            return name
+    return None
+
+
+def create_sql(spec, vendor):
+    """Idempotent DDL for one index."""
+    kind = 'UNIQUE INDEX' if spec.unique else 'INDEX'
+    quote = '`' if vendor == 'mysql' else '"'
+    columns = ', '.join(
+        f"{quote}{c.split()[0]}{quote}{' ' + c.split()[1] if ' ' in c else ''}"
+        for c in spec.columns
+    )
+    create = f"CREATE {kind} {quote}{spec.name}{quote} ON {quote}{spec.table}{quote} ({columns})"
+    if vendor != 'mysql':
+        return create.replace(f"CREATE {kind}", f"CREATE {kind} IF NOT EXISTS", 1) + ';'
+
+    # MySQL has no CREATE INDEX IF NOT EXISTS; check information_schema first.
+    check = (
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        f"WHERE table_schema = DATABASE() AND table_name = '{spec.table}' "
+        f"AND index_name = '{spec.name}'"
+    )
+    create_literal = create.replace("'", "''")
+    return (
+        f"SET @ddl = IF(({check}) = 0, '{create_literal}', 'DO 0');\n"
+        "PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;"
+    )
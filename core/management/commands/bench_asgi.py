@@ -0,0 +1,203 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter per mode, so URLs are resolved with the right
+# ASYNC_READ_VIEWS. Requests go through the real WSGI/ASGI handlers (not the
+# test client) with the full middleware stack.
+PROBE = r'''
+import asyncio, json, statistics, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+from core.models import MenuItems, Orders, Profile
+
+MODE, WORKERS, CONCURRENCY = %(mode)r, %(workers)d, %(concurrency)d
+REQUESTS, LATENCY = %(requests)d, %(latency)f
+
+
+queries = []
+
+
+def round_trip(execute, sql, params, many, context):
+    queries.append(1)
+    if LATENCY:
+        time.sleep(LATENCY)  # stand-in for the network hop to MySQL
+    return execute(sql, params, many, context)
+
+
+def instrument(sender, connection, **kwargs):
+    connection.execute_wrappers.append(round_trip)
+
+
+profile = (Profile.objects.filter(user__username__startswith='bench-user-',
+                                  customer_profile__orders__isnull=False)
+           .select_related('user').first())
+if profile is None:
+    sys.exit("No bench user with orders; run 'manage.py seed_data' first.")
+order_id = (Orders.objects.filter(customer_id=profile.customer_profile_id)
+            .values_list('order_id', flat=True).first())
+restaurant_id = MenuItems.objects.values_list('restaurant_id', flat=True).first()
+
+client = Client()
+client.force_login(profile.user)
+cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+paths = ['/', f'/menu/{restaurant_id}/', '/my-orders/',
+         f'/order/{order_id}/', f'/order/{order_id}/status/']
+schedule = [paths[i %% len(paths)] for i in range(REQUESTS)]
+
+# Only count what the benchmarked requests do, on connections opened from here on
+from django.db import connections
+connections.close_all()
+connection_created.connect(instrument)
+
+
+def run_wsgi():
+    from django.core.wsgi import get_wsgi_application
+    app = get_wsgi_application()
+
+    def call(path):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+            'HTTP_COOKIE': cookie,
+            'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+            'wsgi.run_once': False, 'SERVER_PROTOCOL': 'HTTP/1.1',
+        }
+        status = []
+        started = time.perf_counter()
+        with worker_threads:  # queueing for a free thread counts as latency
+            b''.join(app(environ, lambda s, h, exc_info=None: status.append(s)))
+        return time.perf_counter() - started, int(status[0].split()[0])
+
+    # A threaded WSGI worker: WORKERS threads serve CONCURRENCY clients
+    worker_threads = threading.BoundedSemaphore(WORKERS)
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as clients:
+        started = time.perf_counter()
+        results = list(clients.map(call, schedule))
+    return results, time.perf_counter() - started
+
+
+def run_asgi():
+    from django.core.asgi import get_asgi_application
+    app = get_asgi_application()
+
+    async def call(path):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'root_path': '', 'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+            'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        }
+        sent = asyncio.Event()
+        messages = []
+
+        async def receive():
+            if not sent.is_set():
+                sent.set()
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Future()  # no disconnect; cancelled when the response is done
+
+        async def send(message):
+            messages.append(message)
+
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        return time.perf_counter() - started, messages[0]['status']
+
+    async def main():
+        # One event loop (a single ASGI worker) with CONCURRENCY requests in flight
+        limit = asyncio.Semaphore(CONCURRENCY)
+
+        async def limited(path):
+            async with limit:
+                return await call(path)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(limited(p) for p in schedule))
+        return results, time.perf_counter() - started
+
+    return asyncio.run(main())
+
+
+if MODE == 'wsgi':
+    results, wall = run_wsgi()
+else:
+    results, wall = run_asgi()
+
+latencies = sorted(seconds * 1000 for seconds, _ in results)
+print(json.dumps({
+    'mode': MODE,
+    'requests': len(results),
+    'errors': sum(1 for _, status in results if status >= 400),
+    'wall_seconds': round(wall, 3),
+    'rps': round(len(results) / wall, 1),
+    'p50_ms': round(statistics.median(latencies), 2),
+    'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    'queries_per_request': round(len(queries) / len(results), 2),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read-path throughput of the sync views under WSGI with the async views "
+        "under ASGI, at the same worker count. Run seed_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8,
+                            help="Threads in the WSGI worker (the ASGI worker is one event loop).")
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help="Requests in flight at once.")
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--db-latency-ms', type=float, default=0.0,
+                            help="Sleep added to every query, to mimic a networked database.")
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        reports = [self.probe(mode, options) for mode in ('wsgi', 'asgi')]
+
+        if options['json']:
+            self.stdout.write(json.dumps(reports, indent=2))
+            return
+
+        self.stdout.write(
+            f"{options['requests']} requests, {options['concurrency']} in flight, "
+            f"{options['workers']} WSGI threads, +{options['db_latency_ms']}ms per query"
+        )
+        self.stdout.write(f"{'mode':<6}{'rps':>9}{'p50':>9}{'p95':>9}{'queries':>9}{'errors':>8}")
+        for r in reports:
+            self.stdout.write(f"{r['mode']:<6}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                              f"{r['queries_per_request']:>9}{r['errors']:>8}")
+        wsgi, asgi = reports
+        self.stdout.write(f"asgi/wsgi throughput: {asgi['rps'] / wsgi['rps']:.2f}x")
+
+    def probe(self, mode, options):
+        probe = PROBE % {
+            'mode': mode,
+            'workers': options['workers'],
+            'concurrency': options['concurrency'],
+            'requests': options['requests'],
+            'latency': options['db_latency_ms'] / 1000,
+        }
+        env = dict(os.environ, ASYNC_READ_VIEWS='1' if mode == 'asgi' else '0')
+        result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True,
+                                env=env, check=False)
+        if result.returncode != 0:
+            raise CommandError(f"{mode} probe failed:\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,181 @@
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from core.models import MenuItems, Restaurants
+
+STEPS = ('home', 'menu', 'add_to_cart', 'view_cart', 'place_order', 'order_confirmation')
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """Per-step latency and query samples, shared by the worker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {step: [] for step in STEPS}
+        self.errors = {step: 0 for step in STEPS}
+
+    def add(self, step, seconds, queries, ok):
+        with self.lock:
+            self.samples[step].append((seconds, queries))
+            if not ok:
+                self.errors[step] += 1
+
+    def summary(self, wall):
+        report = {}
+        for step, samples in self.samples.items():
+            if not samples:
+                continue
+            latencies = [s * 1000 for s, _ in samples]
+            report[step] = {
+                'requests': len(samples),
+                'errors': self.errors[step],
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(statistics.fmean(latencies), 2),
+                'queries_per_request': round(statistics.fmean(q for _, q in samples), 2),
+                'throughput_rps': round(len(samples) / wall, 2),
+            }
+        return report
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the ordering flow (home -> menu -> add_to_cart -> view_cart -> "
+        "place_order -> order_confirmation) from a thread pool and report latency "
+        "percentiles, queries per request and throughput. Run seed_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--iterations', type=int, default=25,
+                            help="Full ordering flows per thread.")
+        parser.add_argument('--warmup', type=int, default=1,
+                            help="Untimed flows per thread before measuring.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', dest='json_path',
+                            help="Write the report to this file.")
+        parser.add_argument('--compare', help="A previous --json report to diff against.")
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__startswith='bench-user-')
+                     .values_list('id', flat=True)[:options['threads']])
+        if len(users) < options['threads']:
+            raise CommandError("Not enough bench users; run 'manage.py seed_data --users N' first.")
+
+        restaurants = list(Restaurants.objects.values_list('restaurant_id', flat=True)[:500])
+        menu = {}
+        for item_id, restaurant_id in MenuItems.objects.filter(
+            restaurant_id__in=restaurants
+        ).values_list('item_id', 'restaurant_id'):
+            menu.setdefault(restaurant_id, []).append(item_id)
+        if not menu:
+            raise CommandError("No menu items found; run 'manage.py seed_data' first.")
+
+        recorder = Recorder()
+
+        def worker(index):
+            rng = random.Random(options['seed'] + index)
+            client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+            client.force_login(User.objects.get(pk=users[index]))
+            try:
+                for _ in range(options['warmup']):
+                    self.flow(client, rng, menu, None)
+                for _ in range(options['iterations']):
+                    self.flow(client, rng, menu, recorder)
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(worker, range(options['threads'])))
+        wall = time.perf_counter() - started
+
+        report = {
+            'meta': {
+                'threads': options['threads'],
+                'iterations': options['iterations'],
+                'database': connection.vendor,
+                'wall_seconds': round(wall, 2),
+                'flows_per_second': round(options['threads'] * options['iterations'] / wall, 2),
+            },
+            'steps': recorder.summary(wall),
+        }
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2)
+        self.print_report(report, options['compare'])
+
+    def flow(self, client, rng, menu, recorder):
+        restaurant_id = rng.choice(list(menu))
+        item_id = rng.choice(menu[restaurant_id])
+
+        steps = [
+            ('home', 'get', reverse('home'), None),
+            ('menu', 'get', reverse('menu', args=[restaurant_id]), None),
+            ('add_to_cart', 'post', reverse('add_to_cart', args=[item_id]), None),
+            ('view_cart', 'get', reverse('view_cart'), None),
+            ('place_order', 'post', reverse('place_order'), {'payment_type': 'UPI'}),
+        ]
+        order_url = None
+        for step, method, url, data in steps:
+            response = self.timed(client, recorder, step, method, url, data=data)
+            if step == 'place_order' and response.status_code == 302:
+                location = response['Location']
+                if location.startswith('/order/'):
+                    order_url = location
+        if order_url:
+            self.timed(client, recorder, 'order_confirmation', 'get', order_url)
+
+    def timed(self, client, recorder, step, method, url, *, data=None):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data or {})
+            elapsed = time.perf_counter() - started
+        if recorder is not None:
+            recorder.add(step, elapsed, queries[0], response.status_code < 400)
+        return response
+
+    def print_report(self, report, compare_path):
+        previous = {}
+        if compare_path:
+            with open(compare_path, encoding='utf-8') as fh:
+                previous = json.load(fh).get('steps', {})
+
+        meta = report['meta']
+        self.stdout.write(
+            f"{meta['threads']} threads x {meta['iterations']} flows on {meta['database']}: "
+            f"{meta['flows_per_second']} flows/s"
+        )
+        self.stdout.write(f"{'step':<20}{'p50':>9}{'p95':>9}{'p99':>9}"
+                          f"{'queries':>9}{'rps':>9}{'errors':>8}")
+        for step, row in report['steps'].items():
+            line = (f"{step:<20}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+                    f"{row['queries_per_request']:>9}{row['throughput_rps']:>9}{row['errors']:>8}")
+            if step in previous:
+                delta = row['p95_ms'] - previous[step]['p95_ms']
+                line += f"   p95 {delta:+.2f}ms"
+            self.stdout.write(line)
@@ -0,0 +1,89 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter so every sample is a cold import.
+PROBE = r'''
+import json, time
+start = time.perf_counter()
+
+import django
+django.setup()
+setup_done = time.perf_counter()
+
+from django.db import connection
+queries = []
+
+def record(execute, sql, params, many, context):
+    queries.append(sql)
+    return execute(sql, params, many, context)
+
+with connection.execute_wrapper(record):
+    import core.views  # noqa: F401
+    from django.urls import reverse
+    from django.test import Client
+    imported = time.perf_counter()
+    import_queries = len(queries)
+
+    response = Client(HTTP_HOST='localhost').get(reverse(%(url)r))
+    first_response = time.perf_counter()
+
+print(json.dumps({
+    'setup_ms': (setup_done - start) * 1000,
+    'import_ms': (imported - setup_done) * 1000,
+    'first_request_ms': (first_response - imported) * 1000,
+    'total_ms': (first_response - start) * 1000,
+    'import_queries': import_queries,
+    'request_queries': len(queries) - import_queries,
+    'status': response.status_code,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = "Measure cold import time and time to first request in fresh processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--url', default='login',
+                            help="URL name requested after boot (default: login).")
+        parser.add_argument('--json', action='store_true',
+                            help="Print the raw samples and summary as JSON.")
+
+    def handle(self, *args, **options):
+        probe = PROBE % {'url': options['url']}
+        samples = []
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, '-c', probe],
+                capture_output=True, text=True, env=os.environ.copy(), check=False,
+            )
+            if result.returncode != 0:
+                raise CommandError(f"Startup probe failed:\n{result.stderr}")
+            samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        summary = {
+            key: statistics.median(sample[key] for sample in samples)
+            for key in ('setup_ms', 'import_ms', 'first_request_ms', 'total_ms')
+        }
+        summary['import_queries'] = max(s['import_queries'] for s in samples)
+        summary['request_queries'] = max(s['request_queries'] for s in samples)
+
+        if options['json']:
+            self.stdout.write(json.dumps({'summary': summary, 'samples': samples}, indent=2))
+            return
+
+        for key, value in summary.items():
+            if key.endswith('_ms'):
+                self.stdout.write(f"{key:<18} {value:8.1f}")
+            else:
+                self.stdout.write(f"{key:<18} {value:8d}")
+        if summary['import_queries']:
+            self.stdout.write(self.style.WARNING(
+                "Importing the views ran database queries; keep module scope query-free."
+            ))
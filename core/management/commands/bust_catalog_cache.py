@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import catalog
+
+
+class Command(BaseCommand):
+    help = "Invalidate the restaurant/menu catalog cache (all of it, or selected restaurants)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_ids', nargs='*', type=int,
+                            help="Only bust these restaurants (default: everything).")
+
+    def handle(self, *args, **options):
+        if not catalog.cache_is_shared():
+            alias = getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')
+            raise CommandError(
+                f"CACHES[{alias!r}] is local to each process, so busting it here would not reach "
+                "the web workers. Point it at a shared backend (e.g. FileBasedCache or Memcached), "
+                "or restart the workers."
+            )
+        rids = options['restaurant_ids']
+        if not rids:
+            catalog.bust_all()
+            self.stdout.write(self.style.SUCCESS("Catalog cache invalidated."))
+            return
+        for rid in rids:
+            catalog.bust_restaurant(rid)
+        self.stdout.write(self.style.SUCCESS(
+            f"Invalidated catalog cache for {len(rids)} restaurant(s)."
+        ))
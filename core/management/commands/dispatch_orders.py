@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import dispatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Assign pending orders to drivers and vehicles in batches, one window at a "
+        "time. Run one (or, on MySQL 8, several) alongside the web workers when "
+        "DISPATCH_MODE = 'batch'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=float,
+                            default=getattr(settings, 'DISPATCH_WINDOW', 2.0),
+                            help="Seconds between batches.")
+        parser.add_argument('--batch-size', type=int,
+                            default=getattr(settings, 'DISPATCH_BATCH_SIZE', 500))
+        parser.add_argument('--once', action='store_true',
+                            help="Run a single batch and exit.")
+
+    def handle(self, *args, **options):
+        window = options['window']
+        try:
+            while True:
+                started = time.monotonic()
+                assigned = dispatch.dispatch_pending(options['batch_size'])
+                elapsed = time.monotonic() - started
+                if assigned or options['once']:
+                    self.stdout.write(f"Assigned {assigned} orders in {elapsed * 1000:.1f} ms.")
+                if options['once']:
+                    return
+                if assigned < options['batch_size']:
+                    # Caught up: wait for the rest of the window. A full batch
+                    # means a backlog, so the next one starts at once.
+                    time.sleep(max(0.0, window - elapsed))
+                close_old_connections()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
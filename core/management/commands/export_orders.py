@@ -0,0 +1,60 @@
+import contextlib
+import sys
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+
+
+def _day(value, option):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+    except ValueError as e:
+        raise CommandError(f"{option}: {e}") from e
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream orders, one row per order line with customer, restaurant, "
+        "payment and driver, as CSV or JSON lines. Memory stays constant "
+        "however many orders match."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="YYYY-MM-DD (UTC); orders from this day on.")
+        parser.add_argument('--until', help="YYYY-MM-DD (UTC); orders before this day.")
+        parser.add_argument('--restaurant', type=int, help="Only this restaurant id.")
+        parser.add_argument('--status', help="Only orders with this delivery status.")
+        parser.add_argument('--format', choices=tuple(exports.FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help="File to write (default: stdout).")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Orders read per query.")
+
+    def handle(self, *args, **options):
+        orders = exports.filter_orders(
+            since=_day(options['since'], '--since') if options['since'] else None,
+            until=_day(options['until'], '--until') if options['until'] else None,
+            restaurant_id=options['restaurant'],
+            status=options['status'],
+        )
+        started = time.perf_counter()
+        count = 0
+        lines = exports.encode(exports.rows(orders, options['chunk_size']), options['format'])
+        with contextlib.ExitStack() as stack:
+            if options['output']:
+                out = stack.enter_context(open(options['output'], 'wb'))
+            else:
+                out = sys.stdout.buffer
+                stack.callback(out.flush)
+            for line in lines:
+                out.write(line)
+                count += 1
+
+        if options['output']:
+            elapsed = time.perf_counter() - started
+            rows = count - (options['format'] == 'csv')  # less the header
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {rows:,} rows to {options['output']} in {elapsed:.1f}s "
+                f"({rows / elapsed if elapsed else 0:,.0f} rows/s)."
+            ))
@@ -0,0 +1,78 @@
+import contextlib
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Import restaurants and menu items from a CSV or JSON-lines feed, one "
+        "menu item per record. Existing restaurants (name + zipcode) and items "
+        "(restaurant + name) are updated in place. Resumes from its checkpoint "
+        "after a failure."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV with a header row, or .jsonl.")
+        parser.add_argument('--format', choices=('csv', 'jsonl'),
+                            help="Default: from the file extension.")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Records validated and written per transaction.")
+        parser.add_argument('--restart', action='store_true',
+                            help="Ignore the checkpoint and import the whole file.")
+        parser.add_argument('--errors', help="Write rejected records to this CSV file.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        skip = 0 if options['restart'] else imports.read_checkpoint(path)
+        if skip:
+            self.stdout.write(f"Resuming after record {skip:,} (--restart to start over).")
+
+        with contextlib.ExitStack() as stack:
+            errors = None
+            if options['errors']:
+                errors = csv.writer(stack.enter_context(
+                    open(options['errors'], 'w', newline='', encoding='utf-8')))
+                errors.writerow(('record', 'error') + imports.FIELDS)
+            totals, elapsed = self.run_import(path, options, errors)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['records']:,} records in {elapsed:.1f}s "
+            f"({totals['records'] / elapsed if elapsed else 0:,.0f} records/s): "
+            f"{totals['restaurants_created']:,} restaurants created, "
+            f"{totals['restaurants_updated']:,} updated; "
+            f"{totals['items_created']:,} items created, "
+            f"{totals['items_updated']:,} updated, {totals['items_unchanged']:,} unchanged; "
+            f"{totals['rejected']:,} rejected."
+        ))
+
+    def run_import(self, path, options, errors):
+        """imports.run() with progress and error reporting; (totals, seconds)."""
+        shown = 0
+
+        def on_error(number, record, error):
+            nonlocal shown
+            if errors:
+                errors.writerow((number, error) + tuple(record.get(f, '') for f in imports.FIELDS))
+            elif shown < 10:
+                self.stdout.write(self.style.WARNING(f"  record {number}: {error}"))
+                shown += 1
+
+        started = time.perf_counter()
+
+        def progress(totals):
+            rate = totals['records'] / (time.perf_counter() - started)
+            self.stdout.write(f"  {totals['records']:,} records, {rate:,.0f}/s", ending='\r')
+
+        try:
+            totals = imports.run(
+                path, options['format'], options['batch_size'],
+                resume=not options['restart'], on_error=on_error, progress=progress,
+            )
+        except (FileNotFoundError, UnicodeDecodeError, ValueError) as e:
+            raise CommandError(
+                f"Import stopped; rerun to resume from the checkpoint. {e}") from e
+        return totals, time.perf_counter() - started
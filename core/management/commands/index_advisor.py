@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.indexes import RECOMMENDED_INDEXES, covering_index, create_sql, existing_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the live schema with the indexes the hot query paths need. "
+        "Reports missing indexes (with EXPLAIN output) and prints or applies idempotent DDL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--explain', action='store_true',
+                            help="Show the EXPLAIN plan of each missing index's query.")
+        parser.add_argument('--sql', action='store_true',
+                            help="Print DDL for every recommended index (safe to re-run).")
+        parser.add_argument('--apply', action='store_true',
+                            help="Create the missing indexes now.")
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        vendor = connection.vendor
+
+        if options['sql']:
+            self.stdout.write(f"-- Hot-path indexes for {vendor}; every statement is idempotent.")
+            for spec in RECOMMENDED_INDEXES:
+                self.stdout.write(f"\n-- {spec.used_by}\n{create_sql(spec, vendor)}")
+            return
+
+        tables = set(connection.introspection.table_names())
+        missing = []
+        for spec in RECOMMENDED_INDEXES:
+            if spec.table not in tables:
+                self.stdout.write(self.style.WARNING(f"{spec.table}: table not found, skipped"))
+                continue
+            found = covering_index(spec, existing_indexes(connection, spec.table))
+            columns = ', '.join(spec.columns)
+            if found:
+                self.stdout.write(f"ok       {spec.table} ({columns}) covered by {found}")
+                continue
+            missing.append(spec)
+            self.stdout.write(self.style.WARNING(
+                f"MISSING  {spec.table} ({columns}) -- {spec.used_by}"
+            ))
+            if options['explain']:
+                plan = spec.sample().using(options['database']).explain()
+                for line in plan.splitlines():
+                    self.stdout.write(f"           {line}")
+
+        if options['apply'] and missing:
+            with connection.cursor() as cursor:
+                for spec in missing:
+                    for statement in self.statements(create_sql(spec, vendor)):
+                        cursor.execute(statement)
+                    self.stdout.write(self.style.SUCCESS(f"created  {spec.name}"))
+        elif missing:
+            self.stdout.write(
+                f"\n{len(missing)} missing; rerun with --apply, or --sql for the DDL.")
+        else:
+            self.stdout.write(self.style.SUCCESS("All recommended indexes are present."))
+
+    def statements(self, sql):
+        return [part.strip() for part in sql.split(';') if part.strip()]
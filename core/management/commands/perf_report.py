@@ -0,0 +1,43 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import perf
+
+
+class Command(BaseCommand):
+    help = "Summarise sampled request timings from PERF_SPOOL_PATH, slowest views first."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=getattr(settings, 'PERF_SPOOL_PATH', None),
+                            help="Spool file to read (default: PERF_SPOOL_PATH).")
+        parser.add_argument('--minutes', type=float,
+                            help="Only include samples from the last N minutes.")
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['path']:
+            raise CommandError("Set PERF_SPOOL_PATH (and PERF_SAMPLE_RATE > 0) or pass --path.")
+        since = time.time() - options['minutes'] * 60 if options['minutes'] else None
+        try:
+            report = perf.summarize(perf.read_spool(options['path'], since))
+        except FileNotFoundError as e:
+            raise CommandError(f"No samples yet: {e}") from e
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{'view':<28}{'reqs':>6}{'p50':>9}{'p95':>9}{'queries':>9}"
+                          f"{'sql ms':>9}{'tmpl ms':>9}")
+        for row in report:
+            self.stdout.write(
+                f"{row['view'][:27]:<28}{row['requests']:>6}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+                f"{row['queries']:>9}{row['sql_ms']:>9}{row['template_ms']:>9}"
+            )
+            for dup in row['duplicates']:
+                self.stdout.write(self.style.WARNING(
+                    f"    x{dup['per_request']} per request: {dup['sql'][:110]}"
+                ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the restaurant/menu search index and tell running workers to "
+        "rebuild theirs. Optionally time some queries against the fresh index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', default=[],
+                            help="A query to run and time after the build (repeatable).")
+        parser.add_argument('--repeat', type=int, default=100,
+                            help="Runs per --query when timing.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        search.index.build()
+        elapsed = time.perf_counter() - started
+        stats = search.index.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {stats['documents']:,} documents, {stats['terms']:,} terms in {elapsed:.2f}s."
+        ))
+
+        search.bump_generation()
+        self.stdout.write("Workers will rebuild their index on their next search.")
+
+        for query in options['query']:
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                results = search.index.search(query)
+            per_query = (time.perf_counter() - started) / options['repeat'] * 1000
+            self.stdout.write(f"\n{query!r}: {len(results)} results, {per_query:.2f} ms/query")
+            for result in results:
+                self.stdout.write(f"  {result['type']:<10} {result['name']}  ({result['detail']})")
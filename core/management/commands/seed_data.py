@@ -0,0 +1,254 @@
+import random
+import time
+from decimal import Decimal
+
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+
+from core.models import (
+    Address, Customers, Employees, MenuItems, OrderAssignment, OrderItems,
+    Orders, PaymentMethods, Profile, Restaurants, Vehicles,
+)
+
+PRESETS = {
+    'small': {'restaurants': 200, 'items': 20_000, 'customers': 2_000, 'orders': 50_000,
+              'drivers': 100, 'vehicles': 100},
+    'full': {'restaurants': 10_000, 'items': 1_000_000, 'customers': 100_000,
+             'orders': 5_000_000, 'drivers': 2_000, 'vehicles': 2_000},
+}
+
+CUISINES = ['Indian', 'South Indian', 'Chinese', 'Italian', 'Mexican', 'Thai',
+            'Japanese', 'Continental', 'Bakery', 'Street Food']
+WORDS = ['Spicy', 'Masala', 'Paneer', 'Chicken', 'Veg', 'Butter', 'Tandoori', 'Garlic',
+         'Crispy', 'Classic', 'Special', 'Smoky', 'Cheese', 'Mango', 'Lemon', 'Herb']
+DISHES = ['Biryani', 'Dosa', 'Noodles', 'Pizza', 'Tacos', 'Curry', 'Burger', 'Roll',
+          'Pasta', 'Soup', 'Salad', 'Momos', 'Wrap', 'Thali', 'Sushi', 'Cake']
+STATUSES = ['Pending', 'Out for Delivery', 'Delivered', 'Delivered', 'Delivered']
+
+BENCH_PASSWORD = 'bench-pass-123'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset for load tests and benchmarks "
+        "(--preset full is 10k restaurants, 1M menu items, 100k customers, 5M orders)."
+    )
+    batch_size = 5_000
+    rng = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=PRESETS, default='small')
+        for name in PRESETS['small']:
+            parser.add_argument(f'--{name}', type=int, help=f"Override the preset's {name} count.")
+        parser.add_argument('--users', type=int, default=50,
+                            help="Login accounts (bench-user-N) linked to the first customers.")
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--create-schema', action='store_true',
+                            help="Create any missing core tables (SQLite/local MySQL).")
+
+    def handle(self, *args, **options):
+        counts = dict(PRESETS[options['preset']])
+        counts.update({k: options[k] for k in counts if options.get(k) is not None})
+        self.batch_size = options['batch_size']
+        self.rng = random.Random(options['seed'])
+
+        if options['create_schema']:
+            self.create_schema()
+
+        started = time.perf_counter()
+        restaurant_ids = self.seed_restaurants(counts['restaurants'])
+        menu = self.seed_menu(restaurant_ids, counts['items'])
+        self.seed_fleet(counts['drivers'], counts['vehicles'])
+        customers = self.seed_customers(counts['customers'], options['users'])
+        self.seed_orders(customers, menu, counts['orders'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {counts} in {time.perf_counter() - started:.1f}s."
+        ))
+
+    # --- Schema ---
+
+    def create_schema(self):
+        """
+        Create every core table that does not exist yet. core has no
+        migrations, so this includes Profile, the one managed model, which
+        'migrate' leaves out as well.
+        """
+        existing = set(connection.introspection.table_names())
+        with connection.schema_editor() as editor:
+            for model in apps.get_app_config('core').get_models():
+                if model._meta.db_table not in existing:
+                    editor.create_model(model)
+                    self.stdout.write(f"Created table {model._meta.db_table}")
+
+    # --- Helpers ---
+
+    def insert(self, model, rows):
+        """bulk_create in batches, one transaction per batch."""
+        for start in range(0, len(rows), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(rows[start:start + self.batch_size])
+
+    def new_ids(self, model, pk, before, count):
+        """
+        Primary keys of the rows just inserted. MySQL's bulk_create does not
+        return them, so read them back past the previous maximum.
+        """
+        return list(model.objects.filter(**{f'{pk}__gt': before})
+                    .order_by(pk).values_list(pk, flat=True)[:count])
+
+    def max_id(self, model, pk):
+        return model.objects.aggregate(m=Max(pk))['m'] or 0
+
+    def log(self, label, count):
+        self.stdout.write(f"  {label}: {count:,}")
+
+    # --- Tables ---
+
+    def seed_restaurants(self, count):
+        before = self.max_id(Address, 'address_id')
+        self.insert(Address, [
+            Address(address_line_1=f'{i} Bench Street', state='Karnataka', country='India',
+                    zipcode=str(560001 + self.rng.randrange(100)))
+            for i in range(count)
+        ])
+        address_ids = self.new_ids(Address, 'address_id', before, count)
+
+        before = self.max_id(Restaurants, 'restaurant_id')
+        self.insert(Restaurants, [
+            Restaurants(name=f'{self.rng.choice(WORDS)} {self.rng.choice(DISHES)} House {i}',
+                        address_id=address_id, cuisine=self.rng.choice(CUISINES))
+            for i, address_id in enumerate(address_ids)
+        ])
+        self.log('restaurants', count)
+        return self.new_ids(Restaurants, 'restaurant_id', before, count)
+
+    def seed_menu(self, restaurant_ids, count):
+        """
+        Returns {restaurant_id: [(item_id, price), ...]} for order generation.
+        Items are generated and inserted a batch at a time, like orders.
+        """
+        before = self.max_id(MenuItems, 'item_id')
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            with transaction.atomic():
+                MenuItems.objects.bulk_create([
+                    MenuItems(
+                        restaurant_id=restaurant_ids[i % len(restaurant_ids)],
+                        item_name=f'{self.rng.choice(WORDS)} {self.rng.choice(DISHES)}',
+                        description=(f'{self.rng.choice(WORDS)} and '
+                                     f'{self.rng.choice(WORDS).lower()}'),
+                        price=Decimal(self.rng.randrange(4_000, 60_000)) / 100,
+                    )
+                    for i in range(start, start + size)
+                ])
+            self.stdout.write(f"  menu items: {start + size:,}/{count:,}", ending='\r')
+        self.stdout.write('')
+
+        menu = {}
+        for item_id, restaurant_id, price in MenuItems.objects.filter(
+            item_id__gt=before
+        ).values_list('item_id', 'restaurant_id', 'price').iterator(chunk_size=self.batch_size):
+            menu.setdefault(restaurant_id, []).append((item_id, price))
+        self.log('menu items', count)
+        return menu
+
+    def seed_fleet(self, drivers, vehicles):
+        first = self.max_id(Employees, 'employee_id') + 1
+        self.insert(Employees, [
+            Employees(employee_id=first + i, employee_name=f'Bench Driver {first + i}',
+                      phone=f'7{first + i:09d}', role='Driver')
+            for i in range(drivers)
+        ])
+        start = self.max_id(Vehicles, 'vehicle_id')
+        self.insert(Vehicles, [
+            Vehicles(registration_number=f'KA{start + i:08d}',
+                     type=self.rng.choice(['Bike', 'EV', 'Scooter']))
+            for i in range(vehicles)
+        ])
+        self.log('drivers', drivers)
+        self.log('vehicles', vehicles)
+
+    def seed_customers(self, count, users):
+        """Returns [(customer_id, payment_id), ...]."""
+        before = self.max_id(Customers, 'customer_id')
+        self.insert(Customers, [
+            Customers(first_name=f'Bench{before + i}', last_name='Customer',
+                      phone=f'8{before + i:09d}')
+            for i in range(count)
+        ])
+        customer_ids = self.new_ids(Customers, 'customer_id', before, count)
+
+        before = self.max_id(PaymentMethods, 'payment_id')
+        self.insert(PaymentMethods, [
+            PaymentMethods(customer_id=customer_id,
+                           payment_type=self.rng.choice(['UPI', 'Cash', 'Card']))
+            for customer_id in customer_ids
+        ])
+        payments = dict(PaymentMethods.objects.filter(payment_id__gt=before)
+                        .values_list('customer_id', 'payment_id'))
+
+        # Login accounts for the benchmark; one shared hash keeps this fast
+        password = make_password(BENCH_PASSWORD)
+        accounts = [
+            User(username=f'bench-user-{customer_id}', password=password)
+            for customer_id in customer_ids[:users]
+        ]
+        User.objects.bulk_create(accounts, ignore_conflicts=True)
+        user_ids = dict(User.objects.filter(username__in=[u.username for u in accounts])
+                        .values_list('username', 'id'))
+        Profile.objects.bulk_create([
+            Profile(user_id=user_ids[f'bench-user-{customer_id}'], customer_profile_id=customer_id)
+            for customer_id in customer_ids[:users]
+        ], ignore_conflicts=True)
+
+        self.log('customers', count)
+        self.log('login accounts', len(accounts))
+        return [(customer_id, payments[customer_id]) for customer_id in customer_ids]
+
+    def seed_orders(self, customers, menu, count):
+        restaurant_ids = list(menu)
+        driver_ids = list(
+            Employees.objects.filter(role='Driver').values_list('employee_id', flat=True))
+        vehicle_ids = list(Vehicles.objects.values_list('vehicle_id', flat=True))
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            orders, baskets = [], []
+            for _ in range(size):
+                customer_id, payment_id = self.rng.choice(customers)
+                restaurant_id = self.rng.choice(restaurant_ids)
+                lines = self.rng.sample(menu[restaurant_id], min(len(menu[restaurant_id]),
+                                                                 self.rng.randint(1, 4)))
+                basket = [(item_id, self.rng.randint(1, 3), price) for item_id, price in lines]
+                baskets.append(basket)
+                orders.append(Orders(
+                    customer_id=customer_id, restaurant_id=restaurant_id, payment_id=payment_id,
+                    total_price=sum(price * qty for _, qty, price in basket),
+                    delivery_status=self.rng.choice(STATUSES),
+                ))
+
+            with transaction.atomic():
+                before = self.max_id(Orders, 'order_id')
+                Orders.objects.bulk_create(orders)
+                order_ids = self.new_ids(Orders, 'order_id', before, size)
+                OrderItems.objects.bulk_create([
+                    OrderItems(order_id=order_id, item_id=item_id, quantity=qty)
+                    for order_id, basket in zip(order_ids, baskets)
+                    for item_id, qty, _ in basket
+                ])
+                if driver_ids and vehicle_ids:
+                    OrderAssignment.objects.bulk_create([
+                        OrderAssignment(order_id=order_id,
+                                        employee_id=self.rng.choice(driver_ids),
+                                        vehicle_id=self.rng.choice(vehicle_ids))
+                        for order_id in order_ids
+                    ])
+            self.stdout.write(f"  orders: {start + size:,}/{count:,}", ending='\r')
+        self.stdout.write('')
+        self.log('orders', count)
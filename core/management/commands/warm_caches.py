@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import catalog
+
+
+class Command(BaseCommand):
+    help = "Pre-load the shared catalog cache so the first requests after a deploy are fast."
+
+    def handle(self, *args, **options):
+        # The driver and search indexes live inside each worker and fill
+        # themselves on first use; this process cannot warm them for others.
+        if not catalog.cache_is_shared():
+            alias = getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')
+            raise CommandError(
+                f"CACHES[{alias!r}] is local to each process, so warming it here would not reach "
+                "the web workers. Point it at a shared backend (e.g. FileBasedCache or Memcached)."
+            )
+        catalog.warm()
+        self.stdout.write(self.style.SUCCESS("Warmed restaurant catalog."))
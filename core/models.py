@@ -170,7 +170,8 @@ class PaymentMethods(models.Model):
         unique_together = (('customer', 'payment_type'),)  # ✅ ensures one per type per customer
 
     def __str__(self):
-        return f"{self.payment_type} - {self.customer.first_name} (ID: {self.payment_id})"
+        # customer_id, not customer: listing payment methods must not load every customer
+        return f"{self.payment_type} - customer {self.customer_id} (ID: {self.payment_id})"
 
 
 
@@ -226,7 +227,8 @@ class OrderAssignment(models.Model):
         db_table = 'Order_Assignment'
 
     def __str__(self):
-        return f"Order {self.order.order_id} → {self.employee.name} ({self.vehicle.registration_number})"
+        return (f"Order {self.order_id} → {self.employee.employee_name} "
+                f"({self.vehicle.registration_number})")
 
 
 
@@ -250,4 +252,71 @@ class CustomerAddresses(models.Model):
         verbose_name_plural = "Customer Addresses"
 
 
+# ----------------------------
+# Analytics rollups (core/analytics.py)
+# ----------------------------
+# One row per key, grain ('hour' or 'day') and period start (UTC), with
+# counters that place_order (or 'manage.py tail_rollups') adds to and
+# 'manage.py rebuild_rollups' rebuilds.
+# No foreign key constraints: a rollup outlives a deleted item or restaurant.
+class RestaurantRollup(models.Model):
+    rollup_id = models.BigAutoField(primary_key=True, db_column='Rollup_id')
+    restaurant = models.ForeignKey(
+        Restaurants, models.DO_NOTHING, db_column='Restaurant_id', db_constraint=False)
+    grain = models.CharField(max_length=4, db_column='Grain')
+    period_start = models.DateTimeField(db_column='Period_start')
+    orders = models.IntegerField(default=0, db_column='Orders')
+    items = models.IntegerField(default=0, db_column='Items')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'),
+                                  db_column='Revenue')
+
+    class Meta:
+        managed = False
+        db_table = 'Restaurant_Rollups'
+        unique_together = (('restaurant', 'grain', 'period_start'),)
+        indexes = [models.Index(fields=['grain', 'period_start'],
+                                name='idx_restaurant_rollups_period')]
+
+
+class MenuItemRollup(models.Model):
+    rollup_id = models.BigAutoField(primary_key=True, db_column='Rollup_id')
+    item = models.ForeignKey(MenuItems, models.DO_NOTHING, db_column='Item_id', db_constraint=False)
+    restaurant = models.ForeignKey(
+        Restaurants, models.DO_NOTHING, db_column='Restaurant_id', db_constraint=False)
+    grain = models.CharField(max_length=4, db_column='Grain')
+    period_start = models.DateTimeField(db_column='Period_start')
+    quantity = models.IntegerField(default=0, db_column='Quantity')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'),
+                                  db_column='Revenue')
+
+    class Meta:
+        managed = False
+        db_table = 'Menu_Item_Rollups'
+        unique_together = (('item', 'grain', 'period_start'),)
+        indexes = [models.Index(fields=['restaurant', 'grain', 'period_start'],
+                                name='idx_item_rollups_restaurant')]
+
 
+class PaymentTypeRollup(models.Model):
+    rollup_id = models.BigAutoField(primary_key=True, db_column='Rollup_id')
+    payment_type = models.CharField(max_length=20, db_column='Payment_type')
+    grain = models.CharField(max_length=4, db_column='Grain')
+    period_start = models.DateTimeField(db_column='Period_start')
+    orders = models.IntegerField(default=0, db_column='Orders')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'),
+                                  db_column='Revenue')
+
+    class Meta:
+        managed = False
+        db_table = 'Payment_Type_Rollups'
+        unique_together = (('payment_type', 'grain', 'period_start'),)
+
+
+class RollupWatermark(models.Model):
+    """The last order id a tailing rollup job has added (analytics.tail_payment_types)."""
+    name = models.CharField(max_length=40, primary_key=True, db_column='Name')
+    last_order_id = models.IntegerField(default=0, db_column='Last_order_id')
+
+    class Meta:
+        managed = False
+        db_table = 'Rollup_Watermarks'
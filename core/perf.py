@@ -0,0 +1,247 @@
+"""
+Opt-in per-request instrumentation.
+
+PerfMiddleware samples PERF_SAMPLE_RATE of requests. For each sample it
+records wall time, query count, total SQL time, repeated query fingerprints
+(N+1 patterns) and template render time, keyed by view name. Samples go to
+an in-process ring buffer, served by the staff-only perf view. If
+PERF_SPOOL_PATH is set they are also appended to a JSON-lines file, which
+'manage.py perf_report' aggregates across every worker process.
+
+With PERF_SAMPLE_RATE = 0 the middleware removes itself at startup, so
+there is no per-request cost at all.
+
+The middleware runs in both the sync and async handler. Under ASGI the
+queries of a request run on its sync_to_async thread, whose connections are
+not the event loop's, so the query hooks are installed (and removed) on
+that thread.
+"""
+import contextvars
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+_NUMBERS = re.compile(r'\b\d+\b')
+_PLACEHOLDER_LISTS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_QUOTED = re.compile(r"'(?:[^']|'')*'")
+_TRANSACTION_CONTROL = re.compile(r'\s*(BEGIN|SAVEPOINT|RELEASE|ROLLBACK|COMMIT)\b', re.I)
+
+# Template time of the request being sampled on this thread/task, or None
+_template_seconds = contextvars.ContextVar('perf_template_seconds', default=None)
+
+
+def fingerprint(sql):
+    """Collapse literals and IN-lists so one query shape maps to one string."""
+    sql = _QUOTED.sub('?', sql)
+    sql = _PLACEHOLDER_LISTS.sub('(...)', sql)
+    return _NUMBERS.sub('?', sql)
+
+
+class RingBuffer:
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+
+    def append(self, sample):
+        with self._lock:
+            self._samples.append(sample)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._samples)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+buffer = RingBuffer(getattr(settings, 'PERF_BUFFER_SIZE', 2000))
+
+
+class QueryRecorder:
+    """execute_wrapper hook counting queries, SQL time and shapes."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            if not _TRANSACTION_CONTROL.match(sql):
+                self.shapes[fingerprint(sql)] += 1
+
+
+def _instrument_templates():
+    """Wrap the Django template backend once so render time can be attributed."""
+    from django.template.backends.django import Template  # pylint: disable=import-outside-toplevel
+
+    if getattr(Template.render, 'perf_instrumented', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        spent = _template_seconds.get()
+        if spent is None:
+            return original(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            _template_seconds.set(spent + time.perf_counter() - started)
+
+    render.perf_instrumented = True
+    Template.render = render
+
+
+def _record_queries(stack, recorder):
+    """Hook `recorder` into this thread's connections until `stack` closes."""
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+
+
+class PerfMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.rate = getattr(settings, 'PERF_SAMPLE_RATE', 0)
+        if not self.rate:
+            raise MiddlewareNotUsed("PERF_SAMPLE_RATE is 0")
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.spool_path = getattr(settings, 'PERF_SPOOL_PATH', None)
+        self.spool_lock = threading.Lock()
+        _instrument_templates()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        token = _template_seconds.set(0.0)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _record_queries(stack, recorder)
+                response = self.get_response(request)
+        finally:
+            wall = time.perf_counter() - started
+            template = _template_seconds.get()
+            _template_seconds.reset(token)
+
+        sample = self.sample(request, response, recorder, wall, template)
+        if self.spool_path:
+            self.spool(sample)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.rate:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        token = _template_seconds.set(0.0)
+        started = time.perf_counter()
+        stack = ExitStack()
+        try:
+            await sync_to_async(_record_queries)(stack, recorder)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            wall = time.perf_counter() - started
+            template = _template_seconds.get()
+            _template_seconds.reset(token)
+
+        sample = self.sample(request, response, recorder, wall, template)
+        if self.spool_path:
+            await sync_to_async(self.spool, thread_sensitive=False)(sample)
+        return response
+
+    def sample(self, request, response, recorder, wall, template):
+        """Build the request's sample and add it to the ring buffer."""
+        match = getattr(request, 'resolver_match', None)
+        sample = {
+            'view': match.view_name if match else request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'at': time.time(),
+            'wall_ms': round(wall * 1000, 3),
+            'queries': recorder.count,
+            'sql_ms': round(recorder.seconds * 1000, 3),
+            'template_ms': round(template * 1000, 3),
+            'duplicates': {shape: n for shape, n in recorder.shapes.items() if n > 1},
+        }
+        buffer.append(sample)
+        return sample
+
+    def spool(self, sample):
+        line = json.dumps(sample, separators=(',', ':')) + '\n'
+        with self.spool_lock, open(self.spool_path, 'a', encoding='utf-8') as fh:
+            fh.write(line)
+
+
+def _pct(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples, top_duplicates=3):
+    """Per-view latency, query and render statistics, slowest p95 first."""
+    by_view = {}
+    for sample in samples:
+        by_view.setdefault(sample['view'], []).append(sample)
+
+    report = []
+    for view, rows in by_view.items():
+        walls = [r['wall_ms'] for r in rows]
+        duplicates = Counter()
+        for r in rows:
+            duplicates.update(r['duplicates'])
+        report.append({
+            'view': view,
+            'requests': len(rows),
+            'p50_ms': round(_pct(walls, 50), 2),
+            'p95_ms': round(_pct(walls, 95), 2),
+            'max_ms': round(max(walls), 2),
+            'queries': round(statistics.fmean(r['queries'] for r in rows), 1),
+            'sql_ms': round(statistics.fmean(r['sql_ms'] for r in rows), 2),
+            'template_ms': round(statistics.fmean(r['template_ms'] for r in rows), 2),
+            'duplicates': [
+                {'sql': shape, 'per_request': round(n / len(rows), 1)}
+                for shape, n in duplicates.most_common(top_duplicates)
+            ],
+        })
+    report.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return report
+
+
+def read_spool(path, since=None):
+    samples = []
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            try:
+                sample = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crashed worker
+            if since is None or sample['at'] >= since:
+                samples.append(sample)
+    return samples
@@ -0,0 +1,177 @@
+"""
+Nightly finance and ops reports over the whole order history, with NumPy.
+
+Orders and Order_Items are read a range of order ids at a time, each range
+through values_list(...).iterator(), and turned into NumPy columns. Money
+is carried as integer paise, cast in SQL, so totals stay exact. Each report
+folds a chunk into running totals with vectorised group-bys (bincount,
+add.at, unique). Memory depends on the chunk size and the number of
+restaurants and payment types, not on the number of orders.
+
+Reports:
+
+  * restaurant_revenue: orders and revenue per restaurant;
+  * basket_sizes: how many orders had 1, 2, 3... items (summing quantity);
+  * payment_spend: orders, spend and average order per payment type.
+
+write() saves them as CSV, or as Parquet when pyarrow is installed.
+"""
+import csv
+import os
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import BigIntegerField, F, Max, Min
+from django.db.models.functions import Cast, Round
+
+from .models import OrderItems, Orders, Restaurants
+
+
+def _paise(field):
+    return Cast(Round(F(field) * 100), BigIntegerField())
+
+
+def _columns(rows, dtypes):
+    """[(a, b, ...)] -> [array of a, array of b, ...]"""
+    if not rows:
+        return [np.empty(0, dtype=dtype) for dtype in dtypes]
+    return [np.array(column, dtype=dtype) for column, dtype in zip(zip(*rows), dtypes)]
+
+
+def _grown(array, size):
+    """array, zero-padded to at least `size` entries."""
+    if size <= len(array):
+        return array
+    return np.concatenate([array, np.zeros(size - len(array), dtype=array.dtype)])
+
+
+def _rupees(paise):
+    return Decimal(int(paise)) / 100
+
+
+class OrderReports:
+    """Running totals for every report, fed one chunk of orders at a time."""
+
+    def __init__(self):
+        self.orders = 0
+        self.restaurant_orders = np.zeros(0, dtype=np.int64)   # indexed by restaurant id
+        self.restaurant_paise = np.zeros(0, dtype=np.int64)
+        self.basket_counts = np.zeros(0, dtype=np.int64)       # indexed by items in the basket
+        self.payment = {}                                      # type -> [orders, paise]
+
+    def add_orders(self, restaurant_ids, paise, payment_types):
+        self.orders += len(restaurant_ids)
+        if not restaurant_ids.size:
+            return
+        size = int(restaurant_ids.max()) + 1
+        self.restaurant_orders = _grown(self.restaurant_orders, size)
+        self.restaurant_paise = _grown(self.restaurant_paise, size)
+        self.restaurant_orders += np.bincount(restaurant_ids, minlength=len(self.restaurant_orders))
+        np.add.at(self.restaurant_paise, restaurant_ids, paise)
+
+        types, which = np.unique(payment_types, return_inverse=True)
+        counts = np.bincount(which, minlength=len(types))
+        sums = np.zeros(len(types), dtype=np.int64)
+        np.add.at(sums, which, paise)
+        for payment_type, count, total in zip(types, counts, sums):
+            totals = self.payment.setdefault(payment_type, [0, 0])
+            totals[0] += int(count)
+            totals[1] += int(total)
+
+    def add_items(self, order_ids, quantities):
+        """A chunk's order lines; every line of an order must be in the same chunk."""
+        if not order_ids.size:
+            return
+        _, which = np.unique(order_ids, return_inverse=True)
+        sizes = np.bincount(which, weights=quantities).astype(np.int64)
+        counts = np.bincount(sizes)
+        self.basket_counts = _grown(self.basket_counts, len(counts))
+        self.basket_counts[:len(counts)] += counts
+
+    def results(self):
+        """{report name: (header, rows)}"""
+        ids = np.flatnonzero(self.restaurant_orders)
+        names = Restaurants.objects.in_bulk(ids.tolist())
+        by_revenue = ids[np.argsort(-self.restaurant_paise[ids], kind='stable')]
+        restaurant_revenue = [
+            (int(rid), names[rid].name if rid in names else '',
+             int(self.restaurant_orders[rid]), _rupees(self.restaurant_paise[rid]))
+            for rid in by_revenue.tolist()
+        ]
+
+        baskets = np.flatnonzero(self.basket_counts)
+        basket_orders = self.basket_counts.sum()
+        basket_sizes = [
+            (int(size), int(self.basket_counts[size]),
+             round(float(self.basket_counts[size]) / basket_orders * 100, 2))
+            for size in baskets.tolist()
+        ]
+
+        payment_spend = [
+            (payment_type, count, _rupees(paise),
+             (_rupees(paise) / count).quantize(Decimal('0.01')))
+            for payment_type, (count, paise) in sorted(
+                self.payment.items(), key=lambda entry: -entry[1][1])
+        ]
+        return {
+            'restaurant_revenue': (('restaurant_id', 'name', 'orders', 'revenue'),
+                                   restaurant_revenue),
+            'basket_sizes': (('items', 'orders', 'percent'), basket_sizes),
+            'payment_spend': (('payment_type', 'orders', 'spend', 'average_order'), payment_spend),
+        }
+
+
+def build(since=None, until=None, chunk_size=50_000, progress=None):
+    """
+    Run every report over the orders placed in [since, until). Orders are
+    read chunk_size order ids at a time, with their lines. Returns
+    (order count, OrderReports.results()).
+    """
+    orders = Orders.objects.all()
+    if since:
+        orders = orders.filter(order_date__gte=since)
+    if until:
+        orders = orders.filter(order_date__lt=until)
+    bounds = orders.aggregate(lo=Min('order_id'), hi=Max('order_id'))
+    reports = OrderReports()
+    if bounds['lo'] is None:
+        return 0, reports.results()
+
+    for lo in range(bounds['lo'], bounds['hi'] + 1, chunk_size):
+        chunk = orders.filter(order_id__gte=lo, order_id__lt=lo + chunk_size)
+        rows = list(chunk.values_list(
+            'restaurant_id', _paise('total_price'), 'payment__payment_type',
+        ).iterator(chunk_size=chunk_size))
+        reports.add_orders(*_columns(rows, (np.int64, np.int64, object)))
+
+        lines = OrderItems.objects.filter(order__in=chunk.values('order_id'))
+        rows = list(lines.values_list('order_id', 'quantity').iterator(chunk_size=chunk_size))
+        reports.add_items(*_columns(rows, (np.int64, np.int64)))
+        if progress:
+            progress(reports.orders)
+    return reports.orders, reports.results()
+
+
+def write(results, directory, fmt='csv'):
+    """Write each report to <directory>/<name>.csv (or .parquet). Returns the paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, (header, rows) in results.items():
+        path = os.path.join(directory, f'{name}.{fmt}')
+        if fmt == 'parquet':
+            # pyarrow is optional; only needed for Parquet output
+            import pyarrow as pa  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+            columns = list(zip(*rows)) or [()] * len(header)
+            table = pa.table({
+                column: [float(v) if isinstance(v, Decimal) else v for v in values]
+                for column, values in zip(header, columns)
+            })
+            pq.write_table(table, path)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+        paths.append(path)
+    return paths
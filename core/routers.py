@@ -0,0 +1,61 @@
+"""
+Database routing for the optional read replica.
+
+Reads go to the 'replica' alias only inside views wrapped with
+@replica_reads, and only if that alias is configured. Everything else,
+including every write, uses 'default'.
+"""
+import contextvars
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+class ReadReplicaRouter:
+    # Django calls router methods with fixed signatures
+    # pylint: disable=unused-argument
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and REPLICA_ALIAS in settings.DATABASES:
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+def replica_reads(view):
+    """
+    Route the ORM reads made by `view` to the read replica. Apply it below
+    @login_required, so the session and user are still read from the primary.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            token = _use_replica.set(True)
+            try:
+                return await view(*args, **kwargs)
+            finally:
+                _use_replica.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = _use_replica.set(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
@@ -0,0 +1,378 @@
+"""
+Restaurant and menu search.
+
+An in-process inverted index over Restaurants.name/cuisine and
+MenuItems.item_name/description. Restaurants and menu items live in separate
+segments so restaurants are listed first, and within each segment names
+(titles) have their own postings so name matches rank ahead of cuisine or
+description matches.
+
+Matching, per query token:
+  * the last token matches as a prefix (typeahead), the others exactly;
+  * if that finds nothing, tokens of MIN_FUZZY_LENGTH characters or more
+    also match terms one edit away, found through a symmetric-delete table.
+
+Only as many documents as the limit asks for are read out of the postings,
+so a common prefix over a million menu items still costs a set
+intersection or two, not a sort.
+
+Each worker builds its index in a background thread on its first search,
+so no request waits for the catalog to load: until it is ready, search()
+returns no results and is_ready() is False. The catalog signals keep it
+current in this process once each write commits. Changes made by other
+workers are picked up by a background rebuild once SEARCH_INDEX_TTL has
+passed, or at once after 'manage.py rebuild_search_index' bumps the shared
+generation key. The rebuild thread closes its database connections when it
+is done.
+"""
+import bisect
+import re
+import threading
+import time
+from itertools import chain, islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from .models import MenuItems, Restaurants
+
+GENERATION_KEY = 'search:generation'
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_TERMS = 64
+MIN_FUZZY_LENGTH = 4
+MAX_QUERY_TOKENS = 6
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or '').lower())
+
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def _union(postings, terms):
+    sets = [postings[t] for t in terms if t in postings]
+    if len(sets) == 1:
+        return sets[0]  # shared with the index: read it, never mutate it
+    return set().union(*sets)
+
+
+def _intersect(sets):
+    sets = sorted(sets, key=len)
+    result = sets[0]
+    for other in sets[1:]:
+        if not result:
+            break
+        result = result & other
+    return result
+
+
+class _Segment:
+    """Postings for one kind of document (restaurants or menu items)."""
+
+    def __init__(self):
+        self.docs = {}      # id -> (title, body, restaurant_id)
+        self.title = {}     # term -> {ids}
+        self.body = {}      # term -> {ids}
+        self.terms = []     # sorted vocabulary, for prefix scans
+        self.near = {}      # term minus one character -> {terms}
+
+    # --- Writes ---
+
+    def add(self, key, title, body, restaurant_id, bulk=False):
+        if key in self.docs:
+            self.remove(key)
+        self.docs[key] = (title, body, restaurant_id)
+        for postings, text in ((self.title, title), (self.body, body)):
+            for term in set(tokenize(text)):
+                if term not in postings:
+                    if not bulk and term not in self.title and term not in self.body:
+                        self._add_term(term)
+                    postings[term] = set()
+                postings[term].add(key)
+
+    def remove(self, key):
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        for postings, text in ((self.title, doc[0]), (self.body, doc[1])):
+            for term in set(tokenize(text)):
+                keys = postings.get(term)
+                if keys is None:
+                    continue
+                keys.discard(key)
+                if not keys:
+                    del postings[term]
+                    if term not in self.title and term not in self.body:
+                        self._drop_term(term)
+
+    def finish_bulk(self):
+        self.terms = sorted(self.title.keys() | self.body.keys())
+        self.near = {}
+        for term in self.terms:
+            self._add_near(term)
+
+    def _add_term(self, term):
+        bisect.insort(self.terms, term)
+        self._add_near(term)
+
+    def _drop_term(self, term):
+        i = bisect.bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            del self.terms[i]
+        if len(term) >= MIN_FUZZY_LENGTH - 1:
+            for variant in _deletes(term):
+                near = self.near.get(variant)
+                if near is not None:
+                    near.discard(term)
+                    if not near:
+                        del self.near[variant]
+
+    def _add_near(self, term):
+        if len(term) >= MIN_FUZZY_LENGTH - 1:
+            for variant in _deletes(term):
+                self.near.setdefault(variant, set()).add(term)
+
+    # --- Reads ---
+
+    def expand(self, token, prefix, fuzzy):
+        """The vocabulary terms a query token stands for."""
+        found = set()
+        if token in self.title or token in self.body:
+            found.add(token)
+        if prefix and len(token) >= MIN_PREFIX_LENGTH:
+            i = bisect.bisect_left(self.terms, token)
+            end = min(len(self.terms), i + MAX_PREFIX_TERMS)
+            while i < end and self.terms[i].startswith(token):
+                found.add(self.terms[i])
+                i += 1
+        if fuzzy and len(token) >= MIN_FUZZY_LENGTH:
+            # Edit distance 1: an insertion, deletion, substitution or
+            # adjacent transposition all share a one-delete variant.
+            found |= self.near.get(token, set())
+            for variant in _deletes(token):
+                if variant in self.title or variant in self.body:
+                    found.add(variant)
+                found |= self.near.get(variant, set())
+        return found
+
+    def match(self, tokens, fuzzy, limit):
+        """Up to `limit` ids matching every token, name matches first."""
+        last = len(tokens) - 1
+        expanded = [self.expand(t, prefix=i == last, fuzzy=fuzzy) for i, t in enumerate(tokens)]
+        if limit <= 0 or not all(expanded):
+            return []
+
+        in_title = _intersect([_union(self.title, terms) for terms in expanded])
+        keys = list(islice(in_title, limit))
+        if len(keys) < limit:
+            keys += islice(self._anywhere(expanded, in_title), limit - len(keys))
+        return keys
+
+    def _anywhere(self, expanded, skip):
+        """
+        Ids matching every token in the name or the body, lazily: walk the
+        postings of the rarest token and probe the others, rather than
+        building unions of what may be very large sets.
+        """
+        groups = [
+            [postings[t] for postings in (self.title, self.body) for t in terms if t in postings]
+            for terms in expanded
+        ]
+        groups.sort(key=lambda group: sum(map(len, group)))
+        seen = set()
+        for key in chain.from_iterable(groups[0]):
+            if key in skip or key in seen:
+                continue
+            seen.add(key)
+            if all(any(key in keys for keys in group) for group in groups[1:]):
+                yield key
+
+
+KINDS = ('restaurant', 'item')
+
+
+class SearchIndex:
+
+    KINDS = KINDS
+
+    def __init__(self):
+        self._segments = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._built_at = 0.0
+        self._generation = None
+        self._rebuilding = False
+        self._loading = False
+        self._pending = []
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'SEARCH_INDEX_TTL', 15 * 60)
+
+    # --- Building ---
+
+    def build(self):
+        """Load every restaurant and menu item into fresh segments and swap them in."""
+        with self._build_lock:
+            with self._lock:
+                self._loading = True
+            try:
+                generation = _cache().get(GENERATION_KEY)
+                segments = self._load()
+            except BaseException:
+                with self._lock:
+                    self._loading = False
+                    self._pending = []
+                raise
+
+            with self._lock:
+                # Replay the signal updates that arrived while loading
+                for change in self._pending:
+                    self._apply(segments, *change)
+                self._pending = []
+                self._loading = False
+                self._segments = segments
+                self._built_at = time.monotonic()
+                self._generation = generation
+        return segments
+
+    def _load(self):
+        restaurants, items = _Segment(), _Segment()
+        for rid, name, cuisine in Restaurants.objects.values_list(
+            'restaurant_id', 'name', 'cuisine'
+        ).iterator(chunk_size=5000):
+            restaurants.add(rid, name, cuisine, rid, bulk=True)
+        for item_id, rid, name, description in MenuItems.objects.values_list(
+            'item_id', 'restaurant_id', 'item_name', 'description'
+        ).iterator(chunk_size=5000):
+            items.add(item_id, name, description, rid, bulk=True)
+        restaurants.finish_bulk()
+        items.finish_bulk()
+        return {'restaurant': restaurants, 'item': items}
+
+    def request_rebuild(self):
+        """Rebuild in a background thread; the current segments keep serving."""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            try:
+                self.build()
+            finally:
+                self._rebuilding = False
+                connections.close_all()  # this thread's connections only
+
+        threading.Thread(target=run, name='search-rebuild', daemon=True).start()
+
+    def invalidate(self):
+        with self._lock:
+            self._segments = None
+            self._pending = []
+
+    def is_ready(self):
+        return self._segments is not None
+
+    def stats(self):
+        segments = self._segments or {}
+        return {
+            'documents': sum(len(s.docs) for s in segments.values()),
+            'terms': sum(len(s.terms) for s in segments.values()),
+        }
+
+    def _current(self):
+        """The segments to search, or None (with a build started) if there are none yet."""
+        if self._segments is None:
+            self.request_rebuild()
+        elif (_cache().get(GENERATION_KEY) != self._generation
+              or time.monotonic() - self._built_at > self.ttl):
+            self.request_rebuild()
+        return self._segments
+
+    # --- Incremental updates (catalog signals) ---
+
+    def put_restaurant(self, restaurant):
+        self._change('add', 'restaurant', restaurant.restaurant_id, restaurant.name,
+                     restaurant.cuisine, restaurant.restaurant_id)
+
+    def put_item(self, item):
+        self._change('add', 'item', item.item_id, item.item_name, item.description,
+                     item.restaurant_id)
+
+    def remove_restaurant(self, restaurant_id):
+        self._change('remove', 'restaurant', restaurant_id)
+
+    def remove_item(self, item_id):
+        self._change('remove', 'item', item_id)
+
+    def _change(self, *change):
+        with self._lock:
+            if self._loading:
+                self._pending.append(change)
+            if self._segments is not None:
+                self._apply(self._segments, *change)
+
+    def _apply(self, segments, op, kind, key, *doc):
+        if op == 'add':
+            segments[kind].add(key, *doc)
+        else:
+            segments[kind].remove(key)
+
+    # --- Queries ---
+
+    def search(self, query, limit=10, kinds=KINDS):
+        """
+        Up to `limit` results, restaurants before menu items:
+        [{'type', 'id', 'name', 'detail', 'restaurant_id'}, ...]
+        `kinds` narrows the search to 'restaurant' or 'item' documents.
+        Nothing while the index is still being built.
+        """
+        tokens = tokenize(query)[:MAX_QUERY_TOKENS]
+        if not tokens:
+            return []
+        segments = self._current()
+        if segments is None:
+            return []
+
+        with self._lock:
+            for fuzzy in (False, True):
+                if fuzzy and all(len(t) < MIN_FUZZY_LENGTH for t in tokens):
+                    break
+                results = []
+                for kind in kinds:
+                    for key in segments[kind].match(tokens, fuzzy, limit - len(results)):
+                        results.append(self._result(segments, kind, key))
+                if results:
+                    break
+            return results
+
+    def _result(self, segments, kind, key):
+        title, body, rid = segments[kind].docs[key]
+        if kind == 'restaurant':
+            detail = body or ''
+        else:
+            restaurant = segments['restaurant'].docs.get(rid)
+            detail = restaurant[0] if restaurant else ''
+        return {'type': kind, 'id': key, 'name': title, 'detail': detail, 'restaurant_id': rid}
+
+
+def bump_generation():
+    """Ask every worker to rebuild its index on its next search."""
+    cache = _cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, int(time.time() * 1000), None)
+
+
+index = SearchIndex()
@@ -0,0 +1,67 @@
+# Receivers take Django's signal arguments whether they use them or not.
+# pylint: disable=unused-argument
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog, search, snapshots
+from .models import MenuItems, OrderAssignment, Orders, Restaurants
+
+
+# --- Catalog cache invalidation ---
+# Versions are bumped after commit: bumped earlier, a concurrent miss could
+# refill the new version from the old rows and pin them until it expires.
+
+@receiver([post_save, post_delete], sender=Restaurants)
+def restaurant_changed(sender, instance, **kwargs):
+    rid = instance.restaurant_id
+    transaction.on_commit(lambda: catalog.bust_restaurant(rid))
+
+
+@receiver([post_save, post_delete], sender=MenuItems)
+def menu_item_changed(sender, instance, **kwargs):
+    rid = instance.restaurant_id
+    transaction.on_commit(lambda: catalog.bust_menu(rid))
+
+
+# --- Search index ---
+# Updated after commit, so a rolled-back write never shows up in results.
+
+@receiver(post_save, sender=Restaurants)
+def restaurant_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: search.index.put_restaurant(instance))
+
+
+@receiver(post_delete, sender=Restaurants)
+def restaurant_deleted(sender, instance, **kwargs):
+    rid = instance.restaurant_id
+    transaction.on_commit(lambda: search.index.remove_restaurant(rid))
+
+
+@receiver(post_save, sender=MenuItems)
+def menu_item_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: search.index.put_item(instance))
+
+
+@receiver(post_delete, sender=MenuItems)
+def menu_item_deleted(sender, instance, **kwargs):
+    item_id = instance.item_id
+    transaction.on_commit(lambda: search.index.remove_item(item_id))
+
+
+# --- Order status cache ---
+
+@receiver(post_save, sender=Orders)
+def order_saved(sender, instance, created, **kwargs):
+    if not created:
+        snapshots.status_changed(instance.order_id)
+
+
+@receiver(post_delete, sender=Orders)
+def order_deleted(sender, instance, **kwargs):
+    snapshots.forget(instance.order_id)
+
+
+@receiver([post_save, post_delete], sender=OrderAssignment)
+def assignment_changed(sender, instance, **kwargs):
+    snapshots.status_changed(instance.order_id)
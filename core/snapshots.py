@@ -0,0 +1,235 @@
+"""
+Order snapshots for the confirmation page.
+
+An order's header and items never change after checkout, so that part is
+cached per order the first time it is read. The delivery status and the
+driver/vehicle assignment live in a second, short-lived entry that the order
+signals refresh whenever either changes, so a refresh of the confirmation
+page or a poll of the status endpoint normally runs no query at all.
+"""
+import asyncio
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import events
+from .models import OrderItems, Orders
+
+ASSIGNMENT_FIELDS = (
+    'delivery_status',
+    'orderassignment__employee_id',
+    'orderassignment__employee__employee_name',
+    'orderassignment__employee__phone',
+    'orderassignment__vehicle_id',
+    'orderassignment__vehicle__type',
+    'orderassignment__vehicle__registration_number',
+)
+
+
+def _cache():
+    return caches[getattr(settings, 'ORDER_SNAPSHOT_CACHE_ALIAS', 'default')]
+
+
+def _key(order_id):
+    return f'order:snapshot:{order_id}'
+
+
+def _assignment(row):
+    """Build the template's assignment dict from an ASSIGNMENT_FIELDS row."""
+    _, employee_id, name, phone, vehicle_id, vehicle_type, registration = row
+    if employee_id is None:
+        return None
+    return {
+        'employee': {'id': employee_id, 'name': name, 'phone': phone},
+        'vehicle': {'id': vehicle_id, 'type': vehicle_type, 'registration_number': registration},
+    }
+
+
+def _order_query(order_id):
+    return Orders.objects.select_related(
+        'restaurant', 'payment',
+        'orderassignment__employee', 'orderassignment__vehicle',
+    ).filter(order_id=order_id)
+
+
+def _items_query(order_id):
+    return OrderItems.objects.filter(order_id=order_id).values_list(
+        'item_id', 'item__item_name', 'item__price', 'quantity')
+
+
+def _static_and_live(order, item_rows):
+    """Split a loaded order into its cacheable part and its live row."""
+    static = {
+        'order': {
+            'order_id': order.order_id,
+            'customer_id': order.customer_id,
+            'restaurant': {'restaurant_id': order.restaurant_id, 'name': order.restaurant.name},
+            'payment': {'payment_type': order.payment.payment_type},
+            'total_price': order.total_price,
+            'order_date': order.order_date,
+        },
+        'items': [
+            {'item_id': item_id, 'name': name, 'price': price, 'quantity': quantity}
+            for item_id, name, price, quantity in item_rows
+        ],
+    }
+
+    assignment = getattr(order, 'orderassignment', None)
+    live = (order.delivery_status,) + (
+        (assignment.employee_id, assignment.employee.employee_name, assignment.employee.phone,
+         assignment.vehicle_id, assignment.vehicle.type, assignment.vehicle.registration_number)
+        if assignment else (None,) * 6
+    )
+    return static, live
+
+
+def _load_order(order_id):
+    """Cache miss: the order with its assignment, then its items (two queries)."""
+    order = _order_query(order_id).get()
+    return _static_and_live(order, list(_items_query(order_id)))
+
+
+def _snapshot(static, status):
+    order = dict(static['order'], delivery_status=status['delivery_status'])
+    return {'order': order, 'items': static['items'], 'assignment': status['assignment']}
+
+
+def _timeout():
+    return getattr(settings, 'ORDER_SNAPSHOT_TIMEOUT', 60 * 60 * 24)
+
+
+def get_order_snapshot(order_id):
+    """
+    Return {'order', 'items', 'assignment'} for an order; raises
+    Orders.DoesNotExist. No query at all when both the static part and the
+    status are cached, one when only the status has to be re-read.
+    """
+    cache = _cache()
+    found = cache.get_many([_key(order_id), _status_key(order_id)])
+    static, status = found.get(_key(order_id)), found.get(_status_key(order_id))
+    if static is None:
+        static, live = _load_order(order_id)
+        status = _status((static['order']['customer_id'],) + live)
+        cache.set(_key(order_id), static, _timeout())
+        cache.set(_status_key(order_id), status, _status_timeout())
+    elif status is None:
+        status = load_order_status(order_id)
+    return _snapshot(static, status)
+
+
+async def aget_order_snapshot(order_id):
+    """Async get_order_snapshot(); on a miss the order and its items are read together."""
+    cache = _cache()
+    found = await cache.aget_many([_key(order_id), _status_key(order_id)])
+    static, status = found.get(_key(order_id)), found.get(_status_key(order_id))
+    if static is None:
+        order, item_rows = await asyncio.gather(
+            _order_query(order_id).aget(),
+            _alist(_items_query(order_id)),
+        )
+        static, live = _static_and_live(order, item_rows)
+        status = _status((static['order']['customer_id'],) + live)
+        await asyncio.gather(
+            cache.aset(_key(order_id), static, _timeout()),
+            cache.aset(_status_key(order_id), status, _status_timeout()),
+        )
+    elif status is None:
+        status = await aload_order_status(order_id)
+    return _snapshot(static, status)
+
+
+async def _alist(qs):
+    return [row async for row in qs]
+
+
+# --- Status cache ---
+#
+# The delivery status and assignment are cached per order for a short time
+# (ORDER_STATUS_TIMEOUT), and refreshed after any change made through the
+# ORM (see signals.py). The version is a hash of the content, so it changes
+# exactly when the status or the assignment does; it doubles as the ETag of
+# the status endpoint.
+
+def _status_key(order_id):
+    return f'order:status:{order_id}'
+
+
+def _status_timeout():
+    return getattr(settings, 'ORDER_STATUS_TIMEOUT', 30)
+
+
+def _status_query(order_id):
+    return Orders.objects.filter(order_id=order_id).values_list('customer_id', *ASSIGNMENT_FIELDS)
+
+
+def _status(row):
+    customer_id, *live = row
+    return {
+        'customer_id': customer_id,
+        'delivery_status': live[0],
+        'assignment': _assignment(live),
+        'version': hashlib.md5(repr(live).encode()).hexdigest()[:16],
+    }
+
+
+def _missing(order_id):
+    forget(order_id)
+    return Orders.DoesNotExist(f"Order {order_id} does not exist.")
+
+
+async def _amissing(order_id):
+    await _cache().adelete_many([_key(order_id), _status_key(order_id)])
+    return Orders.DoesNotExist(f"Order {order_id} does not exist.")
+
+
+def load_order_status(order_id):
+    """Read an order's status from the database into the cache (one query)."""
+    row = _status_query(order_id).first()
+    if row is None:
+        raise _missing(order_id)
+    status = _status(row)
+    _cache().set(_status_key(order_id), status, _status_timeout())
+    return status
+
+
+async def aload_order_status(order_id):
+    row = await _status_query(order_id).afirst()
+    if row is None:
+        raise await _amissing(order_id)
+    status = _status(row)
+    await _cache().aset(_status_key(order_id), status, _status_timeout())
+    return status
+
+
+def get_order_status(order_id):
+    """
+    {'customer_id', 'delivery_status', 'assignment', 'version'} for an order,
+    from the cache when possible; raises Orders.DoesNotExist.
+    """
+    status = _cache().get(_status_key(order_id))
+    return status if status is not None else load_order_status(order_id)
+
+
+async def aget_order_status(order_id):
+    status = await _cache().aget(_status_key(order_id))
+    return status if status is not None else await aload_order_status(order_id)
+
+
+def status_changed(order_id):
+    """
+    Refresh the cached status once the current transaction commits, and
+    publish it to the order's event streams.
+    """
+    def refresh():
+        try:
+            status = load_order_status(order_id)
+        except Orders.DoesNotExist:
+            return
+        events.publish(order_id, status)
+    transaction.on_commit(refresh)
+
+
+def forget(order_id):
+    _cache().delete_many([_key(order_id), _status_key(order_id)])
@@ -0,0 +1,42 @@
+-- Hot-path indexes for the hand-written MySQL schema.
+-- Generated by: python manage.py index_advisor --sql (on MySQL). Safe to re-run.
+
+-- my_orders keyset pages, customer summary
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Orders' AND index_name = 'idx_orders_customer_order') = 0, 'CREATE INDEX `idx_orders_customer_order` ON `Orders` (`Customer_id`, `Order_id` DESC)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- per-restaurant order history and revenue
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Orders' AND index_name = 'idx_orders_restaurant_date') = 0, 'CREATE INDEX `idx_orders_restaurant_date` ON `Orders` (`Restaurant_id`, `Order_Date`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- pending orders for dispatch, admin status filter
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Orders' AND index_name = 'idx_orders_status_order') = 0, 'CREATE INDEX `idx_orders_status_order` ON `Orders` (`Delivery_Status`, `Order_id`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- menu page, checkout price lookup
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Menu_Items' AND index_name = 'idx_menu_items_restaurant') = 0, 'CREATE INDEX `idx_menu_items_restaurant` ON `Menu_Items` (`Restaurant_id`, `Item_id`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- home page listing order
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Restaurants' AND index_name = 'idx_restaurants_name') = 0, 'CREATE INDEX `idx_restaurants_name` ON `Restaurants` (`Name`, `Restaurant_id`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- dispatch fallback seek over drivers
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Employees' AND index_name = 'idx_employees_role') = 0, 'CREATE INDEX `idx_employees_role` ON `Employees` (`Role`, `Employee_id`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- order confirmation items
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Order_Items' AND index_name = 'idx_order_items_order') = 0, 'CREATE INDEX `idx_order_items_order` ON `Order_Items` (`Order_id`, `Item_id`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- checkout get_or_create, cart payment options
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Payment_Methods' AND index_name = 'uq_payment_methods_customer_type') = 0, 'CREATE UNIQUE INDEX `uq_payment_methods_customer_type` ON `Payment_Methods` (`Customer_id`, `Payment_type`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- driver load and last pickup for dispatch
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Order_Assignment' AND index_name = 'idx_order_assignment_employee_time') = 0, 'CREATE INDEX `idx_order_assignment_employee_time` ON `Order_Assignment` (`Employee_id`, `Assignment_Time`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- recent assignments
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Order_Assignment' AND index_name = 'idx_order_assignment_time') = 0, 'CREATE INDEX `idx_order_assignment_time` ON `Order_Assignment` (`Assignment_Time`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
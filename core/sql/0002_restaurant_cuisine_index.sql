@@ -0,0 +1,6 @@
+-- Cuisine filter on the home page listing.
+-- Generated by: python manage.py index_advisor --sql (on MySQL). Safe to re-run.
+
+-- home page listing filtered by cuisine
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Restaurants' AND index_name = 'idx_restaurants_cuisine_name') = 0, 'CREATE INDEX `idx_restaurants_cuisine_name` ON `Restaurants` (`Cuisine`, `Name`, `Restaurant_id`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
@@ -0,0 +1,18 @@
+-- Prefix and exact-match search in the admin changelists.
+-- Generated by: python manage.py index_advisor --sql (on MySQL). Safe to re-run.
+
+-- admin customer and order search (name prefix)
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Customers' AND index_name = 'idx_customers_last_name') = 0, 'CREATE INDEX `idx_customers_last_name` ON `Customers` (`Last_name`, `First_name`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- admin customer search (name prefix)
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Customers' AND index_name = 'idx_customers_first_name') = 0, 'CREATE INDEX `idx_customers_first_name` ON `Customers` (`First_name`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- admin employee and assignment search (name prefix)
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Employees' AND index_name = 'idx_employees_name') = 0, 'CREATE INDEX `idx_employees_name` ON `Employees` (`Employee_name`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- admin address search
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = 'Address' AND index_name = 'idx_address_zipcode') = 0, 'CREATE INDEX `idx_address_zipcode` ON `Address` (`Zipcode`)', 'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
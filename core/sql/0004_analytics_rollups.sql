@@ -0,0 +1,36 @@
+-- Hourly and daily analytics rollups (core/analytics.py).
+-- Fill them with: python manage.py rebuild_rollups. Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS `Restaurant_Rollups` (
+    `Rollup_id` BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `Restaurant_id` INT NOT NULL,
+    `Grain` VARCHAR(4) NOT NULL,
+    `Period_start` DATETIME(6) NOT NULL,
+    `Orders` INT NOT NULL DEFAULT 0,
+    `Items` INT NOT NULL DEFAULT 0,
+    `Revenue` DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    UNIQUE KEY `uq_restaurant_rollups` (`Restaurant_id`, `Grain`, `Period_start`),
+    KEY `idx_restaurant_rollups_period` (`Grain`, `Period_start`)
+);
+
+CREATE TABLE IF NOT EXISTS `Menu_Item_Rollups` (
+    `Rollup_id` BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `Item_id` INT NOT NULL,
+    `Restaurant_id` INT NOT NULL,
+    `Grain` VARCHAR(4) NOT NULL,
+    `Period_start` DATETIME(6) NOT NULL,
+    `Quantity` INT NOT NULL DEFAULT 0,
+    `Revenue` DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    UNIQUE KEY `uq_menu_item_rollups` (`Item_id`, `Grain`, `Period_start`),
+    KEY `idx_item_rollups_restaurant` (`Restaurant_id`, `Grain`, `Period_start`)
+);
+
+CREATE TABLE IF NOT EXISTS `Payment_Type_Rollups` (
+    `Rollup_id` BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `Payment_type` VARCHAR(20) NOT NULL,
+    `Grain` VARCHAR(4) NOT NULL,
+    `Period_start` DATETIME(6) NOT NULL,
+    `Orders` INT NOT NULL DEFAULT 0,
+    `Revenue` DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    UNIQUE KEY `uq_payment_type_rollups` (`Payment_type`, `Grain`, `Period_start`)
+);
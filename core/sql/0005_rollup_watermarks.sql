@@ -0,0 +1,6 @@
+-- Where 'manage.py tail_rollups' has got to (core/analytics.py). Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS `Rollup_Watermarks` (
+    `Name` VARCHAR(40) NOT NULL PRIMARY KEY,
+    `Last_order_id` INT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,121 @@
+"""
+Per-customer order summary: order count, lifetime spend and last order time.
+
+The summary is denormalised into three cache counters per customer, bumped
+by place_order after each order commits. Count and spend (in paise) use the
+cache's atomic incr, so concurrent checkouts do not lose updates. When the
+counters are missing (cold cache, eviction, new worker), they are rebuilt
+with a single aggregate() over the customer's orders.
+
+An order can commit while that aggregate runs. So record_order also bumps a
+per-customer version key, and the rebuild only add()s the counters (never
+overwriting ones a checkout has bumped), then drops them again if the
+version moved in the meantime: the next read rebuilds them.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import Orders
+
+FIELDS = ('count', 'spend', 'last')
+
+
+def _cache():
+    return caches[getattr(settings, 'CUSTOMER_SUMMARY_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'CUSTOMER_SUMMARY_TIMEOUT', 60 * 60 * 6)
+
+
+def _keys(customer_id):
+    return {field: f'customer:{customer_id}:summary:{field}' for field in FIELDS}
+
+
+def _version_key(customer_id):
+    return f'customer:{customer_id}:summary:version'
+
+
+def _version(cache, key):
+    """The version in `key`, initialising it if missing."""
+    version = cache.get(key)
+    if version is None:
+        # Time-based, so an evicted key never comes back at an old value
+        cache.add(key, time.time_ns(), _timeout())
+        version = cache.get(key)
+    return version
+
+
+def _to_paise(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def _summary(count, paise, last_ts):
+    return {
+        'order_count': count,
+        'total_spend': Decimal(paise) / 100,
+        'last_order_at': (
+            datetime.fromtimestamp(last_ts, tz=dt_timezone.utc) if last_ts else None
+        ),
+    }
+
+
+def compute_customer_summary(customer_id):
+    """The fallback: one aggregate over the customer's orders."""
+    totals = Orders.objects.filter(customer_id=customer_id).aggregate(
+        count=Count('order_id'), spend=Sum('total_price'), last=Max('order_date'),
+    )
+    return totals['count'], _to_paise(totals['spend'] or 0), (
+        totals['last'].timestamp() if totals['last'] else None
+    )
+
+
+def get_customer_summary(customer_id):
+    """
+    Return {'order_count', 'total_spend', 'last_order_at'} for a customer.
+    No query when the counters are cached, one aggregate otherwise.
+    """
+    keys = _keys(customer_id)
+    cache = _cache()
+    cached = cache.get_many(keys.values())
+    if len(cached) == len(keys):
+        return _summary(*(cached[keys[field]] for field in FIELDS))
+
+    version_key = _version_key(customer_id)
+    version = _version(cache, version_key)
+    values = compute_customer_summary(customer_id)
+    for field, value in zip(FIELDS, values):
+        cache.add(keys[field], value, _timeout())
+    if cache.get(version_key) != version:
+        forget(customer_id)  # an order was recorded mid-rebuild
+    return _summary(*values)
+
+
+def record_order(customer_id, total, order_date=None):
+    """
+    Count a newly committed order. If the counters are not cached there is
+    nothing to bump: the next read rebuilds them from the database.
+    """
+    keys = _keys(customer_id)
+    cache = _cache()
+    try:
+        cache.incr(_version_key(customer_id))
+    except ValueError:
+        cache.set(_version_key(customer_id), time.time_ns(), _timeout())
+    try:
+        cache.incr(keys['count'])
+        cache.incr(keys['spend'], _to_paise(total))
+    except ValueError:
+        forget(customer_id)
+        return
+    cache.set(keys['last'], (order_date or timezone.now()).timestamp(), _timeout())
+
+
+def forget(customer_id):
+    _cache().delete_many(_keys(customer_id).values())
@@ -0,0 +1,22 @@
+from django.apps import apps
+from django.test.runner import DiscoverRunner
+
+
+class UnmanagedModelTestRunner(DiscoverRunner):
+    """
+    The core tables are created by hand in MySQL, so every model there is
+    managed = False and the test database would be empty. Flip them to
+    managed while the test databases are built so Django creates the tables.
+    """
+
+    def setup_databases(self, **kwargs):
+        unmanaged_models = [
+            m for m in apps.get_models() if not m._meta.managed
+        ]
+        for model in unmanaged_models:
+            model._meta.managed = True
+        try:
+            return super().setup_databases(**kwargs)
+        finally:
+            for model in unmanaged_models:
+                model._meta.managed = False
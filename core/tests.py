@@ -1,3 +1,1411 @@
-from django.test import TestCase
+# pylint: disable=protected-access,too-many-lines
+import asyncio
+import base64
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from importlib.util import find_spec
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.core.paginator import EmptyPage
+from django.db import DatabaseError, connection, transaction
+from django.http import HttpResponse
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from . import (
+    analytics, async_views, catalog, dispatch, events, exports, imports, indexes, perf, search,
+    snapshots, summaries, urls, views,
+)
+from .admin import EstimatedCountPaginator
+from .management.commands import seed_data
+from . import cart as cart_module
+from .cart import SESSION_KEY, Cart, CartMiddleware, get_cart
+from .routers import ReadReplicaRouter, replica_reads
+from .models import (
+    Address, Customers, Employees, MenuItems, OrderAssignment, OrderItems, Orders,
+    PaymentMethods, PaymentTypeRollup, Profile, Restaurants, Vehicles,
+)
+
+# core.urls with the async read views swapped in, for AsyncReadViewTests
+urlpatterns = [
+    path(str(p.pattern), getattr(async_views, p.callback.__name__, p.callback), name=p.name)
+    for p in urls.urlpatterns
+]
+
+
+class CatalogFixtureMixin:
+    """A restaurant with 15 menu items, two drivers and a logged-in customer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        address = Address.objects.create(
+            address_line_1='1 MG Road', state='KA', country='India', zipcode='560001')
+        cls.restaurant = Restaurants.objects.create(
+            name='Dosa Corner', address=address, cuisine='South Indian')
+        cls.items = [
+            MenuItems.objects.create(
+                restaurant=cls.restaurant, item_name=f'Dosa {i}', price=Decimal('80.00') + i)
+            for i in range(15)
+        ]
+        Employees.objects.create(employee_id=1, employee_name='Ravi', phone='900000001')
+        Employees.objects.create(employee_id=2, employee_name='Meena', phone='900000002')
+        Vehicles.objects.create(registration_number='KA01AB1234', type='Bike')
+
+        cls.customer = Customers.objects.create(first_name='Asha', last_name='Rao', phone='98450')
+        cls.user = User.objects.create_user('asha', password='pass12345')
+        Profile.objects.create(user=cls.user, customer_profile=cls.customer)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fill_cart(self, items, quantity=2):
+        cart = Cart()
+        for item in items:
+            cart.add(item.item_id, item.restaurant_id, item.price, quantity)
+        session = self.client.session
+        session[SESSION_KEY] = cart.to_dict()
+        session.save()
+
+
+class PlaceOrderTests(CatalogFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch('core.views.connection')  # AssignOrderDriver only exists in MySQL
+        self.db_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+        # A cold index: dispatch costs exactly one fallback query.
+        patcher = mock.patch.object(dispatch, 'driver_index', dispatch.DriverIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        catalog.bust_all()  # cold price cache: ids are reused between tests
+
+    def test_order_items_are_written_in_one_batch(self):
+        self.fill_cart(self.items)
+
+        response = self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+
+        order = Orders.objects.get()
+        self.assertRedirects(response, reverse('order_confirmation', args=[order.order_id]),
+                             fetch_redirect_response=False)
+        self.assertEqual(OrderItems.objects.filter(order=order).count(), 15)
+        self.assertEqual(order.total_price, sum(item.price * 2 for item in self.items))
+        cursor = self.db_connection.cursor.return_value.__enter__.return_value
+        cursor.callproc.assert_called_once_with(
+            'AssignOrderDriver', [order.order_id, 1])
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        # session, user, cart prices, profile, payment method, spend update,
+        # order insert, bulk item insert, zipcode, dispatch fallback,
+        # session update -- plus the savepoints the test transaction adds
+        # around the view and the session save. Creating the payment method
+        # on first use costs a savepoint, an insert and a release on top.
+        self.fill_cart(self.items)
+        with self.assertNumQueries(18):
+            self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+
+        catalog.bust_all()
+        self.fill_cart(self.items[:1])
+        with self.assertNumQueries(15):
+            self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+
+    def test_spend_is_incremented_in_the_database(self):
+        PaymentMethods.objects.create(
+            customer=self.customer, payment_type='Cash', total_spend=Decimal('10.00'))
+        self.fill_cart(self.items[:1])
+
+        self.client.post(reverse('place_order'), {'payment_type': 'Cash'})
+
+        payment = PaymentMethods.objects.get(customer=self.customer, payment_type='Cash')
+        self.assertEqual(payment.total_spend, Decimal('10.00') + self.items[0].price * 2)
+
+    def test_prices_come_from_the_menu_not_the_session(self):
+        self.fill_cart(self.items[:1])
+        rid, item_id = self.restaurant.restaurant_id, self.items[0].pk
+        catalog.get_item_prices(rid, [item_id])
+        with self.assertNumQueries(0):
+            self.assertEqual(catalog.get_item_prices(rid, [item_id]),
+                             {item_id: self.items[0].price})
+        item = MenuItems.objects.get(pk=self.items[0].pk)
+        item.price = Decimal('99.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()  # bumps the menu version, so the cached price is dropped
+
+        response = self.client.post(reverse('place_order'), {'payment_type': 'UPI'}, follow=True)
+
+        # Not charged: back to the cart, with the new total shown
+        self.assertFalse(Orders.objects.exists())
+        self.assertRedirects(response, reverse('view_cart'))
+        notices = [str(m) for m in response.context['messages']]
+        self.assertIn('now ₹198.00 (was ₹160.00)', notices[0])
+
+        self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+
+        self.assertEqual(Orders.objects.get().total_price, Decimal('198.00'))
+
+    def test_checkout_adds_the_order_to_the_rollups(self):
+        self.fill_cart(self.items[:2])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+
+        order = Orders.objects.get()
+        self.assertEqual(analytics.revenue(self.restaurant.restaurant_id),
+                         {'orders': 1, 'items': 4, 'revenue': order.total_price})
+        self.assertEqual(analytics.top_items()[0]['quantity'], 2)
+        self.assertFalse(PaymentTypeRollup.objects.exists())  # left to tail_rollups
+        self.assertEqual(analytics.tail_payment_types(lag=timedelta(0)), 1)
+        self.assertEqual(analytics.payment_mix()[0]['payment_type'], 'UPI')
+
+    def test_price_written_outside_the_orm_does_not_block_checkout(self):
+        self.client.get(reverse('add_to_cart', args=[self.items[0].pk]))
+        MenuItems.objects.filter(pk=self.items[0].pk).update(price=Decimal('99.00'))  # no signal
+
+        # Until the price cache expires, cart and checkout agree on the old price
+        cart_page = self.client.get(reverse('view_cart'))
+        self.assertEqual(cart_page.context['total_price'], Decimal('80.00'))
+        self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+        self.assertEqual(Orders.objects.get().total_price, Decimal('80.00'))
+
+        # Once it expires, checkout stops once, and the cart then shows what it will charge
+        self.client.get(reverse('add_to_cart', args=[self.items[0].pk]))
+        caches['default'].clear()
+        self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+        self.assertEqual(Orders.objects.count(), 1)
+        response = self.client.get(reverse('view_cart'))
+        self.assertEqual(response.context['total_price'], Decimal('99.00'))
+        drift = [str(m) for m in response.context['messages'] if 'changed' in str(m)]
+        self.assertEqual(len(drift), 1)  # checkout's; the cart page agrees and adds none
+        self.assertIn('now ₹99.00 (was ₹80.00)', drift[0])
+        self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+        self.assertEqual(Orders.objects.latest('order_id').total_price, Decimal('99.00'))
+
+    def test_items_taken_off_the_menu_are_dropped_from_the_cart(self):
+        self.fill_cart(self.items[:2], quantity=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[1].delete()
+
+        response = self.client.post(reverse('place_order'), {'payment_type': 'UPI'}, follow=True)
+        self.assertRedirects(response, reverse('view_cart'))
+        self.assertFalse(Orders.objects.exists())
+        self.assertEqual([str(m) for m in response.context['messages']],
+                         ['Some items in your cart are no longer available and were removed.'])
+        self.assertEqual([line['id'] for line in response.context['cart_items']],
+                         [self.items[0].item_id])
+        self.assertEqual(response.context['total_price'], Decimal('80.00'))
+
+        self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+        order = Orders.objects.get()
+        self.assertEqual(order.total_price, Decimal('80.00'))
+        self.assertEqual(
+            list(OrderItems.objects.filter(order=order).values_list('item_id', flat=True)),
+            [self.items[0].item_id])
+
+    def test_cart_page_drops_items_taken_off_the_menu(self):
+        self.fill_cart(self.items[:2], quantity=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[0].delete()
+
+        response = self.client.get(reverse('view_cart'))
+        self.assertEqual(response.context['total_price'], Decimal('81.00'))
+        self.assertEqual(len([str(m) for m in response.context['messages']]), 1)
+        self.assertEqual(self.client.session[SESSION_KEY]['items'], {str(self.items[1].item_id): 1})
+
+    @override_settings(DISPATCH_MODE='batch')
+    def test_batch_mode_leaves_dispatch_to_the_scheduler(self):
+        self.fill_cart(self.items[:1])
+
+        self.client.post(reverse('place_order'), {'payment_type': 'UPI'})
+
+        self.assertEqual(Orders.objects.get().delivery_status, 'Pending')
+        self.db_connection.cursor.assert_not_called()
+
+
+class BatchDispatchTests(CatalogFixtureMixin, TestCase):
+
+    def test_planner_weighs_load_against_distance(self):
+        drivers = {1: (0, '560001', 10), 2: (0, None, None), 3: (3, '560001', 11)}
+        planner = dispatch.BatchPlanner(drivers, {10: 1, 11: 1, 12: 0})
+        plan = planner.plan([(100, '560001'), (101, '560001'), (102, '400001')])
+        # Driver 1 is on the spot and takes two orders; the far one goes to
+        # idle driver 2, in the least-used vehicle.
+        self.assertEqual(plan, [(100, 1, 10), (101, 1, 10), (102, 2, 12)])
+
+    def test_pending_orders_are_assigned_in_one_transaction(self):
+        payment = PaymentMethods.objects.create(customer=self.customer, payment_type='UPI')
+        orders = [
+            Orders.objects.create(customer=self.customer, restaurant=self.restaurant,
+                                  payment=payment, total_price=Decimal('80.00'))
+            for _ in range(3)
+        ]
+        for order in orders:
+            snapshots.forget(order.order_id)  # ids are reused between tests
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # savepoint, pending orders, drivers, vehicles, one insert, release
+            with self.assertNumQueries(6):
+                self.assertEqual(dispatch.dispatch_pending(), 3)
+
+        self.assertEqual(OrderAssignment.objects.filter(order__in=orders).count(), 3)
+        with self.assertNumQueries(0):
+            status = snapshots.get_order_status(orders[0].order_id)
+        self.assertIsNotNone(status['assignment'])
+        self.assertEqual(dispatch.dispatch_pending(), 0)
+
+
+class DriverIndexTests(CatalogFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = dispatch.DriverIndex()
+
+    def test_picks_the_least_loaded_driver(self):
+        self.index.warm()
+        self.assertEqual([self.index.pick_and_record() for _ in range(3)], [1, 2, 1])
+        self.assertEqual(self.index._loads, {1: 2, 2: 1})
+        self.index.release(1)
+        self.index.release(1)
+        self.index.release(1)  # never below zero
+        self.assertEqual(self.index._loads, {1: 0, 2: 1})
+        self.assertEqual(self.index.pick(), 1)
+
+    def test_prefers_a_driver_nearby_within_the_slack(self):
+        self.index.warm()
+        self.index.record(2, '560001')
+        self.assertEqual(self.index.pick('560001'), 2)
+        self.assertEqual(self.index.pick('400001'), 1)
+        self.index.record(2, '560001')
+        self.assertEqual(self.index.pick('560001'), 1)  # two busier than driver 1
+
+    def test_stale_heap_entries_are_skipped_lazily(self):
+        self.index.warm()
+        self.index.record(1)
+        self.assertEqual(len(self.index._global), 3)  # (0, 1) is still there
+        self.assertEqual(self.index.pick(), 2)
+        self.assertEqual(self.index._global[0], (0, 2))  # and was dropped by the pick
+
+    def test_empty_index_picks_nobody(self):
+        self.assertIsNone(self.index.pick())
+        self.assertIsNone(self.index.pick_and_record('560001'))
+
+    def test_concurrent_picks_spread_the_load(self):
+        self.index.warm()
+
+        def checkouts():
+            for _ in range(50):
+                self.index.pick_and_record()
+
+        threads = [threading.Thread(target=checkouts) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.index._loads, {1: 100, 2: 100})
+
+    def test_cold_index_falls_back_to_round_robin_and_warms_after_commit(self):
+        with mock.patch.object(dispatch, 'driver_index', self.index):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.assertEqual([dispatch.pick_driver() for _ in range(3)], [1, 2, 1])
+            self.assertEqual(len(callbacks), 1)
+            self.assertTrue(self.index.is_warm())
+            self.assertEqual(dispatch.pick_driver(), 1)
+            self.assertEqual(self.index._loads, {1: 1, 2: 0})
+
+    def test_a_warm_dropped_by_a_rollback_is_requested_again(self):
+        with mock.patch.object(dispatch.time, 'monotonic', return_value=100.0) as clock:
+            with self.captureOnCommitCallbacks() as callbacks:
+                with self.assertRaises(DatabaseError), transaction.atomic():
+                    self.index.request_warm()
+                    raise DatabaseError('checkout failed')
+                self.index.request_warm()  # still pending
+                clock.return_value += dispatch.WARM_PENDING_TIMEOUT
+                self.index.request_warm()
+            self.assertEqual(len(callbacks), 1)
+
+            callbacks[0]()
+            self.assertTrue(self.index.is_warm())
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.index.request_warm()  # the warm cleared the mark
+            self.assertEqual(len(callbacks), 1)
+
+
+class CartCountTests(CatalogFixtureMixin, TestCase):
+
+    def test_count_follows_add_update_and_remove(self):
+        first, second = self.items[:2]
+        self.client.post(reverse('add_to_cart', args=[first.item_id]))
+        self.client.post(reverse('add_to_cart', args=[second.item_id]))
+        self.client.get(reverse('update_quantity', args=[first.item_id, 'increase']))
+        self.client.get(reverse('remove_from_cart', args=[second.item_id]))
+
+        cart = self.client.session[SESSION_KEY]
+        self.assertEqual(cart['items'], {str(first.item_id): 2})
+        self.assertEqual(cart['count'], 2)
+        self.assertEqual(Decimal(cart['total']), first.price * 2)
+
+    def test_badge_shows_count_without_walking_items(self):
+        self.fill_cart(self.items[:3], quantity=2)
+
+        response = self.client.get(reverse('my_orders'))
+
+        self.assertContains(response, '<span class="cart-count">6</span>', html=True)
+
+
+class OrderHistoryTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+        cls.orders = Orders.objects.bulk_create([
+            Orders(customer=cls.customer, restaurant=cls.restaurant, payment=payment,
+                   total_price=Decimal('80.00') + i)
+            for i in range(views.ORDERS_PAGE_SIZE * 2 + 5)
+        ])
+        # Every order at the same moment: the order_id cursor must still split them cleanly
+        Orders.objects.update(order_date=datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc))
+        other = Customers.objects.create(first_name='Ravi', last_name='K', phone='98451')
+        Orders.objects.create(customer=other, restaurant=cls.restaurant, payment=payment,
+                              total_price=Decimal('1.00'))
+
+    def feed(self, **params):
+        return self.client.get(reverse('my_orders_feed'), params).json()
+
+    def test_pages_follow_on_without_gaps_or_repeats(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = self.feed(**({'before': cursor} if cursor else {}))
+            seen += [order['order_id'] for order in page['orders']]
+            pages += 1
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted((o.order_id for o in self.orders), reverse=True))
+
+    def test_feed_shape(self):
+        newest = self.orders[-1]
+        page = self.feed()
+        self.assertEqual(len(page['orders']), views.ORDERS_PAGE_SIZE)
+        self.assertEqual(page['orders'][0], {
+            'order_id': newest.order_id,
+            'restaurant': 'Dosa Corner',
+            'total_price': str(newest.total_price),
+            'delivery_status': 'Pending',
+            'order_date': '2026-03-01T12:00:00+00:00',
+            'url': reverse('order_confirmation', args=[newest.order_id]),
+        })
+        self.assertEqual(page['next_cursor'], page['orders'][-1]['order_id'])
+
+    def test_tampered_cursor_starts_from_the_newest(self):
+        first = self.feed()
+        for cursor in ('abc', '-5', '1.5', "1 OR 1=1", '0', '\u00b2', '2147483648', '9' * 30):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.feed(before=cursor), first)
+        self.assertEqual(self.feed(before='1'), {'orders': [], 'next_cursor': None})
+
+    def test_html_page_links_to_the_next_one(self):
+        response = self.client.get(reverse('my_orders'))
+        next_cursor = response.context['next_cursor']
+        self.assertContains(response, f'?before={next_cursor}')
+        response = self.client.get(reverse('my_orders'), {'before': next_cursor})
+        self.assertFalse(response.context['is_first_page'])
+        self.assertEqual(response.context['orders'][0].order_id, next_cursor - 1)
+
+
+class CartBackendTests(CatalogFixtureMixin, TestCase):
+
+    def use(self, backend):
+        patcher = mock.patch.object(cart_module, '_backend', backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add(self, item, times=1):
+        for _ in range(times):
+            self.client.post(reverse('add_to_cart', args=[item.item_id]))
+
+    def cart_page(self):
+        response = self.client.get(reverse('view_cart'))
+        quantities = [line['quantity'] for line in response.context['cart_items']]
+        return response.context['total_price'], quantities
+
+    def test_session_backend_round_trip(self):
+        self.use(cart_module.SessionCartBackend())
+        self.add(self.items[0], 2)
+        self.assertEqual(self.client.session[SESSION_KEY]['items'], {str(self.items[0].item_id): 2})
+        self.assertEqual(self.cart_page(), (self.items[0].price * 2, [2]))
+
+    def test_cache_backend_round_trip(self):
+        self.use(cart_module.CacheCartBackend())
+        caches['default'].delete(f'cart:user:{self.user.pk}')
+        self.add(self.items[0], 2)
+        self.assertNotIn(SESSION_KEY, self.client.session)
+        self.assertEqual(caches['default'].get(f'cart:user:{self.user.pk}')['count'], 2)
+        self.assertEqual(self.cart_page(), (self.items[0].price * 2, [2]))
+
+        self.client.get(reverse('remove_from_cart', args=[self.items[0].item_id]))
+        self.assertIsNone(caches['default'].get(f'cart:user:{self.user.pk}'))
+
+    def test_signed_cookie_backend_round_trip(self):
+        self.use(cart_module.SignedCookieCartBackend())
+        self.add(self.items[0], 2)
+        self.assertNotIn(SESSION_KEY, self.client.session)
+        self.assertIn(cart_module.COOKIE_NAME, self.client.cookies)
+        self.assertEqual(self.cart_page(), (self.items[0].price * 2, [2]))
+
+    def test_tampered_signed_cookie_is_an_empty_cart(self):
+        self.use(cart_module.SignedCookieCartBackend())
+        self.add(self.items[0])
+        value = self.client.cookies[cart_module.COOKIE_NAME].value
+        self.client.cookies[cart_module.COOKIE_NAME] = value.replace('"count":1', '"count":9')
+        self.assertEqual(self.cart_page(), (Decimal('0'), []))
+
+        self.client.cookies[cart_module.COOKIE_NAME] = 'not-signed-at-all'
+        self.assertEqual(self.cart_page(), (Decimal('0'), []))
+
+    def test_legacy_session_cart_is_migrated(self):
+        first, second = self.items[:2]
+        session = self.client.session
+        session[SESSION_KEY] = {
+            str(self.restaurant.restaurant_id): {
+                str(first.item_id): {'price': str(first.price), 'quantity': 2},
+                str(second.item_id): {'price': float(second.price), 'quantity': 1},
+            },
+            'stale': {'1': {'price': '1.00', 'quantity': 1}},  # not a restaurant id
+        }
+        session.save()
+
+        self.assertEqual(self.cart_page(), (first.price * 2 + second.price, [2, 1]))
+        # The first change writes the converted cart back
+        self.client.post(reverse('add_to_cart', args=[second.item_id]))
+        self.assertEqual(self.client.session[SESSION_KEY], {
+            'restaurant_id': self.restaurant.restaurant_id,
+            'items': {str(first.item_id): 2, str(second.item_id): 2},
+            'count': 4,
+            'total': str(first.price * 2 + second.price * 2),
+        })
+
+    def test_middleware_writes_only_changed_carts(self):
+        def view(request):
+            if request.GET.get('add'):
+                get_cart(request).add(1, 1, Decimal('10.00'))
+            else:
+                get_cart(request)
+            return HttpResponse()
+
+        backend = mock.Mock(wraps=cart_module.SessionCartBackend())
+        self.use(backend)
+        middleware = CartMiddleware(view)
+        for add, saves in (('', 0), ('1', 1)):
+            request = RequestFactory().get('/', {'add': add})
+            request.session = self.client.session
+            middleware(request)
+            self.assertEqual(backend.save.call_count, saves)
+        self.assertEqual(request.session[SESSION_KEY]['count'], 1)
+
+    def test_middleware_saves_after_async_views(self):
+        async def view(request):
+            get_cart(request).add(1, 1, Decimal('10.00'))
+            return HttpResponse()
+
+        self.use(cart_module.SessionCartBackend())
+        middleware = CartMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = AsyncRequestFactory().get('/')
+        request.session = self.client.session
+        request.session.keys()  # load it here: the async view below cannot query
+        async_to_sync(middleware)(request)
+        self.assertEqual(request.session[SESSION_KEY]['total'], '10.00')
+
+
+@override_settings(PERF_SAMPLE_RATE=1.0)
+class PerfMiddlewareTests(CatalogFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        perf.buffer.clear()
+
+    def test_sync_sample_counts_queries_and_time(self):
+        def view(request):
+            for item in self.items[:2]:
+                MenuItems.objects.get(pk=item.pk)
+            time.sleep(0.02)
+            return HttpResponse()
+
+        perf.PerfMiddleware(view)(RequestFactory().get('/sync/'))
+        sample, = perf.buffer.snapshot()
+        self.assertEqual((sample['view'], sample['status'], sample['queries']), ('/sync/', 200, 2))
+        self.assertGreaterEqual(sample['wall_ms'], 20)
+        self.assertLessEqual(sample['sql_ms'], sample['wall_ms'])
+        self.assertEqual(list(sample['duplicates'].values()), [2])
+
+    def test_async_sample_counts_queries_and_time(self):
+        async def view(request):
+            await Restaurants.objects.acount()
+            await MenuItems.objects.filter(restaurant=self.restaurant).acount()
+            await asyncio.sleep(0.02)
+            return HttpResponse()
+
+        middleware = perf.PerfMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(AsyncRequestFactory().get('/async/'))
+        sample, = perf.buffer.snapshot()
+        self.assertEqual((sample['view'], sample['queries']), ('/async/', 2))
+        self.assertGreaterEqual(sample['wall_ms'], 20)
+
+    def test_samples_match_the_queries_a_page_runs(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('home'))
+        sample, = perf.buffer.snapshot()
+        self.assertEqual(sample['view'], 'home')
+        self.assertEqual(sample['queries'], len(queries))
+        self.assertGreater(sample['template_ms'], 0)
+
+
+class SeedDataTests(TestCase):
+
+    def test_menu_is_generated_and_inserted_a_batch_at_a_time(self):
+        bulk_create = MenuItems.objects.bulk_create
+        with mock.patch.object(MenuItems.objects, 'bulk_create',
+                               side_effect=bulk_create) as inserts:
+            call_command('seed_data', restaurants=2, items=7, customers=3, orders=4, drivers=1,
+                         vehicles=1, users=1, batch_size=3, stdout=StringIO())
+        self.assertEqual([len(call.args[0]) for call in inserts.call_args_list], [3, 3, 1])
+        self.assertEqual(MenuItems.objects.count(), 7)
+        self.assertEqual(Orders.objects.count(), 4)
+
+    def test_create_schema_adds_every_missing_core_table(self):
+        missing = {Profile._meta.db_table, Orders._meta.db_table}
+        tables = [t for t in connection.introspection.table_names() if t not in missing]
+        editor = mock.MagicMock()
+        with mock.patch.object(connection.introspection, 'table_names', return_value=tables), \
+                mock.patch.object(connection, 'schema_editor', return_value=editor):
+            seed_data.Command(stdout=StringIO()).create_schema()
+        created = editor.__enter__.return_value.create_model.call_args_list
+        self.assertEqual({call.args[0] for call in created}, {Profile, Orders})
+
+
+class ReadReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+
+    def read_alias(self):
+        return self.router.db_for_read(Restaurants)
+
+    @override_settings(DATABASES=dict(settings.DATABASES, replica=settings.DATABASES['default']))
+    def test_reads_use_the_replica_only_inside_marked_views(self):
+        self.assertIsNone(self.read_alias())
+        self.assertEqual(replica_reads(self.read_alias)(), 'replica')
+        self.assertIsNone(self.read_alias())
+        self.assertEqual(self.router.db_for_write(Restaurants), 'default')
+
+    @override_settings(DATABASES=dict(settings.DATABASES, replica=settings.DATABASES['default']))
+    def test_catalog_cache_misses_are_filled_from_the_primary(self):
+        def aliases():
+            return (catalog._page_query(None, None, 5).db, catalog._cuisines_query().db,
+                    Restaurants.objects.all().db)
+
+        self.assertEqual(replica_reads(aliases)(), ('default', 'default', 'replica'))
+
+    def test_without_a_replica_reads_stay_on_default(self):
+        self.assertNotIn('replica', settings.DATABASES)
+        self.assertIsNone(replica_reads(self.read_alias)())
+
+
+class IndexAdvisorTests(SimpleTestCase):
+
+    def test_leading_columns_decide_coverage(self):
+        spec = indexes.RECOMMENDED_INDEXES[0]  # Orders (Customer_id, Order_id DESC)
+        self.assertEqual(
+            indexes.covering_index(spec, {'wide': ['customer_id', 'order_id', 'order_date']}),
+            'wide',
+        )
+        self.assertIsNone(indexes.covering_index(spec, {'other': ['order_id', 'customer_id']}))
+
+    def test_ddl_is_idempotent_on_both_backends(self):
+        spec = indexes.RECOMMENDED_INDEXES[0]
+        self.assertIn('IF NOT EXISTS', indexes.create_sql(spec, 'sqlite'))
+        mysql = indexes.create_sql(spec, 'mysql')
+        self.assertIn('information_schema.statistics', mysql)
+        self.assertIn('`Order_id` DESC', mysql)
+
+
+class SearchIndexTests(CatalogFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(search, 'index', search.SearchIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        search.index.build()
+
+    def names(self, query):
+        return [r['name'] for r in search.index.search(query, limit=3)]
+
+    def test_prefix_and_typo_matches(self):
+        self.assertEqual(self.names('dosa cor'), ['Dosa Corner'])
+        self.assertEqual(self.names('south ind'), ['Dosa Corner'])
+        self.assertEqual(self.names('dosaa 1')[0], 'Dosa 1')
+        self.assertEqual(self.names('pizza'), [])
+
+    def test_catalog_edits_update_a_built_index(self):
+        search.index.build()
+        item = self.items[0]
+        item.item_name = 'Masala Uttapam'
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+            self.assertEqual(self.names('uttap'), [])  # not before the commit
+        self.assertEqual(self.names('uttap'), ['Masala Uttapam'])
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertEqual(self.names('uttapam'), [])
+
+    def test_first_search_builds_in_the_background(self):
+        search.index.invalidate()
+        with mock.patch.object(search.threading, 'Thread') as thread:
+            self.assertEqual(self.names('dosa'), [])
+            self.assertEqual(self.names('dosa'), [])
+        self.assertFalse(search.index.is_ready())
+        thread.assert_called_once()
+        run = thread.call_args.kwargs['target']
+        with mock.patch.object(search, 'connections') as connections:
+            run()
+        connections.close_all.assert_called_once()
+        self.assertTrue(search.index.is_ready())
+        self.assertEqual(self.names('dosa cor'), ['Dosa Corner'])
+
+    def test_typeahead_endpoint(self):
+        response = self.client.get(reverse('search'), {'q': 'corner'})
+        self.assertTrue(response.json()['ready'])
+        result = response.json()['results'][0]
+        self.assertEqual(result['type'], 'restaurant')
+        self.assertEqual(result['url'], reverse('menu', args=[self.restaurant.restaurant_id]))
+
+
+class RestaurantListingTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        address = Address.objects.get()
+        for i in range(30):
+            Restaurants.objects.create(
+                name=f'Kitchen {i:02d}', address=address,
+                cuisine='Italian' if i % 3 == 0 else 'Chinese')
+
+    def feed(self, **params):
+        return self.client.get(reverse('restaurant_feed'), params).json()
+
+    def test_cursor_walks_every_restaurant_once(self):
+        first = self.feed()
+        self.assertEqual(len(first['restaurants']), catalog.RESTAURANT_PAGE_SIZE)
+        second = self.feed(after=first['next_cursor'])
+        self.assertIsNone(second['next_cursor'])
+        names = [r['name'] for r in first['restaurants'] + second['restaurants']]
+        self.assertEqual(names, sorted(Restaurants.objects.values_list('name', flat=True)))
+
+    def test_tampered_cursor_starts_from_the_first_page(self):
+        first = self.feed()['restaurants']
+        raw = [b'not json', b'"Kitchen"', b'{"a":1,"b":2}', b'[1,2]', b'["x","7"]',
+               b'["x",1e400]', b'["x",2.5]', b'["x",true]', b'["x",0]', b'["x",-3]',
+               b'["x",2147483648]', b'["x",' + b'9' * 5000 + b']']
+        for cursor in ['!!!', 'a'] + [base64.urlsafe_b64encode(r).decode() for r in raw]:
+            with self.subTest(cursor=cursor[:40]):
+                self.assertIsNone(catalog.decode_cursor(cursor))
+                self.assertEqual(self.feed(after=cursor)['restaurants'], first)
+        self.assertEqual(catalog.decode_cursor(catalog.encode_cursor('x', catalog.MAX_ID)),
+                         ('x', catalog.MAX_ID))
+
+    def test_cuisine_filter_is_applied_in_sql(self):
+        page = self.feed(cuisine='Italian')
+        self.assertEqual({r['cuisine'] for r in page['restaurants']}, {'Italian'})
+        self.assertEqual(len(page['restaurants']), 10)
+
+    def test_cached_page_costs_no_catalog_queries(self):
+        self.client.get(reverse('home'))
+        # session, user and the profile base.html reads; nothing for the cards
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Dosa Corner')
+        self.assertContains(response, 'Load more')
+
+    def test_new_restaurant_invalidates_the_cached_pages(self):
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Restaurants.objects.create(
+                name='Aaa Bistro', address=Address.objects.get(), cuisine='Thai')
+            # Until the commit the cached pages stay current
+            self.assertNotContains(self.client.get(reverse('home')), 'Aaa Bistro')
+        self.assertContains(self.client.get(reverse('home')), 'Aaa Bistro')
+
+
+class CatalogCacheCommandTests(CatalogFixtureMixin, TestCase):
+
+    def test_commands_refuse_a_process_local_cache(self):
+        for command in ('warm_caches', 'bust_catalog_cache'):
+            with self.subTest(command=command), \
+                    self.assertRaisesMessage(CommandError, 'local to each process'):
+                call_command(command, stdout=StringIO())
+
+    def test_commands_run_against_a_shared_cache(self):
+        with TemporaryDirectory() as directory, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+        }}):
+            call_command('warm_caches', stdout=StringIO())
+            with self.assertNumQueries(0):
+                catalog.get_restaurant_page()
+            call_command('bust_catalog_cache', stdout=StringIO())
+            with self.assertNumQueries(1):
+                catalog.get_restaurant_page()
+
+
+@override_settings(ROOT_URLCONF='core.tests')
+class AsyncReadViewTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+        cls.order = Orders.objects.create(
+            customer=cls.customer, restaurant=cls.restaurant, payment=payment,
+            total_price=Decimal('160.00'))
+        OrderItems.objects.create(order=cls.order, item=cls.items[0], quantity=2)
+        OrderAssignment.objects.create(order=cls.order, employee_id=2,
+                                       vehicle=Vehicles.objects.get())
+
+    def setUp(self):
+        super().setUp()
+        snapshots.forget(self.order.order_id)  # ids are reused between tests
+
+    async def test_read_pages_render(self):
+        await self.async_client.aforce_login(self.user)
+        for url in (reverse('home'), reverse('menu', args=[self.restaurant.restaurant_id]),
+                    reverse('my_orders'),
+                    reverse('order_confirmation', args=[self.order.order_id])):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+        self.assertContains(response, 'Meena')
+        self.assertContains(response, 'Dosa 0')
+
+    async def test_status_poll(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('order_status', args=[self.order.order_id]))
+        self.assertEqual(response.json()['delivery_status'], 'Pending')
+        self.assertEqual(response.json()['assignment']['employee']['name'], 'Meena')
+
+        other = await User.objects.acreate(username='ravi')
+        await self.async_client.aforce_login(other)
+        response = await self.async_client.get(reverse('order_status', args=[self.order.order_id]))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(
+            reverse('order_confirmation', args=[self.order.order_id]))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+
+class OrderConfirmationTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+        cls.order = Orders.objects.create(
+            customer=cls.customer, restaurant=cls.restaurant, payment=payment,
+            total_price=Decimal('160.00'))
+        OrderItems.objects.create(order=cls.order, item=cls.items[0], quantity=2)
+        cls.other = User.objects.create_user('ravi', password='pass12345')
+        Profile.objects.create(user=cls.other, customer_profile=Customers.objects.create(
+            first_name='Ravi', last_name='Kumar', phone='98451'))
+
+    def setUp(self):
+        super().setUp()
+        snapshots.forget(self.order.order_id)  # ids are reused between tests
+        self.url = reverse('order_confirmation', args=[self.order.order_id])
+
+    def test_refresh_is_served_from_the_snapshot(self):
+        self.assertContains(self.client.get(self.url), 'Dosa 0')
+        # session, user, and the profile the navigation bar reads; the order,
+        # its items and the customer id come from the cache and the session
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Dosa 0')
+
+    def test_other_customers_orders_are_not_found(self):
+        self.client.force_login(self.other)
+        response = self.client.get(self.url, follow=True)
+        self.assertRedirects(response, reverse('home'))
+        self.assertNotContains(response, 'Dosa 0')
+        self.assertIn('Order not found.', [str(m) for m in response.context['messages']])
+
+
+class OrderStatusTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+        cls.order = Orders.objects.create(
+            customer=cls.customer, restaurant=cls.restaurant, payment=payment,
+            total_price=Decimal('160.00'))
+
+    def setUp(self):
+        super().setUp()
+        snapshots.forget(self.order.order_id)  # ids are reused between tests
+        self.url = reverse('order_status', args=[self.order.order_id])
+
+    def test_unchanged_status_is_a_304(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(response.json()['delivery_status'], 'Pending')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(2):  # session and user; status and customer id are cached
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_assignment_and_status_changes_refresh_the_cache(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderAssignment.objects.create(order=self.order, employee_id=1,
+                                           vehicle=Vehicles.objects.get())
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['assignment']['employee']['name'], 'Ravi')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.delivery_status = 'Delivered'
+            self.order.save()
+        with self.assertNumQueries(0):
+            status = snapshots.get_order_status(self.order.order_id)
+        self.assertEqual(status['delivery_status'], 'Delivered')
+        self.assertNotEqual(quote_etag(status['version']), response['ETag'])
+
+
+class OrderEventStreamTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+        cls.order = Orders.objects.create(
+            customer=cls.customer, restaurant=cls.restaurant, payment=payment,
+            total_price=Decimal('160.00'))
+
+    def setUp(self):
+        super().setUp()
+        snapshots.forget(self.order.order_id)  # ids are reused between tests
+
+    def deliver(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.delivery_status = 'Delivered'
+            self.order.save()
+
+    async def test_stream_pushes_changes_until_delivered(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('order_events', args=[self.order.order_id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        self.assertIn(b'"delivery_status":"Pending"', await anext(chunks))
+        self.assertEqual(events.get_hub().subscriber_count(), 1)
+
+        await sync_to_async(self.deliver)()
+        self.assertIn(b'"delivery_status":"Delivered"', await anext(chunks))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(chunks)
+        self.assertEqual(events.get_hub().subscriber_count(), 0)
+
+    def test_wsgi_pages_poll_instead_of_streaming(self):
+        response = self.client.get(reverse('order_confirmation', args=[self.order.order_id]))
+        self.assertContains(response, reverse('order_status', args=[self.order.order_id]))
+        self.assertNotContains(response, 'data-events=')
+
+        response = self.client.get(reverse('order_events', args=[self.order.order_id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+        self.assertEqual(events.get_hub().subscriber_count(), 0)
+
+    async def test_asgi_pages_stream(self):
+        await self.async_client.aforce_login(self.user)
+        order_id = self.order.order_id
+        response = await self.async_client.get(reverse('order_confirmation', args=[order_id]))
+        self.assertContains(response,
+                            'data-events="%s"' % reverse('order_events', args=[order_id]))
+
+    async def test_cache_hub_relays_the_latest_event(self):
+        hub = events.CacheHub()
+        subscription = hub.subscribe(self.order.order_id)
+        self.assertIsNone(await subscription.get(0))
+        hub.publish(self.order.order_id, {'version': 'a'})
+        hub.publish(self.order.order_id, {'version': 'b'})
+        self.assertEqual((await subscription.get(0))['version'], 'b')
+        self.assertIsNone(await subscription.get(0))
+
+
+class AdminChangelistTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin_user = User.objects.create_superuser('admin', password='pass12345')
+        cls.payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def add_assigned_orders(self, count):
+        vehicle = Vehicles.objects.get()
+        for i in range(count):
+            order = Orders.objects.create(
+                customer=self.customer, restaurant=self.restaurant, payment=self.payment,
+                total_price=Decimal('80.00'))
+            OrderAssignment.objects.create(order=order, employee_id=1 + i % 2, vehicle=vehicle)
+
+    def changelist_queries(self, model, count):
+        self.add_assigned_orders(count)
+        url = reverse(f'admin:core_{model}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        for model in ('orders', 'orderassignment', 'paymentmethods'):
+            with self.subTest(model):
+                self.assertEqual(self.changelist_queries(model, 1),
+                                 self.changelist_queries(model, 5))
+
+    def test_search_uses_ids_and_the_search_index(self):
+        self.add_assigned_orders(3)
+        order = Orders.objects.order_by('order_id').last()
+        response = self.client.get(reverse('admin:core_orders_changelist'),
+                                   {'q': str(order.order_id)})
+        self.assertEqual([o.order_id for o in response.context['cl'].result_list], [order.order_id])
+
+        url = reverse('admin:core_menuitems_changelist')
+        search.index.invalidate()
+        with mock.patch.object(search.threading, 'Thread'):  # still building: names by prefix
+            response = self.client.get(url, {'q': 'dosa 1'})
+        self.assertEqual(len(response.context['cl'].result_list), 6)  # Dosa 1, Dosa 10-14
+
+        search.index.build()
+        response = self.client.get(url, {'q': 'dosa 1'})
+        self.assertEqual([i.item_name for i in response.context['cl'].result_list], ['Dosa 1'])
+
+    def test_pages_past_the_capped_count_still_load(self):
+        self.add_assigned_orders(6)
+        orders = list(Orders.objects.order_by('order_id'))
+        url = reverse('admin:core_orders_changelist')
+        order_admin = admin.site._registry[Orders]
+        with override_settings(ADMIN_COUNT_LIMIT=2), \
+                mock.patch.object(order_admin, 'list_per_page', 1), \
+                mock.patch.object(order_admin, 'ordering', ('order_id',)):
+            response = self.client.get(url, {'delivery_status__exact': 'Pending', 'p': '6'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([o.order_id for o in response.context['cl'].result_list],
+                             [orders[5].order_id])
+
+            response = self.client.get(url, {'delivery_status__exact': 'Pending', 'p': '5'})
+            # the next page is linked
+            self.assertEqual(response.context['cl'].paginator.num_pages, 6)
+
+    def test_page_past_an_underestimated_total_loads(self):
+        self.add_assigned_orders(5)
+        with mock.patch('core.admin.estimated_rows', return_value=50_000):
+            paginator = EstimatedCountPaginator(Orders.objects.order_by('order_id'), 2)
+            self.assertEqual(paginator.count, 50_000)
+        paginator = EstimatedCountPaginator(Orders.objects.order_by('order_id'), 2)
+        paginator.count = 2  # a table estimate that is far too low
+        self.assertEqual(len(paginator.page(3).object_list), 1)
+        self.assertEqual(paginator.num_pages, 3)
+        with self.assertRaises(EmptyPage):
+            paginator.page(0)
+
+    def test_filtered_count_is_capped(self):
+        self.add_assigned_orders(5)
+        with override_settings(ADMIN_COUNT_LIMIT=2):
+            paginator = EstimatedCountPaginator(
+                Orders.objects.filter(customer=self.customer).order_by('order_id'), 100)
+            self.assertEqual(paginator.count, 3)
+
+
+class CustomerSummaryTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+
+    def setUp(self):
+        super().setUp()
+        summaries.forget(self.customer.customer_id)  # ids are reused between tests
+
+    def order(self, total):
+        return Orders.objects.create(customer=self.customer, restaurant=self.restaurant,
+                                     payment=self.payment, total_price=Decimal(total))
+
+    def test_counters_are_rebuilt_once_then_bumped(self):
+        self.order('80.50')
+        with self.assertNumQueries(1):
+            summary = summaries.get_customer_summary(self.customer.customer_id)
+        self.assertEqual((summary['order_count'], summary['total_spend']), (1, Decimal('80.50')))
+
+        order = self.order('19.50')
+        summaries.record_order(self.customer.customer_id, order.total_price, order.order_date)
+        with self.assertNumQueries(0):
+            summary = summaries.get_customer_summary(self.customer.customer_id)
+        self.assertEqual((summary['order_count'], summary['total_spend']), (2, Decimal('100.00')))
+        self.assertEqual(summary['last_order_at'], order.order_date)
+
+    def test_order_recorded_mid_rebuild_is_not_lost(self):
+        self.order('80.00')
+        compute = summaries.compute_customer_summary
+
+        def compute_then_order(customer_id):
+            values = compute(customer_id)
+            order = self.order('20.00')  # commits after the aggregate read
+            summaries.record_order(customer_id, order.total_price, order.order_date)
+            return values
+
+        with mock.patch.object(summaries, 'compute_customer_summary', compute_then_order):
+            summaries.get_customer_summary(self.customer.customer_id)
+        with self.assertNumQueries(1):  # the stale rebuild was dropped
+            summary = summaries.get_customer_summary(self.customer.customer_id)
+        self.assertEqual((summary['order_count'], summary['total_spend']), (2, Decimal('100.00')))
+
+
+class AnalyticsRollupTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+
+    def place(self, when, lines):
+        """An order at `when` with [(item, quantity)], recorded as place_order would."""
+        total = sum(item.price * quantity for item, quantity in lines)
+        order = Orders.objects.create(
+            customer=self.customer, restaurant=self.restaurant, payment=self.payment,
+            total_price=total)
+        Orders.objects.filter(pk=order.pk).update(order_date=when)
+        OrderItems.objects.bulk_create(
+            OrderItems(order=order, item=item, quantity=quantity) for item, quantity in lines)
+        analytics.record_order(
+            self.restaurant.restaurant_id, when, total,
+            [(item.item_id, quantity, item.price) for item, quantity in lines])
+        return total
+
+    def rollup_rows(self):
+        return {
+            model: sorted(model.objects.values_list(*columns))
+            for model, (columns, _, _) in analytics.ROLLUPS.items()
+        }
+
+    def test_ranges_use_days_in_the_middle_and_hours_at_the_edges(self):
+        utc = dt_timezone.utc
+        start = datetime(2026, 3, 1, 22, 30, tzinfo=utc)
+        end = datetime(2026, 3, 4, 1, 15, tzinfo=utc)
+        self.assertEqual(analytics._ranges(start, end), [
+            ('day', datetime(2026, 3, 2, tzinfo=utc), datetime(2026, 3, 4, tzinfo=utc)),
+            ('hour', datetime(2026, 3, 1, 22, tzinfo=utc), datetime(2026, 3, 2, tzinfo=utc)),
+            ('hour', datetime(2026, 3, 4, tzinfo=utc), datetime(2026, 3, 4, 2, tzinfo=utc)),
+        ])
+        self.assertEqual(analytics._ranges(start, start + timedelta(minutes=10)), [
+            ('hour', datetime(2026, 3, 1, 22, tzinfo=utc), datetime(2026, 3, 1, 23, tzinfo=utc)),
+        ])
+
+    def test_recorded_orders_answer_queries_and_match_a_rebuild(self):
+        day = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        first = self.place(day + timedelta(hours=9, minutes=5),
+                           [(self.items[0], 2), (self.items[1], 1)])
+        second = self.place(day + timedelta(hours=9, minutes=40), [(self.items[0], 1)])
+        third = self.place(day + timedelta(days=1, hours=20), [(self.items[2], 3)])
+
+        with self.assertNumQueries(1):
+            totals = analytics.revenue(self.restaurant.restaurant_id)
+        self.assertEqual(totals, {'orders': 3, 'items': 7, 'revenue': first + second + third})
+        window = analytics.revenue(start=day + timedelta(hours=9, minutes=30),
+                                   end=day + timedelta(days=1))
+        self.assertEqual(window['orders'], 2)
+        self.assertEqual(
+            [row['item_id'] for row in analytics.top_items(self.restaurant.restaurant_id)],
+            [self.items[0].item_id, self.items[2].item_id, self.items[1].item_id])
+        self.assertEqual(
+            [(row['period'], row['orders']) for row in analytics.order_volume()],
+            [(day, 2), (day + timedelta(days=1), 1)])
+        self.assertEqual(analytics.payment_mix(), [])  # until tail_rollups runs
+        self.assertEqual(analytics.tail_payment_types(), 3)
+        self.assertEqual(analytics.payment_mix()[0]['orders'], 3)
+
+        recorded = self.rollup_rows()
+        self.assertEqual(analytics.rebuild(chunk_size=2), 3)
+        self.assertEqual(self.rollup_rows(), recorded)
+        self.assertEqual(analytics.tail_payment_types(), 0)  # the rebuild moved the watermark
+
+        analytics.rebuild(since=day + timedelta(days=1, hours=5))
+        self.assertEqual(self.rollup_rows(), recorded)
+
+    def test_tail_takes_orders_in_id_order_once_they_are_old_enough(self):
+        now = timezone.now()
+        self.place(now - timedelta(minutes=5), [(self.items[0], 1)])
+        self.place(now - timedelta(minutes=4), [(self.items[0], 1)])
+        self.place(now, [(self.items[0], 1)])
+        self.place(now - timedelta(minutes=3), [(self.items[0], 1)])  # behind a recent one
+
+        self.assertEqual(analytics.tail_payment_types(batch_size=1), 1)
+        self.assertEqual(analytics.tail_payment_types(), 1)
+        self.assertEqual(analytics.tail_payment_types(), 0)
+        self.assertEqual(analytics.tail_payment_types(lag=timedelta(0)), 2)
+        self.assertEqual(analytics.payment_mix()[0]['orders'], 4)
+
+    def test_restaurant_analytics_is_staff_only(self):
+        self.place(timezone.now() - timedelta(hours=1), [(self.items[0], 2)])
+        url = reverse('restaurant_analytics', args=[self.restaurant.restaurant_id])
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(
+            User.objects.create_user('ops', password='pass12345', is_staff=True))
+        data = self.client.get(url).json()
+        self.assertEqual(set(data), {'restaurant_id', 'today', 'last_7_days', 'all_time',
+                                     'top_items', 'daily'})
+        self.assertEqual(data['all_time'], {'orders': 1, 'items': 2, 'revenue': '160.00'})
+        self.assertEqual(data['top_items'][0]['item_id'], self.items[0].item_id)
+        self.assertEqual(sum(day['orders'] for day in data['daily']), 1)
+
+
+@skipUnless(find_spec('numpy'), "reports need NumPy")
+class OrderReportTests(CatalogFixtureMixin, TestCase):
+    # core.reports imports NumPy, so it is imported inside the tests
+    # pylint: disable=import-outside-toplevel
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        upi = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+        cash = PaymentMethods.objects.create(customer=cls.customer, payment_type='Cash')
+        cls.other = Restaurants.objects.create(
+            name='Tandoor House', address=cls.restaurant.address, cuisine='North Indian')
+        for restaurant, payment, total, quantities in (
+            (cls.restaurant, upi, '100.10', (1, 2)),
+            (cls.restaurant, cash, '50.05', (3,)),
+            (cls.other, upi, '20.00', (1, 1, 1)),
+            (cls.restaurant, upi, '0.20', (1,)),
+        ):
+            order = Orders.objects.create(
+                customer=cls.customer, restaurant=restaurant, payment=payment,
+                total_price=Decimal(total))
+            OrderItems.objects.bulk_create(
+                OrderItems(order=order, item=item, quantity=quantity)
+                for item, quantity in zip(cls.items, quantities))
+
+    def test_reports_match_across_chunk_sizes(self):
+        from . import reports
+
+        count, results = reports.build(chunk_size=1)
+        self.assertEqual(count, 4)
+        self.assertEqual(results, reports.build(chunk_size=1000)[1])
+
+        self.assertEqual(results['restaurant_revenue'][1], [
+            (self.restaurant.restaurant_id, 'Dosa Corner', 3, Decimal('150.35')),
+            (self.other.restaurant_id, 'Tandoor House', 1, Decimal('20.00')),
+        ])
+        self.assertEqual(results['basket_sizes'][1], [(1, 1, 25.0), (3, 3, 75.0)])
+        self.assertEqual(results['payment_spend'][1], [
+            ('UPI', 3, Decimal('120.30'), Decimal('40.10')),
+            ('Cash', 1, Decimal('50.05'), Decimal('50.05')),
+        ])
+
+    def test_csv_files_are_written(self):
+        from . import reports
+
+        with TemporaryDirectory() as directory:
+            paths = reports.write(reports.build()[1], directory)
+            with open(os.path.join(directory, 'payment_spend.csv'), encoding='utf-8') as f:
+                self.assertEqual(f.readline().strip(), 'payment_type,orders,spend,average_order')
+        self.assertEqual(len(paths), 3)
+
+
+class OrderExportTests(CatalogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin_user = User.objects.create_superuser('admin', password='pass12345')
+        payment = PaymentMethods.objects.create(customer=cls.customer, payment_type='UPI')
+        cls.orders = [
+            Orders.objects.create(
+                customer=cls.customer, restaurant=cls.restaurant, payment=payment,
+                total_price=Decimal('80.00'), delivery_status=status)
+            for status in ('Delivered', 'Delivered', 'Pending')
+        ]
+        OrderItems.objects.bulk_create([
+            OrderItems(order=cls.orders[0], item=cls.items[0], quantity=2),
+            OrderItems(order=cls.orders[0], item=cls.items[1], quantity=1),
+            OrderItems(order=cls.orders[2], item=cls.items[2], quantity=1),
+        ])
+        OrderAssignment.objects.create(
+            order=cls.orders[0], employee_id=1, vehicle=Vehicles.objects.create(
+                registration_number='KA01CD5678', type='Bike'))
+
+    def test_rows_cover_every_line_in_constant_size_pages(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(exports.rows(exports.filter_orders(), chunk_size=2))
+        self.assertEqual(len(queries), 4)  # two pages, each with its lines
+        self.assertEqual(
+            [(row[0], row[-3]) for row in rows],
+            [(self.orders[0].order_id, self.items[0].item_id),
+             (self.orders[0].order_id, self.items[1].item_id),
+             (self.orders[1].order_id, None),
+             (self.orders[2].order_id, self.items[2].item_id)])
+        self.assertEqual(rows[0][exports.COLUMNS.index('driver')], 'Ravi')
+
+        delivered = exports.filter_orders(status='Delivered')
+        self.assertEqual(len(list(exports.rows(delivered))), 3)
+
+    def test_admin_action_streams_the_selection(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.post(reverse('admin:core_orders_changelist'), {
+            'action': 'export_jsonl',
+            '_selected_action': [self.orders[0].order_id, self.orders[2].order_id],
+        })
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([line['item'] for line in lines], ['Dosa 0', 'Dosa 1', 'Dosa 2'])
+        self.assertEqual(lines[0]['total_price'], '80.00')
+
+    def test_asgi_requests_get_an_async_stream(self):
+        wsgi = exports.streaming_response(
+            exports.filter_orders(), 'jsonl', request=RequestFactory().get('/'))
+        self.assertFalse(wsgi.is_async)
+
+        response = exports.streaming_response(
+            exports.filter_orders(), 'jsonl', chunk_size=1, request=AsyncRequestFactory().get('/'))
+        self.assertTrue(response.is_async)
+
+        async def read():
+            return [chunk async for chunk in response.streaming_content]
+
+        with mock.patch.object(exports, 'LINES_PER_BATCH', 3):
+            chunks = async_to_sync(read)()
+        self.assertEqual([len(chunk.splitlines()) for chunk in chunks], [3, 1])
+        self.assertEqual(b''.join(chunks), b''.join(wsgi.streaming_content))
+
+    def test_command_writes_csv(self):
+        with TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'orders.csv')
+            call_command('export_orders', '--status', 'Delivered', '--output', output,
+                         stdout=StringIO())
+            with open(output, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(tuple(rows[0]), exports.COLUMNS)
+        self.assertEqual(len(rows), 4)
+
+
+class CatalogImportTests(CatalogFixtureMixin, TestCase):
+
+    DOSA = ('Dosa Corner', '1 MG Road', 'KA', 'India', '560001', 'South Indian')
+    TANDOOR = ('Tandoor House', '9 Park St', 'WB', 'India', '700016', 'North Indian')
+    FEED = [
+        DOSA + ('dosa 0', 'Crisp', '85.00'),
+        DOSA + ('Idli', '', '40'),
+        TANDOOR + ('Naan', '', '30'),
+        TANDOOR + ('Naan', 'Butter', '35'),
+        TANDOOR + ('Kebab', '', 'free'),
+        TANDOOR + ('Dal', '', '120.50'),
+    ]
+
+    def write_feed(self, directory, records):
+        feed = os.path.join(directory, 'feed.csv')
+        with open(feed, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(imports.FIELDS)
+            writer.writerows(records)
+        return feed
+
+    def test_import_upserts_deduplicates_and_rejects(self):
+        rejected = []
+        with TemporaryDirectory() as directory:
+            feed = self.write_feed(directory, self.FEED)
+            with mock.patch.object(catalog, 'bust_all') as bust_all:
+                totals = imports.run(feed, batch_size=4,
+                                     on_error=lambda number, record, error: rejected.append(number))
+            self.assertFalse(os.path.exists(imports.checkpoint_path(feed)))
+        bust_all.assert_called_once_with()
+
+        self.assertEqual(rejected, [5])
+        self.assertEqual((totals['restaurants_created'], totals['items_created'],
+                          totals['items_updated']), (1, 3, 1))
+        dosa = MenuItems.objects.get(pk=self.items[0].pk)
+        self.assertEqual((dosa.item_name, dosa.description, dosa.price),
+                         ('dosa 0', 'Crisp', Decimal('85.00')))
+        tandoor = Restaurants.objects.get(name='Tandoor House')
+        self.assertEqual(tandoor.address.zipcode, '700016')
+        self.assertEqual(
+            sorted(MenuItems.objects.filter(restaurant=tandoor).values_list('item_name', 'price')),
+            [('Dal', Decimal('120.50')), ('Naan', Decimal('35.00'))])
+
+    def test_bad_values_are_rejected_not_raised(self):
+        record = dict(zip(imports.FIELDS, self.FEED[1]))
+        for price in ('NaN', 'sNaN', 'Infinity', '-1', '10000', ''):
+            with self.subTest(price=price), self.assertRaises(imports.RowError):
+                imports.clean({**record, 'price': price})
+        for record in (['Dosa Corner'], 'Idli', 42, None):
+            with self.subTest(record=record), self.assertRaises(imports.RowError):
+                imports.clean(record)
+
+    def test_malformed_json_lines_are_reported_and_skipped(self):
+        rejected = []
+        good = json.dumps(dict(zip(imports.FIELDS, self.FEED[1])))
+        with TemporaryDirectory() as directory:
+            feed = os.path.join(directory, 'feed.jsonl')
+            with open(feed, 'w', encoding='utf-8') as f:
+                lines = [good, '{"restaurant": ', '["a list"]', '{"price": NaN}', good]
+                f.write('\n'.join(lines) + '\n')
+            totals = imports.run(
+                feed, on_error=lambda number, record, error: rejected.append(number))
+        self.assertEqual(rejected, [2, 3, 4])
+        self.assertEqual((totals['records'], totals['rejected'], totals['items_created']),
+                         (5, 3, 1))
+
+    def test_failed_import_resumes_from_its_checkpoint(self):
+        real_import_batch = imports.import_batch
+        calls = []
+
+        def import_batch(rows):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise OSError("database went away")
+            return real_import_batch(rows)
+
+        with TemporaryDirectory() as directory:
+            feed = self.write_feed(directory, self.FEED)
+            with mock.patch.object(imports, 'import_batch', import_batch):
+                with self.assertRaises(OSError):
+                    imports.run(feed, batch_size=2)
+            self.assertEqual(imports.read_checkpoint(feed), 2)
+
+            totals = imports.run(feed, batch_size=2)
+        self.assertEqual((totals['skipped'], totals['records']), (2, 4))
+        self.assertEqual(MenuItems.objects.filter(restaurant__name='Tandoor House').count(), 2)
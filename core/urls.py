@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Read paths: the async versions when serving over ASGI with ASYNC_READ_VIEWS on
+reads = async_views if getattr(settings, 'ASYNC_READ_VIEWS', False) else views
 
 urlpatterns = [
     # --- AUTH ---
@@ -8,12 +12,20 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
 
     # --- CORE ---
-    path('', views.home, name='home'),
-    path('menu/<int:rid>/', views.menu, name='menu'),
+    path('', reads.home, name='home'),
+    path('restaurants/feed/', views.restaurant_feed, name='restaurant_feed'),
+    path('menu/<int:rid>/', reads.menu, name='menu'),
+    path('search/', views.search_view, name='search'),
     path('profile/', views.customer_profile, name='customer_profile'),
-    path('my-orders/', views.my_orders, name='my_orders'),
-    path('order/<int:order_id>/', views.order_confirmation,
+    path('my-orders/', reads.my_orders, name='my_orders'),
+    path('my-orders/feed/', views.my_orders_feed, name='my_orders_feed'),
+    path('order/<int:order_id>/', reads.order_confirmation,
          name='order_confirmation'),
+    path('order/<int:order_id>/status/', reads.order_status, name='order_status'),
+    path('order/<int:order_id>/events/', async_views.order_events, name='order_events'),
+    path('perf/', views.perf_stats, name='perf_stats'),
+    path('analytics/restaurant/<int:rid>/', views.restaurant_analytics,
+         name='restaurant_analytics'),
 
     # --- CART ---
     path('cart/', views.view_cart, name='view_cart'),
@@ -1,12 +1,20 @@
+import os
+from datetime import timedelta
+
 from django.shortcuts import render, redirect ,get_object_or_404
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.db import connection, transaction
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
-import random
-from django.db.models import Max
+from django.db.models import F
+from django.conf import settings
 
 import decimal
 from .models import Orders, PaymentMethods, Restaurants
@@ -20,11 +28,9 @@ from .models import (
 
 from decimal import Decimal
 
-
-assigned_employee = Employees.objects.filter(role="Driver").order_by("?").first()
-
-# Select a random vehicle (if applicable)
-assigned_vehicle = Vehicles.objects.order_by("?").first()
+from . import analytics, catalog, dispatch, events, perf, search, snapshots, summaries
+from .cart import get_cart
+from .routers import replica_reads
 
 
 
@@ -86,139 +92,214 @@ def logout_view(request):
     return redirect('login')
 
 
+# --- STAFF VIEWS ---
+
+@staff_member_required
+def perf_stats(request):
+    """Staff-only: per-view timings from this process's sampled requests."""
+    samples = perf.buffer.snapshot()
+    return JsonResponse({
+        'pid': os.getpid(),
+        'sample_rate': getattr(settings, 'PERF_SAMPLE_RATE', 0),
+        'samples': len(samples),
+        'views': perf.summarize(samples),
+    })
+
+
+@staff_member_required
+def restaurant_analytics(request, rid):
+    """Staff-only: revenue, best sellers and daily volume for a restaurant, from the rollups."""
+    now = timezone.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return JsonResponse({
+        'restaurant_id': rid,
+        'today': analytics.revenue(rid, start=today),
+        'last_7_days': analytics.revenue(rid, start=now - timedelta(days=7)),
+        'all_time': analytics.revenue(rid),
+        'top_items': analytics.top_items(rid, start=now - timedelta(days=30)),
+        'daily': analytics.order_volume(restaurant_id=rid, start=now - timedelta(days=30)),
+    })
+
+
 # --- CORE APP VIEWS ---
 
+
 @login_required
+@replica_reads
 def home(request):
-    """Home page — shows all restaurants and their menus."""
-    restaurants = Restaurants.objects.all().order_by('name')
-    menu_items = MenuItems.objects.select_related('restaurant').all()
+    """Home page — one page of restaurant cards, optionally filtered by cuisine."""
+    cuisine = request.GET.get('cuisine') or None
+    page = catalog.get_restaurant_page(cuisine, request.GET.get('after'))
+    return render(request, 'home.html', {
+        'page': page,
+        'cuisine': cuisine,
+        'cuisines': catalog.get_cuisines(),
+    })
 
-    restaurant_menus = {}
-    for item in menu_items:
-        restaurant_menus.setdefault(item.restaurant.restaurant_id, []).append(item)
 
-    return render(request, 'home.html', {
-        'restaurants': restaurants,
-        'restaurant_menus': restaurant_menus
+@login_required
+@replica_reads
+def restaurant_feed(request):
+    """JSON for "load more": ?after=<cursor>&cuisine=<name>."""
+    page = catalog.get_restaurant_page(request.GET.get('cuisine') or None, request.GET.get('after'))
+    return JsonResponse({
+        'restaurants': [
+            {
+                'restaurant_id': row['restaurant_id'],
+                'name': row['name'],
+                'cuisine': row['cuisine'],
+                'url': reverse('menu', args=[row['restaurant_id']]),
+            }
+            for row in page['restaurants']
+        ],
+        'html': page['html'],
+        'next_cursor': page['next_cursor'],
     })
 
 
 @login_required
+@replica_reads
 def menu(request, rid):
     """Displays all menu items for a restaurant."""
     try:
-        restaurant = Restaurants.objects.get(restaurant_id=rid)
-        menu_items = MenuItems.objects.filter(restaurant=restaurant)
+        restaurant, menu_items = catalog.get_menu(rid)
         return render(request, 'menu.html', {'restaurant': restaurant, 'menu_items': menu_items})
     except Restaurants.DoesNotExist:
         messages.error(request, 'Restaurant not found.')
         return redirect('home')
 
 
+SEARCH_LIMIT = 10
+
+
+@login_required
+def search_view(request):
+    """Typeahead: restaurants and dishes matching ?q=, as JSON."""
+    query = request.GET.get('q', '')[:100]
+    try:
+        limit = max(1, min(int(request.GET.get('limit', SEARCH_LIMIT)), 50))
+    except ValueError:
+        limit = SEARCH_LIMIT
+    results = search.index.search(query, limit)
+    for result in results:
+        result['url'] = reverse('menu', args=[result['restaurant_id']])
+    return JsonResponse({'query': query, 'results': results, 'ready': search.index.is_ready()})
+
+
 # --- CUSTOMER PROFILE & ORDERS ---
 
 @login_required
 def customer_profile(request):
     try:
-        customer = request.user.profile.customer_profile
-        order_count = Orders.objects.filter(customer=customer).count()
-        payment_methods = PaymentMethods.objects.filter(customer=customer)
-        total_spend = sum(pm.total_spend or 0 for pm in payment_methods)
+        profile = request.user.profile
+        customer = profile.customer_profile
+        summary = summaries.get_customer_summary(profile.customer_profile_id)
         return render(request, 'customer_profile.html', {
             'customer': customer,
-            'orders': order_count,
-            'spend': total_spend
+            'orders': summary['order_count'],
+            'spend': summary['total_spend'],
+            'last_order_at': summary['last_order_at'],
         })
     except Profile.DoesNotExist:
         messages.error(request, "Your profile is incomplete.")
         return redirect('home')
 
 
+ORDERS_PAGE_SIZE = 20
+
+
+def _order_history(customer_id, before=None, limit=ORDERS_PAGE_SIZE):
+    """
+    One page of a customer's orders, newest first, using keyset pagination:
+    seek to order_id < before instead of OFFSET, so every page costs the same.
+    Restaurant names come from the same joined query. Fetches one extra row
+    to tell whether there is a next page; see _history_page().
+    """
+    orders = (
+        Orders.objects.filter(customer_id=customer_id)
+        .select_related('restaurant')
+        .only('order_id', 'total_price', 'delivery_status', 'order_date', 'restaurant__name')
+        .order_by('-order_id')
+    )
+    if before:
+        orders = orders.filter(order_id__lt=before)
+    return orders[:limit + 1]
+
+
+def _history_page(rows, limit=ORDERS_PAGE_SIZE):
+    """(orders, next_cursor); next_cursor is None on the last page."""
+    next_cursor = rows[limit - 1].order_id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def _order_history_page(customer_id, before=None, limit=ORDERS_PAGE_SIZE):
+    return _history_page(list(_order_history(customer_id, before, limit)), limit)
+
+
+def _cursor_param(request, name='before'):
+    value = request.GET.get(name, '')
+    if not value.isdecimal() or len(value) > len(str(catalog.MAX_ID)):
+        return None
+    value = int(value)
+    return value if 0 < value <= catalog.MAX_ID else None
+
+
 @login_required
+@replica_reads
 def my_orders(request):
     try:
-        customer = request.user.profile.customer_profile
-        orders = Orders.objects.filter(customer=customer).order_by('-order_id')
-        return render(request, 'my_orders.html', {'orders': orders})
+        customer_id = request.user.profile.customer_profile_id
+        before = _cursor_param(request)
+        orders, next_cursor = _order_history_page(customer_id, before)
+        return render(request, 'my_orders.html', {
+            'orders': orders,
+            'next_cursor': next_cursor,
+            'is_first_page': before is None,
+        })
     except Exception as e:
         messages.error(request, f"Could not load your orders: {e}")
         return redirect('home')
 
 
-
 @login_required
-def order_confirmation(request, order_id):
+@replica_reads
+def my_orders_feed(request):
+    """JSON version of my_orders for infinite scroll: ?before=<order_id>."""
     try:
-        # Fetch order with restaurant and payment info
-        order = Orders.objects.select_related('restaurant', 'payment').get(order_id=order_id)
+        customer_id = request.user.profile.customer_profile_id
+    except Profile.DoesNotExist:
+        return JsonResponse({'error': 'Your profile is incomplete.'}, status=404)
 
-        # ✅ Fetch assignment directly from DB (refreshed every time)
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    oa.Order_id, 
-                    e.Employee_id, 
-                    e.Employee_name, 
-                    e.Phone, 
-                    v.Vehicle_id, 
-                    v.Type, 
-                    v.Registration_Number
-                FROM Order_Assignment oa
-                JOIN Employees e ON oa.Employee_id = e.Employee_id
-                JOIN Vehicles v ON oa.Vehicle_id = v.Vehicle_id
-                WHERE oa.Order_id = %s
-                ORDER BY oa.Assignment_Time DESC
-                LIMIT 1;
-            """, [order_id])
-            row = cursor.fetchone()
-
-        assignment = None
-        if row:
-            assignment = {
-                'order_id': row[0],
-                'employee': {
-                    'id': row[1],
-                    'name': row[2],
-                    'phone': row[3]
-                },
-                'vehicle': {
-                    'id': row[4],
-                    'type': row[5],
-                    'registration_number': row[6]
-                }
+    orders, next_cursor = _order_history_page(customer_id, _cursor_param(request))
+    return JsonResponse({
+        'orders': [
+            {
+                'order_id': order.order_id,
+                'restaurant': order.restaurant.name,
+                'total_price': str(order.total_price),
+                'delivery_status': order.delivery_status,
+                'order_date': order.order_date.isoformat() if order.order_date else None,
+                'url': reverse('order_confirmation', args=[order.order_id]),
             }
+            for order in orders
+        ],
+        'next_cursor': next_cursor,
+    })
 
-        # ✅ Fetch items correctly
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    oi.Item_id, 
-                    m.Item_Name, 
-                    m.Price, 
-                    oi.Quantity
-                FROM Order_Items oi
-                JOIN Menu_Items m ON oi.Item_id = m.Item_id
-                WHERE oi.Order_id = %s;
-            """, [order_id])
-            items_rows = cursor.fetchall()
-
-        items = [
-            {
-                'item_id': r[0],
-                'name': r[1],
-                'price': r[2],
-                'quantity': r[3],
-            } for r in items_rows
-        ]
-
-        return render(request, 'order_confirmation.html', {
-            'order': order,
-            'items': items,
-            'assignment': assignment,
-        })
 
-    except Orders.DoesNotExist:
+
+@login_required
+def order_confirmation(request, order_id):
+    try:
+        # Items and prices are cached after the first view; only the status
+        # and the driver/vehicle assignment are re-read on refresh.
+        snapshot = snapshots.get_order_snapshot(order_id)
+        if snapshot['order']['customer_id'] != _session_customer_id(request):
+            raise Orders.DoesNotExist  # someone else's order
+        return render(request, 'order_confirmation.html',
+                      {**snapshot, 'live_events': events.streams_supported(request)})
+
+    except (Orders.DoesNotExist, Profile.DoesNotExist):
         messages.error(request, "Order not found.")
         return redirect('home')
     except Exception as e:
@@ -226,119 +307,148 @@ def order_confirmation(request, order_id):
         return redirect('home')
 
 
+@login_required
+def order_status(request, order_id):
+    """
+    Compact JSON for polling an order's delivery progress. Served from the
+    status cache, with an ETag so an unchanged status costs a bodyless 304.
+    """
+    try:
+        status = snapshots.get_order_status(order_id)
+        customer_id = _session_customer_id(request)
+    except (Orders.DoesNotExist, Profile.DoesNotExist):
+        return JsonResponse({'error': 'Order not found.'}, status=404)
+    if status['customer_id'] != customer_id:
+        return JsonResponse({'error': 'Order not found.'}, status=404)
+    return _status_response(request, order_id, status)
+
 
+CUSTOMER_SESSION_KEY = 'customer_id'
 
-# --- CART VIEWS ---
-def get_cart(request):
-    """Retrieve or initialize the cart from session"""
-    return request.session.get('cart', {})
 
-def save_cart(request, cart):
-    """Save updated cart to session"""
-    request.session['cart'] = cart
-    request.session.modified = True
-    
-def clear_cart(request):
-    if 'cart' in request.session:
-        del request.session['cart']
-        request.session.modified = True
+def _session_customer_id(request):
+    """The user's customer id, remembered in the session after the first lookup."""
+    customer_id = request.session.get(CUSTOMER_SESSION_KEY)
+    if customer_id is None:
+        customer_id = request.user.profile.customer_profile_id
+        request.session[CUSTOMER_SESSION_KEY] = customer_id
+    return customer_id
 
 
+def _status_payload(order_id, status):
+    return {
+        'order_id': order_id,
+        'delivery_status': status['delivery_status'],
+        'assignment': status['assignment'],
+    }
+
+
+def _status_response(request, order_id, status):
+    etag = quote_etag(status['version'])
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(_status_payload(order_id, status))
+    response.headers['ETag'] = etag
+    # Per-customer data; browsers may keep it but must revalidate every poll
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# --- CART VIEWS ---
+# The cart itself lives in core.cart: item_id -> quantity plus a running
+# count and total, persisted once per request by CartMiddleware.
+
+DEFAULT_ITEM_IMAGE = '/static/images/default_food.jpg'
+
 
 @login_required
 def add_to_cart(request, item_id):
-    item = get_object_or_404(MenuItems, pk=item_id)
-    restaurant_id = str(item.restaurant.restaurant_id)
+    item = get_object_or_404(MenuItems.objects.only('item_id', 'restaurant_id'), pk=item_id)
+    # The same price lookup as the cart page and checkout, so they never disagree
+    price = catalog.get_item_prices(item.restaurant_id, [item.item_id]).get(item.item_id)
+    if price is None:
+        raise Http404("No such menu item.")
     cart = get_cart(request)
 
-    # If cart has items from a different restaurant, clear it
-    if cart and list(cart.keys())[0] != restaurant_id:
+    # A cart holds one restaurant; adding from another one clears it
+    if cart.add(item.item_id, item.restaurant_id, price):
         messages.info(request, "Cart cleared because you added an item from a different restaurant.")
-        cart = {}
-
-    # Add or update the item
-    if restaurant_id not in cart:
-        cart[restaurant_id] = {}
 
-    item_id_str = str(item_id)
-    if item_id_str in cart[restaurant_id]:
-        cart[restaurant_id][item_id_str]['quantity'] += 1
-    else:
-        cart[restaurant_id][item_id_str] = {
-            'name': item.item_name,
-            'price': float(item.price),
-            'quantity': 1,
-            'image_url': '/static/images/default_food.jpg'  # default fallback
-        }
-
-    save_cart(request, cart)
     return redirect('view_cart')
 
 
-
 @login_required
 def remove_from_cart(request, item_id):
     """Removes an item from the cart."""
-    cart = request.session.get('cart', {})
-    cart_items = cart.get('items', {})
-    item_key = str(item_id)
-
-    if item_key in cart_items:
-        del cart_items[item_key]
+    cart = get_cart(request)
+    if item_id in cart.items:
+        cart.remove(item_id, catalog.get_item_prices(cart.restaurant_id, [item_id]).get(item_id, 0))
         messages.info(request, "Item removed from cart.")
+    return redirect('view_cart')
 
-    if not cart_items:
-        cart = {}
-    else:
-        cart['items'] = cart_items
 
-    request.session['cart'] = cart
-    request.session.modified = True
-    return redirect('view_cart')
+def _price_drift_message(old_total, total):
+    return (f"Prices in your cart have changed since you added the items: "
+            f"the total is now ₹{total:.2f} (was ₹{old_total:.2f}).")
+
+
+def _drop_unavailable(request, cart, prices):
+    """
+    Remove the lines whose item has left the menu (no price in `prices`),
+    so they cannot keep failing checkout. Their old prices are unknown, so
+    the caller reprices the cart. Returns True if any line was removed.
+    """
+    gone = [item_id for item_id in cart.items if item_id not in prices]
+    for item_id in gone:
+        cart.remove(item_id, 0)
+    if gone:
+        messages.error(
+            request, "Some items in your cart are no longer available and were removed.")
+    return bool(gone)
 
 
 @login_required
 def view_cart(request):
     cart = get_cart(request)
-    total = 0
+    total = Decimal('0')
     cart_items = []
     restaurant = None  # Default
 
     if cart:
-        # Safely get restaurant_id (first key in cart)
-        restaurant_id = list(cart.keys())[0]
-
-        # ✅ Ensure restaurant_id is numeric before querying
-        if str(restaurant_id).isdigit():
-            try:
-                restaurant = Restaurants.objects.get(pk=int(restaurant_id))
-            except Restaurants.DoesNotExist:
-                restaurant = None
-        else:
-            restaurant = None  # Prevent ValueError if key is invalid
-
-        # ✅ Process cart items only if restaurant_id is valid
-        if restaurant:
-            for item_id, data in cart[str(restaurant_id)].items():
-                item_total = data['price'] * data['quantity']
-                total += item_total
-                cart_items.append({
-                    'id': item_id,
-                    'name': data['name'],
-                    'price': data['price'],
-                    'quantity': data['quantity'],
-                    'total': item_total,
-                    'image_url': data['image_url']
-                })
+        try:
+            restaurant, menu_items = catalog.get_menu(cart.restaurant_id)
+        except Restaurants.DoesNotExist:
+            cart.clear()
+            menu_items = []
+
+        # Names come from the menu; prices from the same lookup checkout
+        # uses, since the menu entry is cached for much longer.
+        names = {item.item_id: item.item_name for item in menu_items}
+        prices = catalog.get_item_prices(cart.restaurant_id, cart.items) if cart else {}
+        gone = _drop_unavailable(request, cart, prices)
+        for item_id, quantity in cart.items.items():
+            price = prices[item_id]
+            item_total = price * quantity
+            total += item_total
+            cart_items.append({
+                'id': item_id,
+                'name': names.get(item_id, f'Item #{item_id}'),
+                'price': price,
+                'quantity': quantity,
+                'total': item_total,
+                'image_url': DEFAULT_ITEM_IMAGE,
+            })
+
+        old_total = cart.reprice(total)
+        if old_total is not None and not gone:
+            messages.warning(request, _price_drift_message(old_total, total))
 
     # ✅ Handle user payment methods
-    from .models import PaymentMethods, Customers
-    # ✅ Handle user payment methods
-    user_customer = request.user.profile.customer_profile
-    existing_methods = PaymentMethods.objects.filter(customer=user_customer)
-
-    # If no payment methods exist, still offer UPI/Cash/Card options
-    available_methods = [pm.payment_type for pm in existing_methods] if existing_methods else []
+    customer_id = request.user.profile.customer_profile_id
+    available_methods = list(
+        PaymentMethods.objects.filter(customer_id=customer_id)
+        .values_list('payment_type', flat=True)
+    )
     default_methods = ["UPI", "Cash", "Card"]
 
     # Merge both and remove duplicates (in case user already has one)
@@ -352,106 +462,126 @@ def view_cart(request):
     })
 
 
-
-
-
 @login_required
 @transaction.atomic
-@transaction.atomic
 def place_order(request):
+    """
+    Checkout as a short batch: every cart price is resolved in one lookup
+    (catalog.get_item_prices), then the spend update, the order row and all
+    order items are written with one statement each. If prices changed
+    since the items were added, nothing is charged: the cart is repriced
+    and the customer sent back to review the new total.
+    """
     cart = get_cart(request)
     if not cart:
         messages.error(request, "Your cart is empty.")
         return redirect('view_cart')
 
-    restaurant_id = list(cart.keys())[0]
-    restaurant = Restaurants.objects.get(pk=int(restaurant_id))
+    restaurant_id = cart.restaurant_id
     payment_type = request.POST.get('payment_type')
 
     if not payment_type:
         messages.error(request, "Please select a payment method.")
         return redirect('view_cart')
 
-    user_customer = request.user.profile.customer_profile
+    lines = dict(cart.items)
+
+    # Current prices for every line, from the catalog rather than the cart
+    prices = catalog.get_item_prices(restaurant_id, lines)
+    if _drop_unavailable(request, cart, prices):
+        # The cart page shows the new total, so it needs no drift warning
+        cart.reprice(sum((prices[item_id] * quantity for item_id, quantity in cart.items.items()),
+                         Decimal('0')))
+        return redirect('view_cart')
+
+    total = sum((prices[item_id] * quantity for item_id, quantity in lines.items()), Decimal('0'))
+    old_total = cart.reprice(total)
+    if old_total is not None:
+        # Never charge a total the customer has not seen
+        messages.warning(request, _price_drift_message(old_total, total))
+        return redirect('view_cart')
+    customer_id = request.user.profile.customer_profile_id
 
-    # ✅ Explicitly create or get payment method with valid primary key
     payment_method, created = PaymentMethods.objects.get_or_create(
-        customer=user_customer,
+        customer_id=customer_id,
         payment_type=payment_type,
         defaults={'total_spend': Decimal('0.00')}
     )
 
-    # ✅ Ensure payment_id exists
-    if not payment_method.payment_id:
-        payment_method.save()
-
-    # Calculate total
-    total = sum(
-        Decimal(item['price']) * item['quantity']
-        for item in cart[str(restaurant_id)].values()
+    # Update spend in the database, without a read-modify-write race
+    PaymentMethods.objects.filter(pk=payment_method.pk).update(
+        total_spend=F('total_spend') + total
     )
 
-    # Update spend
-    payment_method.total_spend += total
-    payment_method.save()
-
-    # Create order with valid payment reference
     order = Orders.objects.create(
-        customer=user_customer,
-        restaurant=restaurant,
+        customer_id=customer_id,
+        restaurant_id=restaurant_id,
         payment=payment_method,
         total_price=total,
         delivery_status="Pending"
     )
 
-    # Add items
-    for item_id, data in cart[str(restaurant_id)].items():
-        OrderItems.objects.create(
-            order=order,
-            item_id=item_id,
-            quantity=data['quantity']
+    OrderItems.objects.bulk_create([
+        OrderItems(order=order, item_id=item_id, quantity=quantity)
+        for item_id, quantity in lines.items()
+    ])
+    transaction.on_commit(
+        lambda: summaries.record_order(customer_id, total, order.order_date)
+    )
+    transaction.on_commit(lambda: analytics.record_order_quietly(
+        restaurant_id, order.order_date, total,
+        [(item_id, quantity, prices[item_id]) for item_id, quantity in lines.items()],
+    ))
+
+    if dispatch.batch_mode():
+        # dispatch_orders assigns a driver within a window or two
+        cart.clear()
+        messages.success(
+            request,
+            f"Order #{order.order_id} placed successfully using {payment_method.payment_type}!"
         )
+        return redirect('order_confirmation', order_id=order.order_id)
 
-    # Assign driver
+    # Assign driver (least-loaded, preferring drivers near the restaurant)
+    zipcode = Restaurants.objects.filter(pk=restaurant_id).values_list(
+        'address__zipcode', flat=True).first()
+    employee_id = None
     try:
-        assigned_employee = Employees.objects.filter(role="Driver").order_by("?").first()
-        if not assigned_employee:
+        employee_id = dispatch.pick_driver(zipcode)
+        if employee_id is None:
             raise Exception("No available driver found.")
 
         with connection.cursor() as cursor:
-            cursor.callproc('AssignOrderDriver', [order.order_id, assigned_employee.employee_id])
+            cursor.callproc('AssignOrderDriver', [order.order_id, employee_id])
+        # The procedure writes the assignment behind the ORM's back, so no
+        # signal fires; refresh the status and notify its streams ourselves.
+        snapshots.status_changed(order.order_id)
 
     except Exception as e:
+        if employee_id is not None:
+            dispatch.driver_index.release(employee_id)
         messages.error(request, f"Error assigning driver: {e}")
-        clear_cart(request)
+        cart.clear()
         return redirect('view_cart')
 
-    clear_cart(request)
+    cart.clear()
     messages.success(
         request,
         f"Order #{order.order_id} placed successfully using {payment_method.payment_type}!"
     )
     return redirect('order_confirmation', order_id=order.order_id)
+
+
 @login_required
 def update_quantity(request, item_id, action):
     cart = get_cart(request)
-    if not cart:
+    if item_id not in cart.items:
         return redirect('view_cart')
 
-    restaurant_id = list(cart.keys())[0]
-    item_id_str = str(item_id)
-
-    if item_id_str in cart[restaurant_id]:
-        if action == 'increase':
-            cart[restaurant_id][item_id_str]['quantity'] += 1
-        elif action == 'decrease':
-            if cart[restaurant_id][item_id_str]['quantity'] > 1:
-                cart[restaurant_id][item_id_str]['quantity'] -= 1
-            else:
-                del cart[restaurant_id][item_id_str]
-                # Delete restaurant if no items left
-                if not cart[restaurant_id]:
-                    del cart[restaurant_id]
-
-    save_cart(request, cart)
-    return redirect('view_cart')
\ No newline at end of file
+    price = catalog.get_item_prices(cart.restaurant_id, [item_id]).get(item_id, 0)
+    if action == 'increase':
+        cart.add(item_id, cart.restaurant_id, price)
+    elif action == 'decrease':
+        cart.decrease(item_id, price)
+
+    return redirect('view_cart')
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.perf.PerfMiddleware',  # off unless PERF_SAMPLE_RATE > 0
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +51,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.cart.CartMiddleware',  # writes the cart back once per request, if changed
 ]
 
 ROOT_URLCONF = 'fooddelivery_project.urls'
@@ -78,14 +80,21 @@ WSGI_APPLICATION = 'fooddelivery_project.wsgi.application'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 # settings.py (only the relevant part)
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before
+# reuse, so each worker thread keeps one live connection instead of opening
+# one per request. Set DB_CONN_MAX_AGE=0 to go back to per-request connects.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 300))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'FoodDelivery',
-        'USER': 'root',          # or your MySQL user
-        'PASSWORD': 'Ng@30032005',
-        'HOST': '127.0.0.1',
-        'PORT': '3306',
+        'NAME': os.environ.get('DB_NAME', 'FoodDelivery'),
+        'USER': os.environ.get('DB_USER', 'root'),          # or your MySQL user
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'Ng@30032005'),
+        'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+        'PORT': os.environ.get('DB_PORT', '3306'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             # If using PyMySQL you are fine. If mysqlclient is installed, same config.
@@ -93,6 +102,31 @@ DATABASES = {
     }
 }
 
+# FOODDELIVERY_DB=sqlite runs everything against a local SQLite file
+# (tests, benchmarks, or a laptop without MySQL).
+if os.environ.get('FOODDELIVERY_DB') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        # Wait for the write lock instead of failing under concurrent requests
+        'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE'},
+    }
+
+# Optional read replica. When DB_REPLICA_HOST is set (or DB_REPLICA=1 with
+# SQLite, which points at the same file), the read-only views (home, menu,
+# my_orders) read from the 'replica' alias; see core/routers.py.
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA') == '1':
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=os.environ.get('DB_REPLICA_HOST', DATABASES['default'].get('HOST', '')),
+        PORT=os.environ.get('DB_REPLICA_PORT', DATABASES['default'].get('PORT', '')),
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['core.routers.ReadReplicaRouter']
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -145,3 +179,102 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 # Redirect users to this URL after they log out
 LOGOUT_REDIRECT_URL = 'login'
+
+
+# Driver dispatch (core/dispatch.py)
+# Seconds before the in-memory driver index is reloaded from the database.
+DISPATCH_INDEX_TTL = 60
+# How many more open orders a nearby driver may have and still be preferred.
+DISPATCH_ZIPCODE_SLACK = 1
+# 'inline': place_order assigns a driver during checkout. 'batch': orders stay
+# Pending and 'manage.py dispatch_orders' assigns them every DISPATCH_WINDOW
+# seconds, up to DISPATCH_BATCH_SIZE at a time. Each extra open order costs a
+# driver DISPATCH_LOAD_WEIGHT, against one per zipcode digit of distance.
+DISPATCH_MODE = os.environ.get('DISPATCH_MODE', 'inline')
+DISPATCH_WINDOW = 2.0
+DISPATCH_BATCH_SIZE = 500
+DISPATCH_LOAD_WEIGHT = 2
+
+# Analytics rollups (core/analytics.py). 'manage.py tail_rollups' adds orders
+# to the payment-type rollups every ROLLUP_TAIL_INTERVAL seconds, once they are
+# ROLLUP_TAIL_LAG seconds old (so orders still committing are not skipped).
+ROLLUP_TAIL_INTERVAL = 5.0
+ROLLUP_TAIL_LAG = 30
+
+
+# Admin changelists (core/admin.py). Filtered and searched lists count at most
+# ADMIN_COUNT_LIMIT rows; unfiltered ones use MySQL's table statistics.
+# Restaurant and menu item searches return at most ADMIN_SEARCH_LIMIT rows.
+ADMIN_COUNT_LIMIT = 10000
+ADMIN_SEARCH_LIMIT = 500
+
+
+# Caching
+# Local memory is per process: with several workers, point 'default' at a
+# shared backend (e.g. FileBasedCache or Memcached) so invalidations made by
+# one worker are seen by the others.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fooddelivery',
+    },
+}
+
+# Restaurant/menu catalog cache (core/catalog.py)
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 60 * 60
+# Per-item prices read by the cart and checkout; short, since checkout charges them
+PRICE_CACHE_TIMEOUT = 60
+
+# Restaurant/menu search (core/search.py). Seconds before a worker rebuilds its
+# in-memory index in the background to pick up other workers' catalog edits.
+SEARCH_INDEX_TTL = 15 * 60
+
+
+# Tests create the hand-written (managed = False) tables in the test database.
+TEST_RUNNER = 'core.test_runner.UnmanagedModelTestRunner'
+
+
+# Cart storage (core/cart.py): SessionCartBackend, CacheCartBackend
+# (per-user entry in CART_CACHE_ALIAS) or SignedCookieCartBackend.
+CART_BACKEND = 'core.cart.SessionCartBackend'
+CART_CACHE_ALIAS = 'default'
+CART_CACHE_TIMEOUT = 60 * 60 * 24 * 14
+
+
+# Order confirmation snapshots (core/snapshots.py): the immutable part of an
+# order (header, items, prices) is cached after the first view. The status
+# and assignment are cached for ORDER_STATUS_TIMEOUT seconds and refreshed by
+# the order signals; the timeout bounds staleness after writes that bypass
+# the ORM (the AssignOrderDriver procedure, raw SQL, queryset.update()).
+ORDER_SNAPSHOT_CACHE_ALIAS = 'default'
+ORDER_SNAPSHOT_TIMEOUT = 60 * 60 * 24
+ORDER_STATUS_TIMEOUT = 30
+
+# Live order status over server-sent events (core/events.py). InProcessHub
+# reaches streams in the same process; with several workers use CacheHub,
+# which relays through ORDER_EVENTS_CACHE_ALIAS (a shared cache) and polls it.
+ORDER_EVENTS_HUB = 'core.events.InProcessHub'
+ORDER_EVENTS_CACHE_ALIAS = 'default'
+ORDER_EVENTS_POLL_INTERVAL = 1.0
+ORDER_EVENTS_KEEPALIVE = 15
+ORDER_EVENTS_MAX_AGE = 10 * 60
+
+
+# Customer order summaries (core/summaries.py)
+CUSTOMER_SUMMARY_CACHE_ALIAS = 'default'
+CUSTOMER_SUMMARY_TIMEOUT = 60 * 60 * 6
+
+
+# Serve home, menu, my_orders, order_confirmation and order_status with the
+# async views in core/async_views.py. Turn on when running under ASGI
+# (fooddelivery_project.asgi); under WSGI the sync views are faster.
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS') == '1'
+
+
+# Request instrumentation (core/perf.py). 0 disables it entirely; 1.0 samples
+# every request. Samples are kept in a per-process ring buffer (/perf/, staff
+# only) and, if PERF_SPOOL_PATH is set, appended there for 'manage.py perf_report'.
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 0))
+PERF_BUFFER_SIZE = 2000
+PERF_SPOOL_PATH = os.environ.get('PERF_SPOOL_PATH')